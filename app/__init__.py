@@ -1,16 +1,50 @@
+import logging
+import os
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
 from flask import Flask
+from jinja2 import FileSystemBytecodeCache
+from werkzeug.middleware.proxy_fix import ProxyFix
+
 from config import Config
 from .extensions import db, login_manager, migrate
+from .services.admission import admission_control
+from .services.batching import check_database_backend
+from .services.object_cache import object_cache
+from .services.storage import make_storage, upload_url
+from .services.warmup import StartupTimer, warm_up
+
+_IMPORT_FINISHED = time.perf_counter()
 
 def create_app():
+    timer = StartupTimer()
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    # remote_addr from X-Forwarded-For, for per-IP admission limits behind a proxy
+    if app.config.get("PROXY_FIX_X_FOR"):
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["PROXY_FIX_X_FOR"])
+
+    # Persistent compiled-template cache, shared by workers and kept across restarts
+    cache_dir = app.config.get("JINJA_BYTECODE_CACHE_DIR")
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        app.jinja_options = {**app.jinja_options, "bytecode_cache": FileSystemBytecodeCache(cache_dir)}
+    timer.mark("config")
+
+    check_database_backend(app)
     db.init_app(app)
     migrate.init_app(app, db)
     login_manager.init_app(app)
     login_manager.login_view = "auth.login"
     login_manager.login_message_category = "warning"
+    app.extensions["storage"] = make_storage(app)
+    object_cache.init_app(app)
+    admission_control.init_app(app)
+    app.add_template_global(upload_url)
+    timer.mark("extensions")
 
     # Register blueprints (controllers)
     from .views.auth_routes import auth_bp
@@ -18,11 +52,28 @@ def create_app():
     from .views.comics_routes import comics_bp
     from .views.admin_routes import admin_bp
     from .views.characters_routes import characters_bp
+    from .views.api_routes import api_bp
 
     app.register_blueprint(characters_bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(main_bp)
     app.register_blueprint(comics_bp, url_prefix="/comics")
+    app.register_blueprint(api_bp)
+
+    from .cli import register_commands
+    register_commands(app)
+    timer.mark("blueprints")
+
+    if app.config.get("WARMUP_ON_START"):
+        warm_up(app)
+        timer.mark("warmup")
+
+    app.extensions["startup_timer"] = timer
+    app.extensions["startup_import_ms"] = (_IMPORT_FINISHED - _IMPORT_STARTED) * 1000
+    if app.config.get("STARTUP_REPORT"):
+        logging.getLogger(__name__).warning(
+            "%s; package import %.1fms", timer.report(), app.extensions["startup_import_ms"]
+        )
 
     return app
@@ -0,0 +1,266 @@
+import csv
+import os
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+
+from .extensions import db
+from .models.comic import Comic
+from .models.comic_stats import ComicDailyStats
+from .server import default_threads, default_workers, run_server
+from .services.analytics import flush_counters
+from .services.list_queries import compare_list_loading
+from .services.object_cache import COMIC, PDF_FILE, object_cache
+from .services.pdf_linearize import linearize_pdf, linearizer_available
+from .services.rankings import refresh_rankings
+from .services.schema_lint import lint_schema
+from .services.site_stats import reconcile_site_stats
+from .services.sitemaps import SitemapError, rebuild_sitemaps
+from .services.snapshot import SnapshotError, create_snapshot, latest_archive, restore_snapshot
+from .services.storage import get_storage
+from .services.user_import import Rejected, import_users, read_records
+from .services.warmup import warm_up
+
+
+def register_commands(app):
+    app.cli.add_command(linearize_pdfs_command)
+    app.cli.add_command(serve_command)
+    app.cli.add_command(startup_report_command)
+    app.cli.add_command(stats_report_command)
+    app.cli.add_command(refresh_rankings_command)
+    app.cli.add_command(reconcile_stats_command)
+    app.cli.add_command(build_sitemaps_command)
+    app.cli.add_command(lint_schema_command)
+    app.cli.add_command(bench_lists_command)
+    app.cli.add_command(snapshot_command)
+    app.cli.add_command(restore_command)
+    app.cli.add_command(import_users_command)
+
+
+@click.command("linearize-pdfs")
+@click.option("--force", is_flag=True, help="Rebuild copies that already exist.")
+def linearize_pdfs_command(force):
+    """Build fast-web-view copies for comics uploaded before linearization."""
+    if not linearizer_available():
+        raise click.ClickException("Install pikepdf or qpdf to linearize PDFs.")
+
+    storage = get_storage()
+    query = Comic.query.filter(Comic.pdf_file.isnot(None))
+    if not force:
+        query = query.filter(Comic.pdf_linearized_file.is_(None))
+
+    done = 0
+    for comic in query.all():
+        linearized = linearize_pdf(storage, comic.pdf_file)
+        if linearized:
+            comic.pdf_linearized_file = linearized
+            db.session.commit()
+            object_cache.invalidate(COMIC, comic.id)
+            object_cache.invalidate(PDF_FILE, comic.pdf_file)
+            done += 1
+        else:
+            click.echo(f"Skipped comic {comic.id} ({comic.pdf_file})")
+
+    click.echo(f"Linearized {done} PDF(s).")
+
+
+@click.command("serve")
+@click.option("--bind", "-b", default=None, help="host:port or unix:/path (default SERVER_BIND).")
+@click.option("--workers", "-w", type=int, default=None, help="Worker processes (default 2*CPU+1).")
+@click.option("--threads", "-t", type=int, default=None, help="Threads per worker (default 4).")
+@click.option("--max-requests", type=int, default=None, help="Recycle a worker after N requests.")
+@click.option("--worker-class", "-k", type=click.Choice(["gthread", "gevent"]), default=None,
+              help="gthread (default) or gevent for many long-lived comment streams.")
+@click.option("--pid", "pidfile", default=None, help="Write the master PID here (for HUP reloads).")
+@click.option("--warmup/--no-warmup", default=True, help="Compile templates and mappers before forking.")
+def serve_command(bind, workers, threads, max_requests, worker_class, pidfile, warmup):
+    """Run the app under a pre-forking, multi-threaded production server.
+
+    SIGHUP to the master replaces workers gracefully; for a zero-downtime code
+    deploy send SIGUSR2, then SIGTERM to the old master.
+    """
+    config = current_app.config
+    if warmup and not config.get("WARMUP_ON_START"):
+        warm_up(current_app)
+
+    options = {
+        "bind": bind or config["SERVER_BIND"],
+        "workers": workers or config["SERVER_WORKERS"] or default_workers(),
+        "threads": threads or config["SERVER_THREADS"] or default_threads(),
+        "worker_class": worker_class or config["SERVER_WORKER_CLASS"],
+        "max_requests": max_requests if max_requests is not None else config["SERVER_MAX_REQUESTS"],
+        "max_requests_jitter": config["SERVER_MAX_REQUESTS_JITTER"],
+        "timeout": config["SERVER_TIMEOUT"],
+        "graceful_timeout": config["SERVER_GRACEFUL_TIMEOUT"],
+        "pidfile": pidfile,
+        "accesslog": "-",
+    }
+
+    try:
+        run_server(current_app._get_current_object(), options)
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc))
+
+
+@click.command("startup-report")
+def startup_report_command():
+    """Print create_app phase timings and the cost of a warm-up pass."""
+    timer = current_app.extensions["startup_timer"]
+    click.echo(f"package import: {current_app.extensions['startup_import_ms']:.1f}ms")
+    for name, ms in timer.phases.items():
+        click.echo(f"{name}: {ms:.1f}ms")
+    click.echo(f"create_app total: {timer.total_ms:.1f}ms")
+
+    result = warm_up(current_app)
+    click.echo(f"mapper configuration: {result['mappers_ms']:.1f}ms")
+    click.echo(f"template compilation: {result['templates_ms']:.1f}ms ({result['templates']} templates)")
+
+
+@click.command("stats-report")
+@click.option("--days", default=7, show_default=True, help="How many days back to include.")
+@click.option("--limit", default=20, show_default=True, help="Number of comics to list.")
+def stats_report_command(days, limit):
+    """Top comics by views/reads/downloads from the daily rollups."""
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    views = db.func.sum(ComicDailyStats.views)
+    reads = db.func.sum(ComicDailyStats.reads)
+    downloads = db.func.sum(ComicDailyStats.downloads)
+
+    rows = db.session.execute(
+        db.select(Comic.id, Comic.title, views, reads, downloads)
+        .join(ComicDailyStats, ComicDailyStats.comic_id == Comic.id)
+        .where(ComicDailyStats.day >= since)
+        .group_by(Comic.id, Comic.title)
+        .order_by(reads.desc(), views.desc())
+        .limit(limit)
+    ).all()
+
+    click.echo(f"Since {since.isoformat()} (UTC)")
+    click.echo(f"{'ID':>6}  {'VIEWS':>8}  {'READS':>8}  {'DL':>8}  TITLE")
+    for comic_id, title, v, r, d in rows:
+        click.echo(f"{comic_id:>6}  {v:>8}  {r:>8}  {d:>8}  {title}")
+
+
+@click.command("refresh-rankings")
+def refresh_rankings_command():
+    """Update trending / most discussed scores (run from cron)."""
+    flush_counters()
+    ranked = refresh_rankings()
+    click.echo(f"Ranked {ranked} comic(s).")
+
+
+@click.command("reconcile-stats")
+def reconcile_stats_command():
+    """Reset the site-wide counters from COUNT(*) (run from cron)."""
+    drift = reconcile_site_stats()
+    for name, delta in drift.items():
+        click.echo(f"{name}: off by {delta:+d}, fixed")
+    click.echo("Site stats reconciled.")
+
+
+@click.command("build-sitemaps")
+def build_sitemaps_command():
+    """Rebuild sitemap.xml, its shards and the Atom feed (needs SITE_URL)."""
+    try:
+        shards = rebuild_sitemaps()
+    except SitemapError as exc:
+        raise click.ClickException(str(exc))
+    click.echo(f"Sitemaps rebuilt ({shards} comic shard(s)) in {current_app.config['SITEMAP_DIR']}.")
+
+
+@click.command("lint-schema")
+def lint_schema_command():
+    """Flag unindexed foreign keys / ORDER BY columns and unapplied indexes."""
+    problems = lint_schema(current_app.root_path)
+    for problem in problems:
+        click.echo(f"- {problem}")
+    if problems:
+        raise click.ClickException(f"{len(problems)} schema problem(s) found.")
+    click.echo("Schema OK.")
+
+
+@click.command("bench-lists")
+@click.option("--repeat", default=5, show_default=True, help="Timed runs per query (best is reported).")
+def bench_lists_command(repeat):
+    """Time and memory of list pages: full entities vs projected rows."""
+    click.echo(f"{'LIST':<12} {'ROWS':>7}  {'ENTITY ms':>10} {'ENTITY KiB':>11}  {'ROWS ms':>9} {'ROWS KiB':>9}")
+    for name, rows, entity_ms, entity_kb, projected_ms, projected_kb in compare_list_loading(repeat):
+        click.echo(
+            f"{name:<12} {rows:>7}  {entity_ms:>10.1f} {entity_kb:>11.0f}  {projected_ms:>9.1f} {projected_kb:>9.0f}"
+        )
+
+
+@click.command("snapshot")
+@click.argument("output", required=False)
+@click.option("--base", default=None, help="Earlier snapshot to diff uploads against (default: newest in SNAPSHOT_DIR).")
+@click.option("--full", is_flag=True, help="Copy every upload, ignoring earlier snapshots.")
+def snapshot_command(output, base, full):
+    """Archive the database and changed uploads while the site stays up."""
+    snapshot_dir = current_app.config["SNAPSHOT_DIR"]
+    if not full and base is None:
+        base = latest_archive(snapshot_dir)
+    if output is None:
+        output = os.path.join(snapshot_dir, f"ismaverse-{datetime.utcnow():%Y%m%d-%H%M%S}.tar")
+
+    try:
+        manifest = create_snapshot(output, get_storage(), None if full else base, log=click.echo)
+    except SnapshotError as exc:
+        raise click.ClickException(str(exc))
+
+    files = manifest["files"].values()
+    copied = [f for f in files if f["archive"] == manifest["id"]]
+    click.echo(f"Snapshot {manifest['id']} -> {output}")
+    click.echo(
+        f"{len(copied)} of {len(files)} upload(s) copied ({sum(f['size'] for f in copied) / 1048576:.1f} MiB)"
+        + (f"; the rest are in earlier snapshots from {manifest['base']}" if manifest["base"] else "")
+    )
+
+
+@click.command("restore")
+@click.argument("archive")
+@click.option("--base", "bases", multiple=True, help="Earlier snapshot holding unchanged uploads (repeatable; "
+              "the archive's own directory is searched too).")
+@click.option("--yes", is_flag=True, help="Don't ask before replacing the database.")
+def restore_command(archive, bases, yes):
+    """Replace the database and uploads with a snapshot (stop the app first)."""
+    if not yes:
+        click.confirm(f"Replace the database at {current_app.config['SQLALCHEMY_DATABASE_URI']}?", abort=True)
+    try:
+        manifest = restore_snapshot(archive, get_storage(), bases, log=click.echo)
+    except SnapshotError as exc:
+        raise click.ClickException(str(exc))
+    click.echo(f"Restored snapshot {manifest['id']} ({manifest['created']}).")
+
+
+@click.command("import-users")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--rejects", default=None, help="CSV report of skipped rows (default: PATH.rejects.csv).")
+@click.option("--batch-size", default=500, show_default=True, help="Rows per lookup / insert transaction.")
+@click.option("--workers", type=int, default=None, help="Password hashing processes (default: CPU count).")
+@click.option("--roles", "default_roles", default="user", show_default=True, help="Roles for rows without a roles column.")
+@click.option("--dry-run", is_flag=True, help="Validate and report without inserting or hashing.")
+def import_users_command(path, rejects, batch_size, workers, default_roles, dry_run):
+    """Import users from CSV or JSONL (username, email, password or password_hash, roles)."""
+    rejects = rejects or f"{path}.rejects.csv"
+    with open(rejects, "w", newline="", encoding="utf-8") as report:
+        writer = csv.writer(report)
+        writer.writerow(Rejected._fields)
+        try:
+            result = import_users(
+                read_records(path),
+                writer.writerow,
+                batch_size=batch_size,
+                workers=workers,
+                default_roles=default_roles,
+                dry_run=dry_run,
+            )
+        except ValueError as exc:
+            raise click.ClickException(str(exc))
+
+    verb = "Would import" if dry_run else "Imported"
+    click.echo(f"{verb} {result.imported} of {result.read} user(s); {result.rejected} rejected.")
+    if result.rejected:
+        click.echo(f"Rejected rows: {rejects}")
+    else:
+        os.remove(rejects)
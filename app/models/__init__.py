@@ -2,3 +2,7 @@ from .comic import Comic
 from .character import Character
 from .comment import Comment
 from .user import User
+from .reading_progress import ReadingProgress
+from .comic_stats import ComicDailyStats, ComicStats
+from .comic_ranking import ComicRanking
+from .site_stat import SiteStat
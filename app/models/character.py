@@ -12,8 +12,13 @@ class Character(db.Model):
     origins = db.Column(db.Text, nullable=True)
     image_file = db.Column(db.String(255), nullable=True)
 
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
+    __table_args__ = (
+        # prefix search / name sort in the admin list
+        db.Index("ix_characters_superhero_name_lower", db.func.lower(superhero_name)),
+    )
+
     def __repr__(self) -> str:
         return f"<Character {self.id} {self.superhero_name}>"
@@ -8,11 +8,20 @@ class Comic(db.Model):
     title = db.Column(db.String(120), nullable=False)
     description = db.Column(db.Text, nullable=True)
     cover_image = db.Column(db.String(255), nullable=True)  # filename stored in static/img/comics/
-    created_at = db.Column(db.DateTime, server_default=db.func.now())
-    pdf_file = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, server_default=db.func.now(), index=True)
+    pdf_file = db.Column(db.String(255), nullable=True, index=True)  # serve_pdf looks comics up by it
+    pdf_linearized_file = db.Column(db.String(255), nullable=True)  # fast-web-view copy of pdf_file
+    # Deletes go through services.deletion as bulk statements; passive_deletes
+    # keeps the ORM from loading every comment if a Comic is deleted directly.
     comments = db.relationship(
         "Comment",
         backref="comic",
         lazy="dynamic",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
+
+    __table_args__ = (
+        # prefix search / name sort in the admin list
+        db.Index("ix_comics_title_lower", db.func.lower(title)),
     )
@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from ..extensions import db
+
+
+class ComicRanking(db.Model):
+    """
+    Time-decayed popularity scores per comic, refreshed by a scheduled job.
+    The *_seen / last_comment_id columns are the job's watermarks.
+    """
+    __tablename__ = "comic_rankings"
+
+    comic_id = db.Column(db.Integer, db.ForeignKey("comics.id"), primary_key=True)
+    trending_score = db.Column(db.Float, nullable=False, default=0.0, index=True)
+    discussion_score = db.Column(db.Float, nullable=False, default=0.0, index=True)
+    views_seen = db.Column(db.Integer, nullable=False, default=0)
+    reads_seen = db.Column(db.Integer, nullable=False, default=0)
+    downloads_seen = db.Column(db.Integer, nullable=False, default=0)
+    last_comment_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    # Optimistic locking: if two workers refresh at once, the loser gets
+    # StaleDataError and rolls back instead of double-counting.
+    __mapper_args__ = {"version_id_col": version}
@@ -0,0 +1,26 @@
+from ..extensions import db
+
+
+class ComicStats(db.Model):
+    """
+    All-time totals per comic, maintained from the in-memory counters.
+    """
+    __tablename__ = "comic_stats"
+
+    comic_id = db.Column(db.Integer, db.ForeignKey("comics.id"), primary_key=True)
+    views = db.Column(db.Integer, nullable=False, default=0)
+    reads = db.Column(db.Integer, nullable=False, default=0)
+    downloads = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ComicDailyStats(db.Model):
+    """
+    Daily rollup per comic (UTC days) for reporting.
+    """
+    __tablename__ = "comic_daily_stats"
+
+    comic_id = db.Column(db.Integer, db.ForeignKey("comics.id"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True, index=True)
+    views = db.Column(db.Integer, nullable=False, default=0)
+    reads = db.Column(db.Integer, nullable=False, default=0)
+    downloads = db.Column(db.Integer, nullable=False, default=0)
@@ -8,4 +8,9 @@ class Comment(db.Model):
     body = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
     comic_id = db.Column(db.Integer, db.ForeignKey("comics.id"), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+
+    __table_args__ = (
+        # "comments on a comic, newest first" and deletes by comic
+        db.Index("ix_comments_comic_id_created_at_id", comic_id, created_at, id),
+    )
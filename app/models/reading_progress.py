@@ -0,0 +1,12 @@
+from datetime import datetime
+
+from ..extensions import db
+
+
+class ReadingProgress(db.Model):
+    __tablename__ = "reading_progress"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    comic_id = db.Column(db.Integer, db.ForeignKey("comics.id"), primary_key=True, index=True)
+    page = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,14 @@
+from ..extensions import db
+
+
+class SiteStat(db.Model):
+    """
+    Site-wide row counts ("users", "comics", ...), adjusted in the same
+    transaction as each insert/delete and reconciled against COUNT(*) by a
+    periodic job. Also holds "username_changes", a rename counter that the
+    reconciliation leaves alone.
+    """
+    __tablename__ = "site_stats"
+
+    name = db.Column(db.String(40), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
@@ -1,10 +1,33 @@
 from datetime import datetime
 
 from flask_login import UserMixin
+from sqlalchemy.orm import validates
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from ..extensions import db, login_manager
 
+# One bit per known role. `roles` keeps the editable comma-separated string;
+# `role_mask` is derived from it and is what permission checks and queries use.
+ROLE_USER = 1
+ROLE_ADMIN = 2
+ROLE_BITS = {"user": ROLE_USER, "admin": ROLE_ADMIN}
+ALL_ROLE_MASKS = range(1 << len(ROLE_BITS))
+
+
+def roles_to_mask(roles: str) -> int:
+    mask = 0
+    for role in (roles or "").split(","):
+        mask |= ROLE_BITS.get(role.strip(), 0)
+    return mask
+
+
+def masks_with(bit: int) -> list:
+    """
+    Every mask value that has `bit` set. Filtering with IN over these few
+    values uses the role_mask index, unlike a bitwise AND expression.
+    """
+    return [mask for mask in ALL_ROLE_MASKS if mask & bit]
+
 
 class User(UserMixin, db.Model):
     __tablename__ = "users"
@@ -14,8 +37,16 @@ class User(UserMixin, db.Model):
     email = db.Column(db.String(120), unique=True, nullable=True)
     password_hash = db.Column(db.String(255), nullable=False)
     roles = db.Column(db.String(120), nullable=False, default="user")
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    comments = db.relationship("Comment", backref="author", lazy="dynamic")
+    role_mask = db.Column(db.Integer, nullable=False, default=ROLE_USER, server_default="1", index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    comments = db.relationship("Comment", backref="author", lazy="dynamic", passive_deletes=True)
+
+    __table_args__ = (
+        # case-insensitive login lookups and admin prefix search
+        db.Index("ix_users_username_lower", db.func.lower(username)),
+        # admin search and the import's uniqueness check compare lower(email)
+        db.Index("ix_users_email_lower", db.func.lower(email)),
+    )
 
     def set_password(self, password: str) -> None:
         self.password_hash = generate_password_hash(password)
@@ -23,9 +54,25 @@ class User(UserMixin, db.Model):
     def check_password(self, password: str) -> bool:
         return check_password_hash(self.password_hash, password)
 
+    @validates("roles")
+    def _sync_role_mask(self, key, value):
+        self.role_mask = roles_to_mask(value)
+        return value
+
+    def has_role(self, bit: int) -> bool:
+        return bool((self.role_mask or 0) & bit)
+
     @property
     def is_admin(self) -> bool:
-        return "admin" in {role.strip() for role in (self.roles or "").split(",")}
+        return self.has_role(ROLE_ADMIN)
+
+    @classmethod
+    def with_role(cls, bit: int):
+        """
+        Indexed filter expression for users holding a role, e.g.
+        User.query.filter(User.with_role(ROLE_ADMIN)).
+        """
+        return cls.role_mask.in_(masks_with(bit))
 
 
 @login_manager.user_loader
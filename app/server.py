@@ -0,0 +1,75 @@
+import multiprocessing
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:  # not available on Windows dev machines
+    BaseApplication = None
+
+
+def default_workers() -> int:
+    # Classic gunicorn sizing: enough processes to keep every core busy
+    # while some workers wait on SQLite / disk I/O.
+    return multiprocessing.cpu_count() * 2 + 1
+
+
+def default_threads() -> int:
+    # Threads absorb slow clients (PDF range requests) inside each process
+    return 4
+
+
+def run_server(app, options: dict) -> None:
+    """
+    Run an already created Flask app under gunicorn.
+
+    The app is built once in the master and inherited by every forked worker
+    (preload), and workers are recycled after max_requests (+ jitter) to bound
+    memory. `kill -HUP <master pid>` replaces workers without dropping
+    connections. Because the app is preloaded, a code deploy needs
+    `kill -USR2 <master pid>` (new master + workers on the new code) followed
+    by `kill -TERM <old master pid>` once the new one is up.
+    """
+    if BaseApplication is None:
+        raise RuntimeError("gunicorn is not installed (pip install gunicorn).")
+
+    # gthread: one OS thread per in-flight request (default).
+    # gevent: greenlets, so thousands of idle comment streams stay cheap.
+    worker_class = options.pop("worker_class", None) or "gthread"
+    if worker_class == "gevent":
+        try:
+            import gevent  # noqa: F401
+        except ImportError:
+            raise RuntimeError("gevent is not installed (pip install gevent).")
+        options.pop("threads", None)
+        options.setdefault("worker_connections", 1000)
+    elif app.config.get("COMMENT_FEED_SSE"):
+        # Every open stream would pin one of the worker's few threads for minutes
+        raise RuntimeError("COMMENT_FEED_SSE needs the gevent worker class (or set COMMENT_FEED_SSE=0).")
+    elif app.config.get("COMMENT_FEED_MAX_POLLS", 0) >= (options.get("threads") or default_threads()):
+        # Parked long-polls would leave no thread for ordinary requests
+        raise RuntimeError("COMMENT_FEED_MAX_POLLS must be lower than the number of threads per worker.")
+
+    def post_fork(server, worker):
+        # Connections opened in the master (while preloading) must not be shared
+        from .extensions import db
+        with app.app_context():
+            db.engine.dispose(close=False)
+
+    def worker_exit(server, worker):
+        # Write out buffered progress/counters before the worker goes away
+        from .services.batching import flush_all
+        flush_all()
+
+    class _Application(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                if value is not None:
+                    self.cfg.set(key, value)
+            self.cfg.set("preload_app", True)
+            self.cfg.set("worker_class", worker_class)
+            self.cfg.set("post_fork", post_fork)
+            self.cfg.set("worker_exit", worker_exit)
+
+        def load(self):
+            return app
+
+    _Application().run()
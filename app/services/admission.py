@@ -0,0 +1,315 @@
+import re
+import threading
+import time
+import uuid
+from functools import wraps
+
+from flask import current_app, request
+from flask_login import current_user
+from werkzeug.wsgi import ClosingIterator
+
+try:
+    import redis
+except ImportError:  # optional dependency, only needed for ADMISSION_BACKEND=redis
+    redis = None
+
+UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+class Policy:
+    """
+    Token bucket (`rate` tokens/second refilled up to `burst`) plus a cap on
+    requests in flight, both per client.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float, concurrency: int):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+
+    def __repr__(self) -> str:
+        return f"<Policy {self.name} rate={self.rate:g}/s burst={self.burst:g} concurrency={self.concurrency}>"
+
+
+def parse_policy(name: str, spec: str) -> Policy:
+    """
+    "rate=5/m burst=10 concurrency=2" -> Policy. Omitted parts are unlimited.
+    """
+    rate, burst, concurrency = 0.0, 0.0, 0
+    for part in spec.replace(",", " ").split():
+        key, _, value = part.partition("=")
+        if key == "rate":
+            match = re.fullmatch(r"([\d.]+)/([smh])", value)
+            if not match:
+                raise ValueError(f"Bad rate {value!r} in admission policy {name!r}")
+            rate = float(match.group(1)) / UNITS[match.group(2)]
+        elif key == "burst":
+            burst = float(value)
+        elif key == "concurrency":
+            concurrency = int(value)
+        else:
+            raise ValueError(f"Unknown key {key!r} in admission policy {name!r}")
+    if rate and not burst:
+        burst = max(1.0, rate)
+    return Policy(name, rate, burst, concurrency)
+
+
+class Decision:
+    def __init__(self, allowed: bool, retry_after: float = 0.0, slot=None):
+        self.allowed = allowed
+        self.retry_after = retry_after
+        self.slot = slot
+
+
+# =====================================================
+# BACKENDS
+# =====================================================
+class MemoryBackend:
+    """
+    Per-process state: exact for one worker, and with N workers a client can
+    get up to N times the configured limits.
+    """
+
+    MAX_KEYS = 100_000
+
+    def __init__(self):
+        self._buckets = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: float, now: float) -> float:
+        """
+        Spend one token; returns 0 if admitted, else seconds until one is available.
+        """
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (burst, now, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0
+            if tokens < 1:
+                wait = (1 - tokens) / rate
+            else:
+                tokens -= 1
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            if len(self._buckets) > self.MAX_KEYS:
+                self._prune(now)
+            return wait
+
+    def _prune(self, now):
+        # Buckets that have refilled completely are the same as no bucket
+        for k in [k for k, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+            del self._buckets[k]
+
+    def acquire(self, key: str, limit: int, ttl: float):
+        with self._lock:
+            count = self._in_flight.get(key, 0)
+            if count >= limit:
+                return None
+            self._in_flight[key] = count + 1
+            return key
+
+    def release(self, key: str, slot) -> None:
+        with self._lock:
+            count = self._in_flight.get(key, 0) - 1
+            if count > 0:
+                self._in_flight[key] = count
+            else:
+                self._in_flight.pop(key, None)
+
+
+class RedisBackend:
+    """
+    Shared across workers and hosts (any Redis-protocol server). Both checks
+    are single Lua scripts, so they are atomic. In-flight slots are sorted-set
+    members that expire after `ttl`, so a crashed worker can't leak them.
+    """
+
+    TAKE = """
+    local data = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    local tokens = tonumber(data[1]) or burst
+    local updated = tonumber(data[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+    local wait = 0
+    if tokens < 1 then
+        wait = (1 - tokens) / rate
+    else
+        tokens = tokens - 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return tostring(wait)
+    """
+
+    ACQUIRE = """
+    local now, ttl, limit = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - ttl)
+    if redis.call('ZCARD', KEYS[1]) >= limit then
+        return 0
+    end
+    redis.call('ZADD', KEYS[1], now, ARGV[4])
+    redis.call('EXPIRE', KEYS[1], math.ceil(ttl))
+    return 1
+    """
+
+    def __init__(self, url: str, prefix: str = "ismaverse:admission"):
+        if redis is None:
+            raise RuntimeError("redis is required for ADMISSION_BACKEND=redis (pip install redis).")
+        self.client = redis.Redis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+        self.prefix = prefix
+        self._take = self.client.register_script(self.TAKE)
+        self._acquire = self.client.register_script(self.ACQUIRE)
+
+    def take(self, key: str, rate: float, burst: float, now: float) -> float:
+        return float(self._take(keys=[f"{self.prefix}:tb:{key}"], args=[rate, burst, now]))
+
+    def acquire(self, key: str, limit: int, ttl: float):
+        slot = uuid.uuid4().hex
+        if self._acquire(keys=[f"{self.prefix}:cc:{key}"], args=[time.time(), ttl, limit, slot]):
+            return slot
+        return None
+
+    def release(self, key: str, slot) -> None:
+        self.client.zrem(f"{self.prefix}:cc:{key}", slot)
+
+
+# =====================================================
+# CONTROLLER
+# =====================================================
+class AdmissionControl:
+    def __init__(self, app=None):
+        self.policies = {}
+        self.backend = MemoryBackend()
+        self.enabled = False
+        self.slot_ttl = 120.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self.enabled = config.get("ADMISSION_ENABLED", True)
+        self.policies = {
+            name: parse_policy(name, spec)
+            for name, spec in (config.get("ADMISSION_POLICIES") or {}).items()
+        }
+        # A request slot outlives any request the server would let run
+        self.slot_ttl = float(config.get("SERVER_TIMEOUT") or 60) * 2
+        if config.get("ADMISSION_BACKEND") == "redis":
+            self.backend = RedisBackend(config.get("ADMISSION_REDIS_URL") or config["CACHE_REDIS_URL"])
+        else:
+            self.backend = MemoryBackend()
+        app.extensions["admission"] = self
+
+    def check(self, policy: Policy, client: str) -> Decision:
+        key = f"{policy.name}:{client}"
+        try:
+            if policy.rate:
+                wait = self.backend.take(key, policy.rate, policy.burst, time.time())
+                if wait > 0:
+                    return Decision(False, wait)
+            slot = None
+            if policy.concurrency:
+                slot = self.backend.acquire(key, policy.concurrency, self.slot_ttl)
+                if slot is None:
+                    return Decision(False, 1.0)
+            return Decision(True, slot=slot)
+        except Exception as exc:
+            # Shared backend down: let traffic through rather than fail every request
+            current_app.logger.warning("Admission backend unavailable: %s", exc)
+            return Decision(True)
+
+    def release(self, policy: Policy, client: str, slot) -> None:
+        if slot is None:
+            return
+        try:
+            self.backend.release(f"{policy.name}:{client}", slot)
+        except Exception as exc:
+            current_app.logger.warning("Admission backend unavailable: %s", exc)
+
+
+admission_control = AdmissionControl()
+
+
+def client_key(by: str = "client") -> str:
+    """
+    Logged-in users are limited per account, everyone else per address.
+    Behind a proxy, set PROXY_FIX_X_FOR so remote_addr is the real client.
+    """
+    if by == "client" and current_user.is_authenticated:
+        return f"u{current_user.id}"
+    return f"ip{request.remote_addr}"
+
+
+def too_many_requests(retry_after: float):
+    seconds = max(1, int(retry_after + 0.999))
+    response = current_app.response_class("Too many requests, please slow down.\n", status=429, mimetype="text/plain")
+    response.headers["Retry-After"] = str(seconds)
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+def release_after_body(response, callback) -> None:
+    """
+    Run `callback` when the server closes the response body. Servers never
+    call Response.close() for direct_passthrough bodies (send_file), so the
+    body's own close is chained instead; a file wrapper keeps its type and
+    gunicorn can still sendfile() it.
+    """
+    if not response.direct_passthrough:
+        response.call_on_close(callback)
+        return
+
+    body = response.response
+    original = getattr(body, "close", None)
+
+    def close():
+        try:
+            if original is not None:
+                original()
+        finally:
+            callback()
+
+    try:
+        body.close = close
+    except AttributeError:  # generators and other slotted iterables
+        response.response = ClosingIterator(body, close)
+
+
+def admission(policy_name: str, by: str = "client", methods=None):
+    """
+    Route decorator: token bucket + concurrency cap from ADMISSION_POLICIES.
+    The in-flight slot is held until the response body has been sent, so
+    streamed downloads count for their whole transfer.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            control = admission_control
+            policy = control.policies.get(policy_name)
+            if not control.enabled or policy is None or (methods and request.method not in methods):
+                return view(*args, **kwargs)
+
+            client = client_key(by)
+            decision = control.check(policy, client)
+            if not decision.allowed:
+                return too_many_requests(decision.retry_after)
+
+            try:
+                response = current_app.make_response(view(*args, **kwargs))
+            except BaseException:
+                control.release(policy, client, decision.slot)
+                raise
+            if decision.slot is not None:
+                app = current_app._get_current_object()
+
+                def release():
+                    with app.app_context():
+                        control.release(policy, client, decision.slot)
+
+                release_after_body(response, release)
+            return response
+
+        return wrapped
+
+    return decorator
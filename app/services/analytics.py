@@ -0,0 +1,112 @@
+import random
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from ..extensions import db
+from ..models.comic import Comic
+from ..models.comic_stats import ComicDailyStats, ComicStats
+from .batching import PeriodicFlusher, chunked, existing_ids, upsert_statement
+
+METRICS = ("views", "reads", "downloads")
+
+
+class ShardedCounter:
+    """
+    Thread-safe counter split over several locks so concurrent requests in
+    one worker rarely contend. drain() swaps every shard out and merges them.
+    """
+
+    def __init__(self, shards: int = 8):
+        self._shards = [(threading.Lock(), defaultdict(int)) for _ in range(shards)]
+        self._local = threading.local()
+
+    def _shard(self):
+        # Picked once per thread. Not get_ident() % shards: thread idents are
+        # aligned addresses, so that put every thread on shard 0.
+        index = getattr(self._local, "index", None)
+        if index is None:
+            index = self._local.index = random.randrange(len(self._shards))
+        return self._shards[index]
+
+    def add(self, key, amount: int = 1) -> None:
+        lock, counts = self._shard()
+        with lock:
+            counts[key] += amount
+
+    def drain(self) -> dict:
+        merged = defaultdict(int)
+        for lock, counts in self._shards:
+            with lock:
+                snapshot = dict(counts)
+                counts.clear()
+            for key, amount in snapshot.items():
+                merged[key] += amount
+        return merged
+
+
+# (comic_id, day, metric) -> count since the last flush
+counters = ShardedCounter()
+
+
+def _upsert_adding(model, rows: list, key_columns: list) -> None:
+    table = model.__table__
+    for chunk in chunked(rows):
+        stmt, excluded = upsert_statement(table, chunk)
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[table.c[name] for name in key_columns],
+                set_={m: table.c[m] + excluded[m] for m in METRICS},
+            )
+        )
+
+
+def flush_counters() -> int:
+    """
+    Apply all pending deltas in one transaction (daily rows + totals).
+    Returns the number of (comic, day) rows touched.
+    """
+    deltas = counters.drain()
+    if not deltas:
+        return 0
+
+    daily = defaultdict(lambda: dict.fromkeys(METRICS, 0))
+    totals = defaultdict(lambda: dict.fromkeys(METRICS, 0))
+    try:
+        # Counts for comics deleted since they were recorded are dropped
+        comics = existing_ids(Comic.id, {comic_id for comic_id, _, _ in deltas})
+        for (comic_id, day, metric), amount in deltas.items():
+            if comic_id in comics:
+                daily[(comic_id, day)][metric] += amount
+                totals[comic_id][metric] += amount
+
+        _upsert_adding(
+            ComicDailyStats,
+            [{"comic_id": c, "day": d, **m} for (c, d), m in daily.items()],
+            ["comic_id", "day"],
+        )
+        _upsert_adding(
+            ComicStats,
+            [{"comic_id": c, **m} for c, m in totals.items()],
+            ["comic_id"],
+        )
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        # a comic deleted mid-flush (IntegrityError) would fail every retry
+        if not isinstance(exc, IntegrityError):
+            for key, amount in deltas.items():
+                counters.add(key, amount)
+        raise
+    return len(daily)
+
+
+counter_flusher = PeriodicFlusher("analytics-flush", flush_counters, interval=30)
+
+
+def count(app, comic_id: int, metric: str) -> None:
+    counters.add((comic_id, datetime.utcnow().date(), metric))
+    counter_flusher.interval = app.config.get("ANALYTICS_FLUSH_SECONDS", counter_flusher.interval)
+    counter_flusher.ensure_started(app)
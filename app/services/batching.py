@@ -0,0 +1,111 @@
+import atexit
+import os
+import threading
+import time
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+
+from ..extensions import db
+
+_flushers = []
+
+# Backends upsert_statement can build INSERT ... ON CONFLICT for
+UPSERT_DIALECTS = ("sqlite", "postgresql")
+
+
+class PeriodicFlusher:
+    """
+    Runs `flush_fn()` inside an app context every `interval` seconds on a
+    daemon thread, and once more at process exit.
+
+    The thread is started lazily (first `ensure_started`) and per process,
+    so buffers filled in gunicorn workers are flushed by their own worker.
+    """
+
+    def __init__(self, name: str, flush_fn, interval: float):
+        self.name = name
+        self.flush_fn = flush_fn
+        self.interval = interval
+        self._app = None
+        self._pid = None
+        self._lock = threading.Lock()
+        _flushers.append(self)
+
+    def ensure_started(self, app) -> None:
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._app = app
+            self._pid = os.getpid()
+            threading.Thread(target=self._loop, name=self.name, daemon=True).start()
+
+    def _loop(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self) -> None:
+        if self._app is None or self._pid != os.getpid():
+            return
+        with self._app.app_context():
+            try:
+                self.flush_fn()
+            except Exception:
+                self._app.logger.exception("%s flush failed", self.name)
+            finally:
+                db.session.remove()
+
+
+def flush_all() -> None:
+    for flusher in _flushers:
+        flusher.flush()
+
+
+atexit.register(flush_all)
+
+
+def chunked(items: list, size: int = 500):
+    # stay well under SQLite's bound-parameter limit per statement
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def existing_ids(column, ids) -> set:
+    """
+    The subset of `ids` still present in `column` (a primary key), so rows
+    buffered for a comic or user deleted since can be dropped, not written.
+    """
+    found = set()
+    for chunk in chunked(list(ids)):
+        found.update(db.session.execute(db.select(column).where(column.in_(chunk))).scalars())
+    return found
+
+
+def check_database_backend(app) -> None:
+    """
+    Refuse to start on a backend the buffered writers can't upsert into,
+    rather than failing every flush once traffic arrives.
+    """
+    backend = make_url(app.config["SQLALCHEMY_DATABASE_URI"]).get_backend_name()
+    if backend not in UPSERT_DIALECTS:
+        raise RuntimeError(
+            f"Unsupported database backend {backend!r}: use SQLite or PostgreSQL (needs INSERT ... ON CONFLICT)."
+        )
+
+
+def upsert_statement(table, rows: list):
+    """
+    INSERT ... ON CONFLICT for the current dialect (SQLite / PostgreSQL).
+    Returns (stmt, excluded) so callers can build their own SET clause.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "sqlite":
+        stmt = sqlite.insert(table).values(rows)
+    elif dialect == "postgresql":
+        stmt = postgresql.insert(table).values(rows)
+    else:
+        raise NotImplementedError(f"upsert not supported on {dialect}")
+    return stmt, stmt.excluded
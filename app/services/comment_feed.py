@@ -0,0 +1,179 @@
+import os
+import threading
+import time
+from collections import deque
+
+from ..extensions import db
+
+BUFFER_PER_COMIC = 200
+
+# Guards CommentBroker's per-process setup; only ever held for a few assignments
+_init_lock = threading.Lock()
+
+
+def serialize_comment(comment_id, body, created_at, author) -> dict:
+    return {
+        "id": comment_id,
+        "body": body,
+        "author": author,
+        "created_at": created_at.strftime("%b %d, %Y %I:%M %p") if created_at else "Just now",
+    }
+
+
+def comments_after(comic_id: int, after_id: int, limit: int = 100) -> list:
+    """
+    Comments on a comic newer than after_id, oldest first (author joined in).
+    """
+    from ..models.comment import Comment
+    from ..models.user import User
+
+    rows = db.session.execute(
+        db.select(Comment.id, Comment.body, Comment.created_at, User.username)
+        .join(User, User.id == Comment.user_id)
+        .where(Comment.comic_id == comic_id, Comment.id > after_id)
+        .order_by(Comment.id.asc())
+        .limit(limit)
+    ).all()
+    return [serialize_comment(*row) for row in rows]
+
+
+class CommentBroker:
+    """
+    In-process pub/sub for new comments.
+
+    Subscribers block on a condition instead of querying the database; the
+    posting request publishes directly. Comments posted through *other*
+    worker processes are picked up by one sync thread per process that runs
+    a single indexed query every `sync_interval` seconds while anyone is
+    listening, so the database cost does not grow with the number of
+    connected readers.
+
+    Locks and threads are created lazily per process so the broker is safe
+    to import before gunicorn forks (and is greenlet-friendly under gevent).
+    """
+
+    def __init__(self, sync_interval: float = 2.0):
+        self.sync_interval = sync_interval
+        self._pid = None
+
+    def _init_process_state(self):
+        if self._pid == os.getpid():
+            return
+        with _init_lock:
+            if self._pid == os.getpid():
+                return
+            self._cond = threading.Condition()
+            self._buffers = {}          # comic_id -> deque of payloads (ascending id)
+            self._sync_cursor = None    # highest comment id fetched by the sync thread
+            self._listeners = 0
+            self._polls = 0             # long-polls parked in poll()
+            self._sync_thread = None
+            # Last: other threads skip the lock once they see this process's pid
+            self._pid = os.getpid()
+
+    # ---------- publishing ----------
+    def publish(self, comic_id: int, payload: dict) -> None:
+        self._init_process_state()
+        with self._cond:
+            buffer = self._buffers.setdefault(comic_id, deque(maxlen=BUFFER_PER_COMIC))
+            if any(e["id"] == payload["id"] for e in buffer):
+                return  # local post seen again by the sync thread
+
+            # keep ascending id order; late arrivals from other workers are rare
+            if not buffer or buffer[-1]["id"] < payload["id"]:
+                buffer.append(payload)
+            else:
+                items = sorted([*buffer, payload], key=lambda e: e["id"])
+                buffer.clear()
+                buffer.extend(items)
+            self._cond.notify_all()
+
+    # ---------- subscribing ----------
+    def wait_for(self, comic_id: int, after_id: int, timeout: float, seen=None) -> list:
+        """
+        Block until comments newer than after_id (and not in `seen`) exist,
+        or until timeout. Returns them oldest first; an empty list on timeout.
+        """
+        self._init_process_state()
+        seen = seen or ()
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._listeners += 1
+            try:
+                while True:
+                    events = [
+                        e for e in self._buffers.get(comic_id, ())
+                        if e["id"] > after_id and e["id"] not in seen
+                    ]
+                    if events:
+                        return events
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return []
+                    self._cond.wait(remaining)
+            finally:
+                self._listeners -= 1
+
+    def poll(self, comic_id: int, after_id: int, timeout: float, max_polls: int):
+        """
+        wait_for for long-polls, which each hold a server thread while they
+        wait: returns None at once when `max_polls` are already parked in
+        this process, so the rest of the worker's threads stay free.
+        """
+        self._init_process_state()
+        with self._cond:
+            if self._polls >= max_polls:
+                return None
+            self._polls += 1
+        try:
+            return self.wait_for(comic_id, after_id, timeout)
+        finally:
+            with self._cond:
+                self._polls -= 1
+
+    # ---------- cross-process sync ----------
+    def ensure_sync(self, app) -> None:
+        self._init_process_state()
+        self.sync_interval = app.config.get("COMMENT_FEED_SYNC_SECONDS", self.sync_interval)
+        with self._cond:
+            if self._sync_thread is not None and self._sync_thread.is_alive():
+                return
+            self._sync_thread = threading.Thread(
+                target=self._sync_loop, args=(app,), name="comment-feed-sync", daemon=True
+            )
+            self._sync_thread.start()
+
+    def _sync_loop(self, app) -> None:
+        from ..models.comment import Comment
+        from ..models.user import User
+
+        with app.app_context():
+            if self._sync_cursor is None:
+                self._sync_cursor = db.session.execute(db.select(db.func.max(Comment.id))).scalar() or 0
+                db.session.remove()
+
+            while True:
+                time.sleep(self.sync_interval)
+                if not self._listeners:
+                    continue
+                try:
+                    rows = db.session.execute(
+                        db.select(Comment.comic_id, Comment.id, Comment.body, Comment.created_at, User.username)
+                        .join(User, User.id == Comment.user_id)
+                        .where(Comment.id > self._sync_cursor)
+                        .order_by(Comment.id.asc())
+                        .limit(500)
+                    ).all()
+                except Exception:
+                    app.logger.exception("comment feed sync failed")
+                    continue
+                finally:
+                    db.session.remove()
+
+                for comic_id, *fields in rows:
+                    self.publish(comic_id, serialize_comment(*fields))
+                if rows:
+                    self._sync_cursor = rows[-1][1]
+
+
+comment_broker = CommentBroker()
@@ -0,0 +1,56 @@
+from ..extensions import db
+from ..models.character import Character
+from ..models.comic import Comic
+from ..models.comic_ranking import ComicRanking
+from ..models.comic_stats import ComicDailyStats, ComicStats
+from ..models.comment import Comment
+from ..models.reading_progress import ReadingProgress
+from ..models.user import User
+from .site_stats import COUNTED, adjust
+from .storage import get_storage
+
+# Rows that belong to a comic / a user, deleted with one statement each
+COMIC_CHILDREN = (Comment, ReadingProgress, ComicDailyStats, ComicStats, ComicRanking)
+USER_CHILDREN = (Comment, ReadingProgress)
+
+# model -> its site_stats counter
+STAT_NAMES = {model: name for name, model in COUNTED.items()}
+
+
+def _delete(model, condition) -> None:
+    result = db.session.execute(db.delete(model).where(condition))
+    if model in STAT_NAMES:
+        adjust(STAT_NAMES[model], -result.rowcount)
+
+
+def delete_comic(comic_id: int) -> None:
+    """
+    Set-based delete of a comic and everything hanging off it.
+    Runs in the caller's transaction; nothing is loaded into the session.
+    """
+    for model in COMIC_CHILDREN:
+        _delete(model, model.comic_id == comic_id)
+    _delete(Comic, Comic.id == comic_id)
+
+
+def delete_user(user_id: int) -> None:
+    for model in USER_CHILDREN:
+        _delete(model, model.user_id == user_id)
+    _delete(User, User.id == user_id)
+
+
+def delete_character(character_id: int) -> None:
+    _delete(Character, Character.id == character_id)
+
+
+def remove_files(keys) -> None:
+    """
+    Best-effort blob cleanup; call only after the DB transaction committed,
+    so a rolled-back delete never loses its files.
+    """
+    storage = get_storage()
+    for key in keys:
+        try:
+            storage.delete(key)
+        except Exception:
+            pass
@@ -0,0 +1,103 @@
+import time
+import tracemalloc
+
+from ..extensions import db
+from ..models.character import Character
+from ..models.comic import Comic
+from ..models.comment import Comment
+from ..models.user import User
+
+# Cards only show the start of long Text columns; the database cuts them
+# (templates add the ellipsis with |truncate(EXCERPT_CHARS - 20))
+EXCERPT_CHARS = 300
+
+
+def excerpt(column, length: int = EXCERPT_CHARS):
+    return db.func.substr(column, 1, length).label(column.key)
+
+
+# Columns each list page renders. Queries built from these return plain
+# Row tuples (attribute access, no identity map, no change tracking).
+COMIC_CARD_COLUMNS = (Comic.id, Comic.title, Comic.cover_image, excerpt(Comic.description))
+COMIC_ADMIN_COLUMNS = (Comic.id, Comic.title, excerpt(Comic.description), Comic.pdf_file, Comic.created_at)
+
+# The public character cards are the only place powers/weakness/origins are
+# shown, so they stay whole there; the admin list only needs a powers excerpt.
+CHARACTER_CARD_COLUMNS = (
+    Character.id,
+    Character.superhero_name,
+    Character.image_file,
+    Character.powers,
+    Character.weakness,
+    Character.origins,
+)
+CHARACTER_ADMIN_COLUMNS = (Character.id, Character.superhero_name, excerpt(Character.powers), Character.created_at)
+
+USER_ADMIN_COLUMNS = (User.id, User.username, User.email, User.roles, User.created_at)
+
+COMMENT_LIST_COLUMNS = (Comment.id, Comment.body, Comment.created_at, User.username)
+
+
+def comic_cards():
+    stmt = db.select(*COMIC_CARD_COLUMNS).order_by(Comic.created_at.desc())
+    return db.session.execute(stmt).all()
+
+
+def character_cards():
+    stmt = db.select(*CHARACTER_CARD_COLUMNS).order_by(Character.created_at.desc())
+    return db.session.execute(stmt).all()
+
+
+def comment_rows(comic_id: int):
+    stmt = (
+        db.select(*COMMENT_LIST_COLUMNS)
+        .join(User, User.id == Comment.user_id)
+        .where(Comment.comic_id == comic_id)
+        .order_by(Comment.created_at.desc(), Comment.id.desc())
+    )
+    return db.session.execute(stmt).all()
+
+
+# =====================================================
+# MEASUREMENT (`flask bench-lists`)
+# =====================================================
+def _measure(load, repeat: int):
+    """
+    Best wall time and peak traced allocation of load() over `repeat` runs,
+    each in a fresh session so the identity map starts empty.
+    """
+    best_ms = None
+    for _ in range(repeat):
+        db.session.remove()
+        started = time.perf_counter()
+        rows = load()
+        elapsed = (time.perf_counter() - started) * 1000
+        best_ms = elapsed if best_ms is None else min(best_ms, elapsed)
+        del rows
+
+    db.session.remove()
+    tracemalloc.start()
+    rows = load()
+    peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    count = len(rows)
+    del rows
+    db.session.remove()
+    return count, best_ms, peak_kb
+
+
+def compare_list_loading(repeat: int = 5) -> list:
+    """
+    (name, rows, entity_ms, entity_kb, projected_ms, projected_kb) for each
+    public list: full ORM entities vs the projected card rows.
+    """
+    cases = (
+        ("comics", lambda: Comic.query.order_by(Comic.created_at.desc()).all(), comic_cards),
+        ("characters", lambda: Character.query.order_by(Character.created_at.desc()).all(), character_cards),
+    )
+    results = []
+    for name, entities, projected in cases:
+        rows, entity_ms, entity_kb = _measure(entities, repeat)
+        _, projected_ms, projected_kb = _measure(projected, repeat)
+        results.append((name, rows, entity_ms, entity_kb, projected_ms, projected_kb))
+    return results
@@ -0,0 +1,349 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import abort, current_app
+
+try:
+    import redis
+except ImportError:  # optional dependency, only needed for CACHE_REDIS_URL
+    redis = None
+
+from ..extensions import db
+from ..models.character import Character
+from ..models.comic import Comic
+from ..models.user import User
+
+# Namespaces; one version counter per (namespace, id)
+COMIC = "comic"
+CHARACTER = "character"
+USER_NAME = "username"
+PDF_FILE = "pdf_file"
+
+_MISS = object()
+
+
+def _encode(value) -> str:
+    def default(obj):
+        if isinstance(obj, datetime):
+            return {"__dt__": obj.isoformat()}
+        raise TypeError(f"Cannot cache {type(obj).__name__}")
+    return json.dumps(value, default=default, separators=(",", ":"))
+
+
+def _decode(raw):
+    def hook(obj):
+        if "__dt__" in obj and len(obj) == 1:
+            return datetime.fromisoformat(obj["__dt__"])
+        return obj
+    return json.loads(raw, object_hook=hook)
+
+
+class LocalTier:
+    """
+    Per-process LRU with a short TTL. Other workers' writes become visible
+    here at most `ttl` seconds late; this process's own writes immediately.
+    """
+
+    def __init__(self, maxsize: int = 2048, ttl: float = 5.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISS
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return _MISS
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisTier:
+    """
+    Shared tier over any Redis-protocol server. Values are JSON (never pickle),
+    keys carry the entity's version so a stale fill can't outlive an invalidation.
+    """
+
+    def __init__(self, url: str, prefix: str, ttl: int = 300):
+        if redis is None:
+            raise RuntimeError("redis is required for CACHE_REDIS_URL (pip install redis).")
+        self.client = redis.Redis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def _version_key(self, ns, ident):
+        return f"{self.prefix}:ver:{ns}:{ident}"
+
+    def _value_key(self, ns, ident, version):
+        return f"{self.prefix}:{ns}:{ident}:v{version}"
+
+    def versions(self, ns, idents):
+        raw = self.client.mget([self._version_key(ns, i) for i in idents])
+        return [int(v) if v else 0 for v in raw]
+
+    def get_many(self, ns, idents, versions):
+        raw = self.client.mget([self._value_key(ns, i, v) for i, v in zip(idents, versions)])
+        return [_MISS if r is None else _decode(r) for r in raw]
+
+    def set(self, ns, ident, version, value, ttl: int = None):
+        self.client.set(self._value_key(ns, ident, version), _encode(value), ex=ttl or self.ttl)
+
+    def bump(self, ns, ident):
+        self.client.incr(self._version_key(ns, ident))
+
+    def try_lock(self, ns, ident, version, ms: int) -> bool:
+        return bool(self.client.set(f"{self._value_key(ns, ident, version)}:lock", 1, nx=True, px=ms))
+
+    def unlock(self, ns, ident, version):
+        self.client.delete(f"{self._value_key(ns, ident, version)}:lock")
+
+
+class ObjectCache:
+    """
+    Read-through cache for small, hot records (plain dicts, not ORM objects):
+      local LRU  ->  shared Redis tier (optional)  ->  loader (DB)
+    A miss is single-flighted: one thread per process loads while the others
+    wait, and with a shared tier one process per cluster (SET NX lock) while
+    the rest poll the shared tier briefly.
+    """
+
+    def __init__(self):
+        self.local = LocalTier()
+        self.shared = None
+        self.negative_ttl = 30
+        self.lock_ms = 2000
+        self._flights = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        config = app.config
+        self.local = LocalTier(config.get("CACHE_LOCAL_SIZE", 2048), config.get("CACHE_LOCAL_TTL_SECONDS", 5))
+        self.negative_ttl = config.get("CACHE_NEGATIVE_TTL_SECONDS", 30)
+        self.lock_ms = config.get("CACHE_LOCK_MS", 2000)
+        self.shared = None
+        if config.get("CACHE_REDIS_URL"):
+            self.shared = RedisTier(
+                config["CACHE_REDIS_URL"],
+                config.get("CACHE_KEY_PREFIX", "ismaverse"),
+                config.get("CACHE_SHARED_TTL_SECONDS", 300),
+            )
+        app.extensions["object_cache"] = self
+
+    # -------------------------------------------------
+    # shared tier errors never fail a request
+    # -------------------------------------------------
+    def _shared(self, fn, default=None):
+        if self.shared is None:
+            return default
+        try:
+            return fn()
+        except Exception as exc:
+            current_app.logger.warning("Shared cache unavailable: %s", exc)
+            return default
+
+    def _store(self, ns, ident, version, generation, value):
+        negative = value is None
+        # Skip the local fill if this process invalidated the key mid-load
+        with self._lock:
+            if self._generations.get((ns, ident), 0) == generation:
+                self.local.set((ns, ident), value, min(self.negative_ttl, self.local.ttl) if negative else None)
+        if version is not None:
+            ttl = self.negative_ttl if negative else None
+            self._shared(lambda: self.shared.set(ns, ident, version, value, ttl))
+
+    def get(self, ns, ident, loader):
+        """
+        Cached loader(ident); None results are cached briefly too (404 floods).
+        """
+        key = (ns, ident)
+        value = self.local.get(key)
+        if value is not _MISS:
+            return value
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = threading.Event()
+            generation = self._generations.get(key, 0)
+
+        if not leader:
+            flight.wait(self.lock_ms / 1000)
+            value = self.local.get(key)
+            return value if value is not _MISS else loader(ident)
+
+        try:
+            return self._load(ns, ident, loader, generation)
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.set()
+
+    def _load(self, ns, ident, loader, generation):
+        version = None
+        if self.shared is not None:
+            version = self._shared(lambda: self.shared.versions(ns, [ident])[0])
+        if version is not None:
+            value = self._shared(lambda: self.shared.get_many(ns, [ident], [version])[0], default=_MISS)
+            if value is not _MISS:
+                self._store(ns, ident, None, generation, value)
+                return value
+
+            locked = self._shared(lambda: self.shared.try_lock(ns, ident, version, self.lock_ms), default=True)
+            if not locked:
+                # Another process is loading this key; wait for its fill
+                deadline = time.monotonic() + self.lock_ms / 1000
+                while time.monotonic() < deadline:
+                    time.sleep(0.02)
+                    value = self._shared(lambda: self.shared.get_many(ns, [ident], [version])[0], default=_MISS)
+                    if value is not _MISS:
+                        self._store(ns, ident, None, generation, value)
+                        return value
+            try:
+                value = loader(ident)
+                self._store(ns, ident, version, generation, value)
+                return value
+            finally:
+                if locked:
+                    self._shared(lambda: self.shared.unlock(ns, ident, version))
+
+        value = loader(ident)
+        self._store(ns, ident, None, generation, value)
+        return value
+
+    def get_many(self, ns, idents, bulk_loader) -> dict:
+        """
+        {ident: value} for every ident bulk_loader(missing) returned; one
+        round trip per tier and one query for whatever is left.
+        """
+        result, missing = {}, []
+        for ident in dict.fromkeys(idents):
+            value = self.local.get((ns, ident))
+            if value is _MISS:
+                missing.append(ident)
+            elif value is not None:
+                result[ident] = value
+        if not missing:
+            return result
+
+        with self._lock:
+            generations = {i: self._generations.get((ns, i), 0) for i in missing}
+
+        versions = {}
+        if self.shared is not None:
+            found = self._shared(lambda: self.shared.versions(ns, missing))
+            if found is not None:
+                versions = dict(zip(missing, found))
+                values = self._shared(lambda: self.shared.get_many(ns, missing, found))
+                values = values or [_MISS] * len(missing)
+                for ident, value in zip(missing, values):
+                    if value is not _MISS:
+                        self._store(ns, ident, None, generations[ident], value)
+                        if value is not None:
+                            result[ident] = value
+                missing = [i for i, v in zip(missing, values) if v is _MISS]
+
+        if missing:
+            for ident, value in bulk_loader(missing).items():
+                self._store(ns, ident, versions.get(ident), generations[ident], value)
+                result[ident] = value
+        return result
+
+    def invalidate(self, ns, ident):
+        """
+        Call after the write commits.
+        """
+        key = (ns, ident)
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+        self.local.delete(key)
+        self._shared(lambda: self.shared.bump(ns, ident))
+
+
+object_cache = ObjectCache()
+
+
+# =====================================================
+# HOT ENTITIES
+# =====================================================
+def _record(obj):
+    return {attr.key: getattr(obj, attr.key) for attr in obj.__mapper__.column_attrs}
+
+
+def _load_record(model):
+    def load(ident):
+        obj = db.session.get(model, ident)
+        return _record(obj) if obj is not None else None
+    return load
+
+
+def comic_record(comic_id: int):
+    return object_cache.get(COMIC, comic_id, _load_record(Comic))
+
+
+def character_record(character_id: int):
+    return object_cache.get(CHARACTER, character_id, _load_record(Character))
+
+
+def get_comic_or_404(comic_id: int) -> Comic:
+    """
+    Cached stand-in for Comic.query.get_or_404 in read-only views.
+    The Comic is transient (not in the session): read its columns, don't
+    modify it or follow relationships.
+    """
+    record = comic_record(comic_id)
+    if record is None:
+        abort(404)
+    return Comic(**record)
+
+
+def _load_pdf_record(filename):
+    row = db.session.execute(
+        db.select(Comic.id, Comic.pdf_linearized_file).where(Comic.pdf_file == filename).limit(1)
+    ).first()
+    return dict(row._mapping) if row is not None else None
+
+
+def pdf_record(filename: str):
+    """
+    {"id", "pdf_linearized_file"} of the comic stored as pdfs/<filename>, or
+    None. PDF.js makes hundreds of range requests per issue, each one a lookup.
+    Invalidate PDF_FILE with the filename whenever a comic's PDF changes.
+    """
+    return object_cache.get(PDF_FILE, filename, _load_pdf_record)
+
+
+def _load_usernames(user_ids):
+    rows = db.session.execute(db.select(User.id, User.username).where(User.id.in_(user_ids)))
+    return {user_id: username for user_id, username in rows}
+
+
+def usernames(user_ids) -> dict:
+    """
+    {user_id: username} for comment authors, without one query per comment.
+    """
+    return object_cache.get_many(USER_NAME, list(user_ids), _load_usernames)
@@ -0,0 +1,43 @@
+from flask import current_app, get_flashed_messages, render_template, stream_template
+
+FLUSH_BYTES = 8192
+
+
+def _buffered(chunks, size: int):
+    """
+    Jinja yields one small string per template event; send the document head
+    as soon as it is complete (so the browser starts on CSS/JS), then
+    `size`-byte chunks instead of a socket write per event.
+    """
+    buffer, length, head_sent = [], 0, False
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size or (not head_sent and "</head>" in chunk):
+            head_sent = True
+            yield "".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def stream_page(template_name: str, **context):
+    """
+    render_template, but sent while it renders, so the page never sits in
+    memory. Pass rows already fetched (.all()): a cursor left open while a
+    slow client reads would hold the database's read lock. Headers go out
+    before the body renders, so the session must be final by then; flashed
+    messages are taken here for the same reason.
+    A template error mid-page truncates the response instead of a 500.
+    STREAM_TEMPLATES=0 renders the whole page first, as before.
+    """
+    config = current_app.config
+    if not config.get("STREAM_TEMPLATES", True):
+        return render_template(template_name, **context)
+
+    get_flashed_messages(with_categories=True)
+    chunks = stream_template(template_name, **context)
+    return current_app.response_class(
+        _buffered(chunks, config.get("STREAM_FLUSH_BYTES", FLUSH_BYTES)),
+        mimetype="text/html",
+    )
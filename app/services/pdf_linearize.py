@@ -0,0 +1,85 @@
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+
+try:
+    import pikepdf
+except ImportError:  # optional dependency
+    pikepdf = None
+
+
+logger = logging.getLogger(__name__)
+
+LINEARIZED_SUFFIX = ".linear.pdf"
+
+
+def linearizer_available() -> bool:
+    return pikepdf is not None or shutil.which("qpdf") is not None
+
+
+def linearized_name(filename: str) -> str:
+    """
+    "issue_1.pdf" -> "issue_1.linear.pdf"
+    """
+    stem = filename[:-4] if filename.lower().endswith(".pdf") else filename
+    return f"{stem}{LINEARIZED_SUFFIX}"
+
+
+def _rewrite(src: str, dst: str) -> None:
+    if pikepdf is not None:
+        with pikepdf.open(src) as pdf:
+            pdf.save(dst, linearize=True)
+        return
+
+    subprocess.run(
+        ["qpdf", "--linearize", src, dst],
+        check=True,
+        capture_output=True,
+        timeout=300,
+    )
+
+
+def _verify(path: str) -> bool:
+    if pikepdf is not None:
+        with pikepdf.open(path) as pdf:
+            return bool(pdf.is_linearized) and len(pdf.pages) > 0
+
+    # qpdf exits 0 only when the linearization hint tables are valid
+    result = subprocess.run(
+        ["qpdf", "--check-linearization", path],
+        capture_output=True,
+        timeout=300,
+    )
+    return result.returncode == 0
+
+
+def linearize_pdf(storage, filename: str):
+    """
+    Rewrite the stored pdfs/<filename> into fast-web-view (linearized) form and
+    store it next to the original. The original is never touched; the rewrite
+    goes to a temp file and is only stored once it verifies.
+    Returns the linearized filename, or None if linearization was skipped/failed.
+    """
+    if not linearizer_available():
+        return None
+
+    if not storage.exists(f"pdfs/{filename}"):
+        return None
+
+    out_name = linearized_name(filename)
+
+    try:
+        with storage.local_file(f"pdfs/{filename}") as src, tempfile.TemporaryDirectory() as tmp_dir:
+            tmp = os.path.join(tmp_dir, out_name)
+            _rewrite(src, tmp)
+            if not _verify(tmp):
+                raise ValueError("rewritten file is not linearized")
+            with open(tmp, "rb") as fh:
+                storage.save(f"pdfs/{out_name}", fh, "application/pdf")
+    except Exception:
+        logger.warning("PDF linearization failed for %s", filename, exc_info=True)
+        return None
+
+    return out_name
@@ -0,0 +1,200 @@
+import html
+import os
+import sys
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+
+# One whole-worker profile at a time; sampling is cheap but not free
+_busy = threading.Lock()
+
+
+def _label(code) -> str:
+    # "render (jinja2/environment.py)": short enough to read in a flamegraph
+    parts = code.co_filename.replace("\\", "/").rsplit("/", 2)
+    return f"{code.co_name} ({'/'.join(parts[-2:])})"
+
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        names.append(_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """
+    Samples Python stacks of this process from a background thread via
+    sys._current_frames(): no tracing hooks, so the profiled code runs at
+    full speed and overhead scales with the sample rate only.
+    `thread_ids` limits sampling to those threads (e.g. one request).
+    Greenlets under the gevent worker share one OS thread and show up merged.
+    The sampler needs the GIL to look, so pure-Python hot loops are seen at
+    the interpreter's switch interval (5ms) at best.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_ids=None, exclude_ids=()):
+        self.interval = interval
+        self.thread_ids = set(thread_ids) if thread_ids else None
+        self.exclude_ids = set(exclude_ids)
+        self.stacks = Counter()
+        self.samples = 0
+        self.started = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        return self.stacks
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or thread_id in self.exclude_ids:
+                    continue
+                if self.thread_ids is not None and thread_id not in self.thread_ids:
+                    continue
+                self.stacks[_collapse(frame)] += 1
+            self.samples += 1
+
+
+def sample_process(seconds: float, interval: float = 0.005) -> StackSampler:
+    """
+    Sample every other thread of this worker for `seconds` (the caller just
+    sleeps, so it is left out). Returns None if a profile is already running here.
+    """
+    if not _busy.acquire(blocking=False):
+        return None
+    try:
+        sampler = StackSampler(interval, exclude_ids=[threading.get_ident()]).start()
+        time.sleep(seconds)
+        sampler.stop()
+        return sampler
+    finally:
+        _busy.release()
+
+
+def collapsed_text(stacks: Counter) -> str:
+    """
+    Brendan Gregg's collapsed format ("a;b;c 42"), readable by flamegraph.pl,
+    speedscope and inferno.
+    """
+    return "".join(f"{stack} {n}\n" for stack, n in stacks.most_common())
+
+
+# =====================================================
+# FLAMEGRAPH SVG
+# =====================================================
+FRAME_HEIGHT = 16
+SVG_WIDTH = 1200
+MIN_WIDTH = 0.5  # px; narrower frames are dropped
+
+
+def _tree(stacks: Counter) -> dict:
+    root = {"name": "all", "count": 0, "children": {}}
+    for stack, n in stacks.items():
+        root["count"] += n
+        node = root
+        for name in stack.split(";"):
+            node = node["children"].setdefault(name, {"name": name, "count": 0, "children": {}})
+            node["count"] += n
+    return root
+
+
+def _color(name: str) -> str:
+    h = zlib.crc32(name.encode())
+    return f"rgb({205 + h % 50},{(h >> 8) % 180 + 50},{(h >> 16) % 55})"
+
+
+def flamegraph_svg(stacks: Counter, title: str = "Flame graph") -> str:
+    """
+    Self-contained icicle-style flame graph (root on top); hover for counts.
+    """
+    root = _tree(stacks)
+    total = root["count"] or 1
+    scale = SVG_WIDTH / total
+    rects = []
+    depth_max = 0
+
+    def walk(node, x, depth):
+        nonlocal depth_max
+        width = node["count"] * scale
+        if width < MIN_WIDTH:
+            return
+        depth_max = max(depth_max, depth)
+        y = 24 + depth * FRAME_HEIGHT
+        name = html.escape(node["name"])
+        pct = 100.0 * node["count"] / total
+        rects.append(
+            f'<g><title>{name} ({node["count"]} samples, {pct:.1f}%)</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{width:.1f}" height="{FRAME_HEIGHT - 1}" fill="{_color(node["name"])}"/>'
+            + (f'<text x="{x + 3:.1f}" y="{y + 12}">{html.escape(node["name"][:int(width // 7)])}</text>' if width > 35 else "")
+            + "</g>"
+        )
+        child_x = x
+        for child in sorted(node["children"].values(), key=lambda c: c["name"]):
+            walk(child, child_x, depth + 1)
+            child_x += child["count"] * scale
+
+    walk(root, 0.0, 0)
+    height = 24 + (depth_max + 1) * FRAME_HEIGHT + 8
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{SVG_WIDTH}" height="{height}" '
+        f'font-family="monospace" font-size="11">'
+        f'<text x="4" y="16" font-size="13">{html.escape(title)} - {root["count"]} samples</text>'
+        + "".join(rects)
+        + "</svg>"
+    )
+
+
+# =====================================================
+# PER-REQUEST PROFILES (KEPT ON DISK, SHARED BY WORKERS)
+# =====================================================
+def save_request_profile(profile_dir: str, stacks: Counter, keep: int = 50) -> str:
+    os.makedirs(profile_dir, exist_ok=True)
+    profile_id = uuid.uuid4().hex[:16]
+    with open(os.path.join(profile_dir, f"{profile_id}.txt"), "w", encoding="utf-8") as fh:
+        fh.write(collapsed_text(stacks))
+
+    # Keep only the newest `keep` profiles
+    entries = sorted(
+        (e for e in os.scandir(profile_dir) if e.name.endswith(".txt")),
+        key=lambda e: e.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in entries[keep:]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+    return profile_id
+
+
+def load_request_profile(profile_dir: str, profile_id: str):
+    if not profile_id.isalnum():
+        return None
+    try:
+        with open(os.path.join(profile_dir, f"{profile_id}.txt"), encoding="utf-8") as fh:
+            lines = fh.read().splitlines()
+    except FileNotFoundError:
+        return None
+    stacks = Counter()
+    for line in lines:
+        stack, _, n = line.rpartition(" ")
+        if stack:
+            stacks[stack] = int(n)
+    return stacks
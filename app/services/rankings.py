@@ -0,0 +1,179 @@
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+
+from ..extensions import db
+from ..models.comic import Comic
+from ..models.comic_ranking import ComicRanking
+from ..models.comic_stats import ComicStats
+from ..models.comment import Comment
+from .batching import PeriodicFlusher
+
+# How much one event adds to the trending score
+TRENDING_WEIGHTS = {"views": 1.0, "reads": 3.0, "downloads": 2.0, "comments": 5.0}
+
+# Scores at or below this are not listed, and the refresh stops decaying them
+SCORE_FLOOR = 0.01
+
+
+def _decay(score: float, hours: float, half_life_hours: float) -> float:
+    if hours <= 0:
+        return score
+    return score * 0.5 ** (hours / half_life_hours)
+
+
+def refresh_rankings(now=None, min_age: float = 0) -> int:
+    """
+    Decay the listed scores to `now` in one UPDATE, then add what happened
+    since the last run to the comics that had any: comments newer than the
+    stored watermark and comic_stats rows whose counters moved past the
+    *_seen columns. Only new or changed rows are read or rewritten one by
+    one. Returns the number of comics whose scores took in activity; 0 when
+    the last run is younger than `min_age` seconds or another worker won.
+    """
+    config = current_app.config
+    trending_half_life = config.get("RANKINGS_TRENDING_HALF_LIFE_HOURS", 48)
+    discussion_half_life = config.get("RANKINGS_DISCUSSION_HALF_LIFE_HOURS", 24 * 14)
+    now = now or datetime.utcnow()
+
+    # Rows still worth decaying are restamped by every run, so the newest
+    # stamp is the last run
+    last_run, watermark = db.session.execute(
+        db.select(db.func.max(ComicRanking.updated_at), db.func.max(ComicRanking.last_comment_id))
+    ).one()
+    watermark = watermark or 0
+    if last_run is not None and (now - last_run).total_seconds() < min_age:
+        db.session.rollback()
+        return 0
+
+    new_comments = {
+        comic_id: n
+        for comic_id, n in db.session.execute(
+            db.select(Comment.comic_id, db.func.count(Comment.id))
+            .where(Comment.id > watermark)
+            .group_by(Comment.comic_id)
+        ).all()
+    }
+    new_watermark = db.session.execute(
+        db.select(db.func.max(Comment.id)).where(Comment.id > watermark)
+    ).scalar() or watermark
+
+    if last_run is not None:
+        # Scores under SCORE_FLOOR are never shown, so they are left alone.
+        # The claim row (stamped by the last run) makes this the election: a
+        # worker that read the same last_run matches nothing once the winner
+        # has restamped every row it could.
+        claim_id = db.session.execute(
+            db.select(ComicRanking.comic_id).where(ComicRanking.updated_at == last_run).limit(1)
+        ).scalar()
+        hours = (now - last_run).total_seconds() / 3600
+        claimed = db.session.execute(
+            db.update(ComicRanking)
+            .where(
+                ComicRanking.updated_at <= last_run,
+                db.or_(
+                    ComicRanking.trending_score > SCORE_FLOOR,
+                    ComicRanking.discussion_score > SCORE_FLOOR,
+                    ComicRanking.comic_id == claim_id,
+                ),
+            )
+            .values(
+                trending_score=ComicRanking.trending_score * _decay(1.0, hours, trending_half_life),
+                discussion_score=ComicRanking.discussion_score * _decay(1.0, hours, discussion_half_life),
+                last_comment_id=new_watermark,
+                updated_at=now,
+                version=ComicRanking.version + 1,
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not claimed:
+            db.session.rollback()
+            return 0
+
+    # Comics with no ranking row yet, and counters that moved since last seen
+    unranked = db.session.execute(
+        db.select(Comic.id)
+        .outerjoin(ComicRanking, ComicRanking.comic_id == Comic.id)
+        .where(ComicRanking.comic_id.is_(None))
+    ).scalars().all()
+    for comic_id in unranked:
+        db.session.add(ComicRanking(
+            comic_id=comic_id, trending_score=0.0, discussion_score=0.0,
+            views_seen=0, reads_seen=0, downloads_seen=0,
+            last_comment_id=new_watermark, updated_at=now
+        ))
+    db.session.flush()
+
+    moved = {
+        row.comic_id: row
+        for row in db.session.execute(
+            db.select(ComicStats)
+            .join(ComicRanking, ComicRanking.comic_id == ComicStats.comic_id)
+            .where(db.or_(
+                ComicStats.views != ComicRanking.views_seen,
+                ComicStats.reads != ComicRanking.reads_seen,
+                ComicStats.downloads != ComicRanking.downloads_seen,
+            ))
+        ).scalars()
+    }
+
+    changed = set(moved) | set(new_comments)
+    rankings = ComicRanking.query.populate_existing().filter(ComicRanking.comic_id.in_(changed)).all() if changed else []
+    for ranking in rankings:
+        trending = ranking.trending_score
+        discussion = ranking.discussion_score
+
+        stats = moved.get(ranking.comic_id)
+        if stats is not None:
+            for metric in ("views", "reads", "downloads"):
+                seen_attr = f"{metric}_seen"
+                delta = max(0, getattr(stats, metric) - getattr(ranking, seen_attr))
+                trending += TRENDING_WEIGHTS[metric] * delta
+                setattr(ranking, seen_attr, getattr(stats, metric))
+
+        comments = new_comments.get(ranking.comic_id, 0)
+        trending += TRENDING_WEIGHTS["comments"] * comments
+        discussion += comments
+
+        ranking.trending_score = trending
+        ranking.discussion_score = discussion
+        ranking.last_comment_id = new_watermark
+        ranking.updated_at = now
+
+    try:
+        db.session.commit()
+    except (StaleDataError, IntegrityError):
+        db.session.rollback()
+        return 0
+    return len(rankings)
+
+
+def _scheduled_refresh() -> int:
+    # Every worker runs the job; the first one each interval does the work
+    return refresh_rankings(min_age=rankings_job.interval / 2)
+
+
+rankings_job = PeriodicFlusher("rankings-refresh", _scheduled_refresh, interval=300)
+
+
+def top_comics(kind: str, limit: int = 5) -> list:
+    """
+    Cheap read path: walk the score index, join in just the card columns.
+    kind is "trending" or "discussed".
+    """
+    app = current_app._get_current_object()
+    interval = app.config.get("RANKINGS_REFRESH_SECONDS", 300)
+    if interval:
+        rankings_job.interval = interval
+        rankings_job.ensure_started(app)
+
+    score = ComicRanking.trending_score if kind == "trending" else ComicRanking.discussion_score
+    return db.session.execute(
+        db.select(Comic.id, Comic.title, Comic.cover_image, score.label("score"))
+        .join(ComicRanking, ComicRanking.comic_id == Comic.id)
+        .where(score > SCORE_FLOOR)
+        .order_by(score.desc())
+        .limit(limit)
+    ).all()
@@ -0,0 +1,84 @@
+import threading
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from ..extensions import db
+from ..models.comic import Comic
+from ..models.reading_progress import ReadingProgress
+from ..models.user import User
+from .batching import PeriodicFlusher, chunked, existing_ids, upsert_statement
+
+# (user_id, comic_id) -> (page, updated_at), waiting to be written.
+# Repeated flips by the same reader collapse into one row per flush.
+_pending = {}
+_lock = threading.Lock()
+
+
+def flush_progress() -> int:
+    """
+    Write all pending positions as batched upserts. Returns rows written.
+    """
+    global _pending
+    with _lock:
+        batch, _pending = _pending, {}
+    if not batch:
+        return 0
+
+    table = ReadingProgress.__table__
+    try:
+        # Skip readers and comics deleted since the position was recorded
+        users = existing_ids(User.id, {user_id for user_id, _ in batch})
+        comics = existing_ids(Comic.id, {comic_id for _, comic_id in batch})
+        rows = [
+            {"user_id": user_id, "comic_id": comic_id, "page": page, "updated_at": updated_at}
+            for (user_id, comic_id), (page, updated_at) in batch.items()
+            if user_id in users and comic_id in comics
+        ]
+        for chunk in chunked(rows):
+            stmt, excluded = upsert_statement(table, chunk)
+            db.session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[table.c.user_id, table.c.comic_id],
+                    set_={"page": excluded.page, "updated_at": excluded.updated_at},
+                    # another worker may already have stored a newer position
+                    where=excluded.updated_at >= table.c.updated_at,
+                )
+            )
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        # put the batch back unless newer positions arrived meanwhile; a
+        # parent deleted mid-flush (IntegrityError) would fail every retry
+        if not isinstance(exc, IntegrityError):
+            with _lock:
+                for key, value in batch.items():
+                    _pending.setdefault(key, value)
+        raise
+    return len(rows)
+
+
+progress_flusher = PeriodicFlusher("reading-progress-flush", flush_progress, interval=10)
+
+
+def record_progress(app, user_id: int, comic_id: int, page: int) -> None:
+    with _lock:
+        _pending[(user_id, comic_id)] = (page, datetime.utcnow())
+    progress_flusher.interval = app.config.get("READING_PROGRESS_FLUSH_SECONDS", progress_flusher.interval)
+    progress_flusher.ensure_started(app)
+
+
+def get_progress(user_id: int, comic_id: int):
+    """
+    Last known page for this reader (unflushed value first), or None.
+    """
+    with _lock:
+        pending = _pending.get((user_id, comic_id))
+    if pending:
+        return pending[0]
+
+    return db.session.execute(
+        db.select(ReadingProgress.page).where(
+            ReadingProgress.user_id == user_id, ReadingProgress.comic_id == comic_id
+        )
+    ).scalar()
@@ -0,0 +1,96 @@
+import os
+import re
+import warnings
+
+from ..extensions import db
+
+# Model.column references inside .order_by(...) calls
+ORDER_BY_CALL = re.compile(r"order_by\(([^()]*(?:\([^()]*\)[^()]*)*)\)")
+MODEL_COLUMN = re.compile(r"\b([A-Z]\w*)\.(\w+)\b")
+
+
+def _live_indexes(inspector, table: str) -> dict:
+    """
+    name -> list of column names (or the raw SQL for expression indexes).
+    """
+    indexes = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # SQLite can't reflect expression indexes
+        for ix in inspector.get_indexes(table):
+            indexes[ix["name"]] = list(ix["column_names"])
+        for uc in inspector.get_unique_constraints(table):
+            indexes[uc["name"] or f"unique({','.join(uc['column_names'])})"] = list(uc["column_names"])
+
+    if db.engine.dialect.name == "sqlite":
+        rows = db.session.execute(
+            db.text("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = :t AND sql IS NOT NULL"),
+            {"t": table},
+        ).all()
+        for name, sql in rows:
+            indexes.setdefault(name, [sql])
+    return indexes
+
+
+def _order_by_columns(source_root: str, mapped: dict) -> set:
+    """
+    (table, column) pairs that appear in .order_by() calls under source_root.
+    """
+    found = set()
+    for dirpath, _, filenames in os.walk(source_root):
+        for filename in filenames:
+            if not filename.endswith(".py"):
+                continue
+            with open(os.path.join(dirpath, filename), encoding="utf-8") as fh:
+                text = fh.read()
+            for call in ORDER_BY_CALL.findall(text):
+                for class_name, attr in MODEL_COLUMN.findall(call):
+                    model = mapped.get(class_name)
+                    if model is not None and attr in model.__table__.c:
+                        found.add((model.__table__.name, attr))
+    return found
+
+
+def lint_schema(source_root: str) -> list:
+    """
+    Compare models, live schema and queries. Returns a list of problems:
+    - foreign keys with no index leading on them (child lookups / cascades scan)
+    - ORDER BY columns not covered by any index
+    - indexes declared on models but missing from the database
+    """
+    problems = []
+    inspector = db.inspect(db.engine)
+    live_tables = set(inspector.get_table_names())
+    mapped = {m.class_.__name__: m.class_ for m in db.Model.registry.mappers}
+
+    covered = {}   # table -> (leading columns, all indexed columns/sql)
+    for table in db.metadata.sorted_tables:
+        if table.name not in live_tables:
+            problems.append(f"{table.name}: table missing from database (run migrations)")
+            continue
+
+        indexes = _live_indexes(inspector, table.name)
+        pk = inspector.get_pk_constraint(table.name)["constrained_columns"]
+        leading = {cols[0] for cols in indexes.values() if cols} | set(pk[:1])
+        anywhere = {c for cols in indexes.values() for c in cols if c} | set(pk)
+        covered[table.name] = (leading, anywhere)
+
+        for ix in table.indexes:
+            if ix.name not in indexes:
+                problems.append(f"{table.name}: index {ix.name} declared on the model but missing in the database")
+
+        for fk in table.foreign_keys:
+            column = fk.parent.name
+            if column not in leading:
+                problems.append(f"{table.name}.{column}: foreign key to {fk.target_fullname} has no index")
+
+    for table_name, column in sorted(_order_by_columns(source_root, mapped)):
+        if table_name not in covered:
+            continue
+        _, anywhere = covered[table_name]
+        in_expression = any(
+            re.search(rf"\b{re.escape(column)}\b", entry) for entry in anywhere if entry.startswith("CREATE")
+        )
+        if column not in anywhere and not in_expression:
+            problems.append(f"{table_name}.{column}: used in ORDER BY but not indexed")
+
+    return problems
@@ -0,0 +1,141 @@
+from flask import current_app
+from sqlalchemy import event
+
+from ..extensions import db
+from ..models.character import Character
+from ..models.comic import Comic
+from ..models.comment import Comment
+from ..models.site_stat import SiteStat
+from ..models.user import User
+from .batching import PeriodicFlusher, upsert_statement
+from .list_queries import excerpt
+from .object_cache import object_cache
+
+SITE_STATS = "site_stats"
+
+# site_stats.name -> the table it counts
+COUNTED = {"users": User, "comics": Comic, "characters": Character, "comments": Comment}
+
+# Not a row count: goes up on every username change, so validators built from
+# comment authors (the comment fragment ETag) notice a rename
+USERNAME_CHANGES = "username_changes"
+
+
+# =====================================================
+# WRITE PATH
+# =====================================================
+def adjust(name: str, delta: int = 1) -> None:
+    """
+    Add `delta` to a counter inside the caller's transaction, so the count
+    commits (or rolls back) together with the row it counts.
+    """
+    if delta:
+        db.session.execute(
+            db.update(SiteStat).where(SiteStat.name == name).values(value=SiteStat.value + delta)
+        )
+    mark_changed()
+
+
+def username_changed() -> None:
+    """
+    Bump USERNAME_CHANGES inside the caller's transaction (upsert, so a
+    database without the row starts it at 1).
+    """
+    stmt, _ = upsert_statement(SiteStat.__table__, [{"name": USERNAME_CHANGES, "value": 1}])
+    db.session.execute(stmt.on_conflict_do_update(index_elements=["name"], set_={"value": SiteStat.value + 1}))
+
+
+def username_changes():
+    """
+    USERNAME_CHANGES as a scalar subquery (0 when the row doesn't exist yet),
+    for folding into another SELECT.
+    """
+    value = db.select(SiteStat.value).where(SiteStat.name == USERNAME_CHANGES).scalar_subquery()
+    return db.func.coalesce(value, 0)
+
+
+def mark_changed() -> None:
+    """
+    Drop the cached stats once the current transaction commits (edits that
+    change a title or name shown in the newest lists).
+    """
+    db.session.info["site_stats_changed"] = True
+
+
+@event.listens_for(db.session, "after_commit")
+def _after_commit(session):
+    if session.info.pop("site_stats_changed", False):
+        object_cache.invalidate(SITE_STATS, 0)
+
+
+@event.listens_for(db.session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop("site_stats_changed", None)
+
+
+# =====================================================
+# RECONCILIATION
+# =====================================================
+def reconcile_site_stats() -> dict:
+    """
+    Reset every counter to its table's COUNT(*) (one statement each, so a
+    concurrent insert is never lost between the count and the write).
+    Returns {name: drift} for counters that were off.
+    """
+    before = dict(db.session.execute(db.select(SiteStat.name, SiteStat.value)).all())
+    for name, model in COUNTED.items():
+        count = db.select(db.func.count()).select_from(model).scalar_subquery()
+        stmt, excluded = upsert_statement(SiteStat.__table__, [{"name": name, "value": count}])
+        db.session.execute(stmt.on_conflict_do_update(index_elements=["name"], set_={"value": excluded.value}))
+    after = dict(db.session.execute(db.select(SiteStat.name, SiteStat.value)).all())
+    mark_changed()
+    db.session.commit()
+    return {name: after[name] - before.get(name, 0) for name in COUNTED if after[name] != before.get(name)}
+
+
+reconcile_job = PeriodicFlusher("site-stats-reconcile", reconcile_site_stats, interval=3600)
+
+
+# =====================================================
+# READ PATH
+# =====================================================
+def _load_stats(_):
+    limit = current_app.config.get("SITE_STATS_NEWEST", 5)
+    counts = dict(db.session.execute(db.select(SiteStat.name, SiteStat.value)).all())
+    if set(COUNTED) - set(counts):
+        # Table created without the migration's seed rows
+        reconcile_site_stats()
+        counts = dict(db.session.execute(db.select(SiteStat.name, SiteStat.value)).all())
+
+    def newest(*columns, order_by, join=()):
+        stmt = db.select(*columns)
+        for target, on in join:
+            stmt = stmt.join(target, on)
+        return [dict(row._mapping) for row in db.session.execute(stmt.order_by(order_by.desc()).limit(limit))]
+
+    return {
+        **{name: counts[name] for name in COUNTED},
+        "newest_comics": newest(Comic.id, Comic.title, Comic.created_at, order_by=Comic.created_at),
+        "newest_characters": newest(
+            Character.id, Character.superhero_name, Character.created_at, order_by=Character.created_at
+        ),
+        "newest_users": newest(User.id, User.username, User.created_at, order_by=User.created_at),
+        "newest_comments": newest(
+            Comment.id, Comment.comic_id, Comic.title, User.username, excerpt(Comment.body, 120), Comment.created_at,
+            order_by=Comment.id,
+            join=((Comic, Comic.id == Comment.comic_id), (User, User.id == Comment.user_id)),
+        ),
+    }
+
+
+def site_stats() -> dict:
+    """
+    Counts and newest items, served from the object cache; the counters are
+    read from site_stats (a handful of rows), never COUNT(*) per page.
+    """
+    app = current_app._get_current_object()
+    interval = app.config.get("SITE_STATS_RECONCILE_SECONDS", 3600)
+    if interval:
+        reconcile_job.interval = interval
+        reconcile_job.ensure_started(app)
+    return object_cache.get(SITE_STATS, 0, _load_stats)
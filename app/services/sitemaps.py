@@ -0,0 +1,302 @@
+import filecmp
+import glob
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from flask import current_app, url_for
+
+from ..extensions import db
+from ..models.character import Character
+from ..models.comic import Comic
+from .list_queries import excerpt
+
+# Sitemap protocol limit per file; comics are sharded by id range so an
+# edit only rewrites the shard that holds it
+SHARD_SIZE = 50_000
+
+INDEX = "sitemap.xml"
+PAGES = "sitemap-pages.xml"
+FEED = "feed.atom"
+SHARD_NAME = re.compile(r"sitemap-(pages|comics-\d+)\.xml")
+
+_build_lock = threading.Lock()
+
+
+class SitemapError(Exception):
+    pass
+
+
+def _w3c(value: datetime) -> str:
+    # Stored timestamps are naive UTC
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _shard_file(shard: int) -> str:
+    return f"sitemap-comics-{shard + 1}.xml"
+
+
+def _site_url():
+    """
+    SITE_URL, else one built from SERVER_NAME; None when neither is set.
+    """
+    config = current_app.config
+    if config.get("SITE_URL"):
+        return config["SITE_URL"]
+    if config.get("SERVER_NAME"):
+        root = (config.get("APPLICATION_ROOT") or "/").rstrip("/")
+        return f"{config['PREFERRED_URL_SCHEME']}://{config['SERVER_NAME']}{root}"
+    return None
+
+
+@contextmanager
+def _site_urls():
+    """
+    url_for(..., _external=True) against the configured site URL. Never the
+    request's Host header: the files are written once and served to everyone.
+    """
+    site_url = _site_url()
+    if not site_url:
+        raise SitemapError("Set SITE_URL (or SERVER_NAME) to build sitemaps.")
+    with current_app.test_request_context(base_url=site_url):
+        yield
+
+
+def sitemap_url():
+    """
+    Public URL of the sitemap index, or None when no site URL is configured.
+    """
+    if _site_url() is None:
+        return None
+    with _site_urls():
+        return url_for("main.sitemap_index", _external=True)
+
+
+@contextmanager
+def _replace_if_changed(path: str):
+    """
+    Write to a temp file, then swap it in only if the content differs, so
+    unchanged files keep their mtime (and with it their ETag/Last-Modified).
+    """
+    tmp = f"{path}.{uuid.uuid4().hex}.part"
+    try:
+        with open(tmp, "w", encoding="utf-8") as fh:
+            yield fh
+        if os.path.exists(path) and filecmp.cmp(tmp, path, shallow=False):
+            return
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _write_urlset(path: str, urls) -> int:
+    """
+    urls: iterable of (loc, lastmod or None). Empty shards are removed.
+    """
+    count = 0
+    with _replace_if_changed(path) as fh:
+        fh.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        fh.write('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        for loc, lastmod in urls:
+            fh.write(f"<url><loc>{escape(loc)}</loc>")
+            if lastmod:
+                fh.write(f"<lastmod>{_w3c(lastmod)}</lastmod>")
+            fh.write("</url>\n")
+            count += 1
+        fh.write("</urlset>\n")
+    if not count and os.path.exists(path):
+        os.remove(path)
+    return count
+
+
+# =====================================================
+# FILES
+# =====================================================
+def _build_pages(directory: str) -> None:
+    comics_lastmod = db.session.execute(db.select(db.func.max(Comic.created_at))).scalar()
+    characters_lastmod = db.session.execute(db.select(db.func.max(Character.updated_at))).scalar()
+    _write_urlset(os.path.join(directory, PAGES), [
+        (url_for("main.home", _external=True), None),
+        (url_for("comics.list_comics", _external=True), comics_lastmod),
+        (url_for("characters.list_characters", _external=True), characters_lastmod),
+    ])
+
+
+def _build_comic_shard(directory: str, shard: int) -> None:
+    rows = db.session.execute(
+        db.select(Comic.id, Comic.created_at)
+        .where(Comic.id > shard * SHARD_SIZE, Comic.id <= (shard + 1) * SHARD_SIZE)
+        .order_by(Comic.id)
+        .execution_options(yield_per=1000)
+    )
+    _write_urlset(
+        os.path.join(directory, _shard_file(shard)),
+        ((url_for("comics.comic_detail", comic_id=comic_id, _external=True), created_at)
+         for comic_id, created_at in rows),
+    )
+
+
+def _shard_sort_key(name: str):
+    number = re.findall(r"\d+", name)
+    return (name != PAGES, int(number[0]) if number else 0)
+
+
+def _build_index(directory: str) -> None:
+    names = sorted(
+        (os.path.basename(p) for p in glob.glob(os.path.join(directory, "sitemap-*.xml"))),
+        key=_shard_sort_key,
+    )
+    with _replace_if_changed(os.path.join(directory, INDEX)) as fh:
+        fh.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        fh.write('<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        for name in names:
+            modified = datetime.utcfromtimestamp(os.path.getmtime(os.path.join(directory, name)))
+            loc = url_for("main.sitemap_file", name=name, _external=True)
+            fh.write(f"<sitemap><loc>{escape(loc)}</loc><lastmod>{_w3c(modified)}</lastmod></sitemap>\n")
+        fh.write("</sitemapindex>\n")
+
+
+def _build_feed(directory: str) -> None:
+    limit = current_app.config.get("SITEMAP_FEED_ENTRIES", 30)
+    feed_url = url_for("main.comics_feed", _external=True)
+    rows = db.session.execute(
+        db.select(Comic.id, Comic.title, excerpt(Comic.description), Comic.created_at)
+        .order_by(Comic.created_at.desc(), Comic.id.desc())
+        .limit(limit)
+    ).all()
+    updated = max((r.created_at for r in rows if r.created_at), default=datetime(2000, 1, 1))
+
+    with _replace_if_changed(os.path.join(directory, FEED)) as fh:
+        fh.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        fh.write('<feed xmlns="http://www.w3.org/2005/Atom">\n')
+        fh.write("<title>IsmaVerse - New comics</title>\n")
+        fh.write(f"<id>{escape(feed_url)}</id>\n")
+        fh.write(f'<link rel="self" href="{escape(feed_url)}"/>\n')
+        fh.write(f'<link href="{escape(url_for("comics.list_comics", _external=True))}"/>\n')
+        fh.write(f"<updated>{_w3c(updated)}</updated>\n")
+        fh.write("<author><name>IsmaVerse</name></author>\n")
+        for row in rows:
+            link = url_for("comics.comic_detail", comic_id=row.id, _external=True)
+            fh.write("<entry>")
+            fh.write(f"<title>{escape(row.title)}</title>")
+            fh.write(f"<id>{escape(link)}</id>")
+            fh.write(f'<link href="{escape(link)}"/>')
+            fh.write(f"<updated>{_w3c(row.created_at or updated)}</updated>")
+            if row.description:
+                fh.write(f"<summary>{escape(row.description)}</summary>")
+            fh.write("</entry>\n")
+        fh.write("</feed>\n")
+
+
+# =====================================================
+# ENTRY POINTS
+# =====================================================
+def _directory() -> str:
+    directory = current_app.config["SITEMAP_DIR"]
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _stale(directory: str) -> bool:
+    stamp = os.path.join(directory, ".built")
+    max_age = current_app.config.get("SITEMAP_REBUILD_SECONDS", 3600)
+    return not os.path.exists(stamp) or bool(max_age and time.time() - os.path.getmtime(stamp) > max_age)
+
+
+def _rebuild(directory: str) -> int:
+    # Caller holds _build_lock
+    max_id = db.session.execute(db.select(db.func.max(Comic.id))).scalar() or 0
+    shards = (max_id + SHARD_SIZE - 1) // SHARD_SIZE
+    with _site_urls():
+        _build_pages(directory)
+        for shard in range(shards):
+            _build_comic_shard(directory, shard)
+        for path in glob.glob(os.path.join(directory, "sitemap-comics-*.xml")):
+            if int(re.findall(r"\d+", os.path.basename(path))[0]) > shards:
+                os.remove(path)
+        _build_feed(directory)
+        _build_index(directory)
+    # Marks when everything was last rebuilt (see sitemap_path)
+    with open(os.path.join(directory, ".built"), "w"):
+        pass
+    return shards
+
+
+def rebuild_sitemaps() -> int:
+    """
+    Every shard, the index and the feed; returns the number of comic shards.
+    """
+    directory = _directory()
+    with _build_lock:
+        return _rebuild(directory)
+
+
+def _rebuild_in_background(app, directory: str) -> None:
+    # At most one rebuild per process; requests meanwhile get the old files
+    if not _build_lock.acquire(blocking=False):
+        return
+
+    def run():
+        try:
+            with app.app_context():
+                if _stale(directory):
+                    _rebuild(directory)
+        except Exception:
+            app.logger.exception("Sitemap rebuild failed")
+        finally:
+            _build_lock.release()
+
+    try:
+        threading.Thread(target=run, name="sitemap-rebuild", daemon=True).start()
+    except BaseException:
+        _build_lock.release()
+        raise
+
+
+def refresh_sitemaps(comic_id: int = None) -> None:
+    """
+    Call after a comic or character commit: rewrites only the files the
+    change can touch. Never fails the admin request that triggered it.
+    """
+    if _site_url() is None:
+        return
+    try:
+        directory = _directory()
+        with _build_lock, _site_urls():
+            _build_pages(directory)
+            if comic_id is not None:
+                _build_comic_shard(directory, (comic_id - 1) // SHARD_SIZE)
+                _build_feed(directory)
+            _build_index(directory)
+    except Exception:
+        current_app.logger.exception("Sitemap refresh failed")
+
+
+def sitemap_path(name: str):
+    """
+    Path of a generated file. The first request builds everything; after
+    SITEMAP_REBUILD_SECONDS the old files are still served while one
+    background thread rebuilds them (picks up changes made on other hosts
+    or outside the admin views). None if unknown or no site URL is set.
+    """
+    if name not in (INDEX, FEED) and not SHARD_NAME.fullmatch(name):
+        return None
+    if _site_url() is None:
+        return None
+    directory = _directory()
+    path = os.path.join(directory, name)
+    if _stale(directory):
+        if os.path.isfile(path):
+            _rebuild_in_background(current_app._get_current_object(), directory)
+        else:
+            with _build_lock:
+                # Another thread may have finished a build while this one waited
+                if _stale(directory):
+                    _rebuild(directory)
+    return path if os.path.isfile(path) else None
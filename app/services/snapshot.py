@@ -0,0 +1,389 @@
+import glob
+import hashlib
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tarfile
+import tempfile
+import time
+import uuid
+from datetime import date, datetime
+
+from ..extensions import db
+from .storage import CHUNK_SIZE, LocalStorage
+
+FORMAT = 1
+MANIFEST = "manifest.json"
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _encode_value(obj):
+    if isinstance(obj, datetime):
+        return {"__dt__": obj.isoformat()}
+    if isinstance(obj, date):
+        return {"__d__": obj.isoformat()}
+    raise TypeError(f"Cannot snapshot {type(obj).__name__}")
+
+
+def _decode_value(obj):
+    if len(obj) == 1:
+        if "__dt__" in obj:
+            return datetime.fromisoformat(obj["__dt__"])
+        if "__d__" in obj:
+            return date.fromisoformat(obj["__d__"])
+    return obj
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        while chunk := fh.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _HashingReader:
+    """
+    File-like wrapper that hashes what is read through it, so a blob is
+    verified while it streams out of the archive.
+    """
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.digest = hashlib.sha256()
+
+    def read(self, size=-1):
+        chunk = self.fileobj.read(size)
+        self.digest.update(chunk)
+        return chunk
+
+
+# =====================================================
+# MANIFESTS
+# =====================================================
+def read_manifest(archive_path: str) -> dict:
+    """
+    The manifest is always the first member, so this reads only the start
+    of the archive (compressed or not).
+    """
+    with tarfile.open(archive_path, "r|*") as tar:
+        member = tar.next()
+        if member is None or member.name != MANIFEST:
+            raise SnapshotError(f"{archive_path} is not a snapshot (no {MANIFEST}).")
+        manifest = json.load(tar.extractfile(member))
+    if manifest.get("format") != FORMAT:
+        raise SnapshotError(f"{archive_path}: unsupported snapshot format {manifest.get('format')!r}.")
+    return manifest
+
+
+def latest_archive(snapshot_dir: str):
+    paths = sorted(
+        (p for p in glob.glob(os.path.join(snapshot_dir, "ismaverse-*.tar*")) if not p.endswith(".part")),
+        key=os.path.getmtime,
+    )
+    return paths[-1] if paths else None
+
+
+def _upload_files(storage: LocalStorage):
+    """
+    (key, path, stat) for every blob under the storage root, skipping
+    half-written .part files.
+    """
+    if not os.path.isdir(storage.root):
+        return
+    for dirpath, dirnames, filenames in os.walk(storage.root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.endswith(".part"):
+                continue
+            path = os.path.join(dirpath, name)
+            key = os.path.relpath(path, storage.root).replace(os.sep, "/")
+            yield key, path, os.stat(path)
+
+
+def build_file_manifest(storage: LocalStorage, base: dict = None) -> dict:
+    """
+    {key: {sha256, size, mtime_ns, archive}}. Files whose size and mtime
+    match the base manifest reuse its hash instead of being read again;
+    `archive` is filled in by the caller for blobs that must be copied.
+    """
+    known = (base or {}).get("files", {})
+    files = {}
+    for key, path, st in _upload_files(storage):
+        previous = known.get(key)
+        if previous and previous["size"] == st.st_size and previous["mtime_ns"] == st.st_mtime_ns:
+            sha = previous["sha256"]
+        else:
+            sha = file_sha256(path)
+        files[key] = {"sha256": sha, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "archive": None}
+    return files
+
+
+# =====================================================
+# DATABASE
+# =====================================================
+def _alembic_revision():
+    try:
+        return db.session.execute(db.text("SELECT version_num FROM alembic_version")).scalar()
+    except Exception:
+        db.session.rollback()
+        return None
+
+
+def _sqlite_path():
+    url = db.engine.url
+    if url.get_backend_name() != "sqlite" or not url.database or url.database == ":memory:":
+        return None
+    return url.database
+
+
+def _backup_sqlite(src_path: str, dst_path: str) -> None:
+    # Online backup API: a consistent copy while the app keeps writing.
+    # Copies in steps so writers are only blocked for a moment at a time.
+    src = sqlite3.connect(src_path)
+    dst = sqlite3.connect(dst_path)
+    try:
+        with dst:
+            src.backup(dst, pages=1024, sleep=0.005)
+    finally:
+        dst.close()
+        src.close()
+
+
+def _dump_table(conn, table, out) -> int:
+    rows = 0
+    result = conn.execute(db.select(table).execution_options(yield_per=1000))
+    for row in result.mappings():
+        out.write(json.dumps(dict(row), default=_encode_value, separators=(",", ":")))
+        out.write("\n")
+        rows += 1
+    return rows
+
+
+# =====================================================
+# SNAPSHOT
+# =====================================================
+def _dump_rows(workdir: str):
+    """
+    Every table as JSON lines, all read in one REPEATABLE READ transaction
+    so the dumps agree with each other (no comment without its comic).
+    """
+    database = {"kind": "rows", "dialect": db.engine.url.get_backend_name(), "tables": []}
+    dumps = []
+    with db.engine.connect() as conn:
+        if database["dialect"] != "sqlite":
+            conn = conn.execution_options(isolation_level="REPEATABLE READ")
+        with conn.begin():
+            for table in db.metadata.sorted_tables:
+                dump_path = os.path.join(workdir, f"{table.name}.jsonl")
+                with open(dump_path, "w", encoding="utf-8") as out:
+                    rows = _dump_table(conn, table, out)
+                database["tables"].append({"name": table.name, "rows": rows})
+                dumps.append((f"database/{table.name}.jsonl", dump_path))
+    return database, dumps
+
+
+def _add_file(tar, arcname: str, path: str) -> None:
+    info = tar.gettarinfo(path, arcname=arcname)
+    info.uid = info.gid = 0
+    info.uname = info.gname = ""
+    with open(path, "rb") as fh:
+        tar.addfile(info, fh)
+
+
+def _add_bytes(tar, arcname: str, data: bytes) -> None:
+    info = tarfile.TarInfo(arcname)
+    info.size = len(data)
+    info.mtime = int(time.time())
+    tar.addfile(info, io.BytesIO(data))
+
+
+def create_snapshot(output: str, storage, base_path: str = None, log=print) -> dict:
+    """
+    Write a tar (".gz" suffix: gzip) with the manifest first, then the
+    database, then only the upload blobs whose content changed since the
+    base snapshot. Everything is streamed from disk.
+    """
+    base = read_manifest(base_path) if base_path else None
+    snapshot_id = f"{datetime.utcnow():%Y%m%dT%H%M%SZ}-{uuid.uuid4().hex[:6]}"
+
+    with tempfile.TemporaryDirectory(prefix="ismaverse-snapshot-") as workdir:
+        # Database first: an upload scanned afterwards can only be newer than
+        # the rows that point at it, never missing for one of them
+        sqlite_path = _sqlite_path()
+        if sqlite_path:
+            dump_path = os.path.join(workdir, "app.db")
+            _backup_sqlite(sqlite_path, dump_path)
+            database = {"kind": "sqlite", "member": "database/app.db"}
+            dumps = [("database/app.db", dump_path)]
+        else:
+            database, dumps = _dump_rows(workdir)
+        database["revision"] = _alembic_revision()
+
+        files = {}
+        if isinstance(storage, LocalStorage):
+            files = build_file_manifest(storage, base)
+            base_files = base["files"] if base else {}
+            for key, entry in files.items():
+                previous = base_files.get(key)
+                if previous and previous["sha256"] == entry["sha256"]:
+                    entry["archive"] = previous["archive"]
+                else:
+                    entry["archive"] = snapshot_id
+        else:
+            log(f"Uploads live in the {storage.name} bucket and are not copied into the snapshot.")
+
+        manifest = {
+            "format": FORMAT,
+            "id": snapshot_id,
+            "created": datetime.utcnow().isoformat() + "Z",
+            "base": base["id"] if base else None,
+            "database": database,
+            "files": files,
+        }
+
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        tmp_output = f"{output}.{uuid.uuid4().hex}.part"
+        try:
+            with tarfile.open(tmp_output, "w|gz" if output.endswith(".gz") else "w|") as tar:
+                _add_bytes(tar, MANIFEST, json.dumps(manifest, indent=1, sort_keys=True).encode())
+                for arcname, path in dumps:
+                    _add_file(tar, arcname, path)
+                for key, entry in files.items():
+                    if entry["archive"] == snapshot_id:
+                        _add_file(tar, f"uploads/{key}", storage.path(key))
+            os.replace(tmp_output, output)
+        finally:
+            if os.path.exists(tmp_output):
+                os.remove(tmp_output)
+    return manifest
+
+
+# =====================================================
+# RESTORE
+# =====================================================
+def _restore_sqlite(extracted: str, target: str) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+    db.session.remove()
+    db.engine.dispose()
+    _backup_sqlite(extracted, target)
+
+
+def _restore_rows(tar_member_files: dict, manifest: dict, batch_size: int = 1000) -> None:
+    revision = _alembic_revision()
+    if revision != manifest["database"].get("revision"):
+        raise SnapshotError(
+            f"Snapshot is at migration {manifest['database'].get('revision')}, "
+            f"this database at {revision}; run `flask db upgrade` to match first."
+        )
+    tables = db.metadata.tables
+    with db.engine.begin() as conn:
+        for table in reversed(db.metadata.sorted_tables):
+            conn.execute(table.delete())
+        for entry in manifest["database"]["tables"]:
+            table = tables[entry["name"]]
+            batch = []
+            with open(tar_member_files[entry["name"]], encoding="utf-8") as fh:
+                for line in fh:
+                    batch.append(json.loads(line, object_hook=_decode_value))
+                    if len(batch) >= batch_size:
+                        conn.execute(table.insert(), batch)
+                        batch = []
+            if batch:
+                conn.execute(table.insert(), batch)
+            if conn.dialect.name == "postgresql" and "id" in table.c:
+                conn.execute(db.text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                    f"COALESCE((SELECT MAX(id) FROM {table.name}), 1))"
+                ))
+
+
+def _needs_blob(storage, key: str, entry: dict) -> bool:
+    # Skip blobs already on disk with the right content (re-running a restore)
+    if isinstance(storage, LocalStorage):
+        path = storage.path(key)
+        return not (os.path.isfile(path) and os.path.getsize(path) == entry["size"]
+                    and file_sha256(path) == entry["sha256"])
+    return True
+
+
+def _restore_blob(storage, key: str, fileobj, entry: dict) -> None:
+    reader = _HashingReader(fileobj)
+    storage.save(key, reader)
+    if reader.digest.hexdigest() != entry["sha256"]:
+        storage.delete(key)
+        raise SnapshotError(f"Checksum mismatch for {key}; archive is damaged.")
+
+
+def restore_snapshot(archive_path: str, storage, search=(), log=print) -> dict:
+    """
+    Restore the database and uploads from `archive_path`. Blobs carried over
+    from earlier snapshots are read from those archives, found among
+    `search` paths and the archive's own directory by snapshot id.
+    """
+    manifest = read_manifest(archive_path)
+    wanted = {key: entry for key, entry in manifest["files"].items() if _needs_blob(storage, key, entry)}
+    by_archive = {}
+    for key, entry in wanted.items():
+        by_archive.setdefault(entry["archive"], {})[key] = entry
+
+    archives = {manifest["id"]: archive_path}
+    if set(by_archive) - set(archives):
+        candidates = list(search) + glob.glob(os.path.join(os.path.dirname(os.path.abspath(archive_path)), "*.tar*"))
+        for path in candidates:
+            try:
+                archives.setdefault(read_manifest(path)["id"], path)
+            except (SnapshotError, tarfile.TarError, OSError):
+                continue
+    missing = set(by_archive) - set(archives)
+    if missing:
+        raise SnapshotError(f"Earlier snapshot(s) needed for some uploads: {', '.join(sorted(missing))}.")
+
+    database = manifest["database"]
+    with tempfile.TemporaryDirectory(prefix="ismaverse-restore-") as workdir:
+        dumped = {}
+        restored = 0
+        with tarfile.open(archive_path, "r|*") as tar:
+            needed = by_archive.pop(manifest["id"], {})
+            for member in tar:
+                if not member.isfile():
+                    continue
+                if member.name.startswith("database/"):
+                    path = os.path.join(workdir, os.path.basename(member.name))
+                    with open(path, "wb") as out:
+                        shutil.copyfileobj(tar.extractfile(member), out, CHUNK_SIZE)
+                    dumped[os.path.basename(member.name).rsplit(".", 1)[0]] = path
+                elif member.name.startswith("uploads/"):
+                    key = member.name[len("uploads/"):]
+                    if key in needed:
+                        _restore_blob(storage, key, tar.extractfile(member), needed.pop(key))
+                        restored += 1
+            if needed:
+                raise SnapshotError(f"{len(needed)} upload(s) missing from {archive_path}.")
+
+        if database["kind"] == "sqlite":
+            target = _sqlite_path()
+            if target is None:
+                raise SnapshotError("Snapshot holds an SQLite database; point DATABASE_URL at an SQLite file.")
+            _restore_sqlite(dumped["app"], target)
+        else:
+            _restore_rows(dumped, manifest)
+        log("Database restored.")
+
+    for snapshot_id, needed in by_archive.items():
+        with tarfile.open(archives[snapshot_id], "r|*") as tar:
+            for member in tar:
+                key = member.name[len("uploads/"):] if member.name.startswith("uploads/") else None
+                if key in needed:
+                    _restore_blob(storage, key, tar.extractfile(member), needed.pop(key))
+                    restored += 1
+        if needed:
+            raise SnapshotError(f"{len(needed)} upload(s) missing from {archives[snapshot_id]}.")
+
+    log(f"Restored {restored} upload(s); {len(manifest['files']) - len(wanted)} already up to date.")
+    return manifest
@@ -0,0 +1,310 @@
+import mimetypes
+import os
+import shutil
+import tempfile
+import uuid
+from collections import namedtuple
+from contextlib import contextmanager
+from urllib.parse import quote
+
+from flask import current_app, redirect, request, send_file, url_for
+from werkzeug.utils import safe_join
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:  # optional dependency, only needed for STORAGE_BACKEND=s3
+    boto3 = None
+    ClientError = Exception
+
+CHUNK_SIZE = 1024 * 1024
+
+BlobStat = namedtuple("BlobStat", "size etag modified")
+
+
+class StorageError(Exception):
+    pass
+
+
+def pdf_key(filename: str):
+    """
+    "issue_1.pdf" -> "pdfs/issue_1.pdf" (None if the name tries to escape).
+    """
+    return safe_join("pdfs", filename)
+
+
+def image_key(filename: str):
+    return safe_join("characters", filename)
+
+
+class LocalStorage:
+    """
+    Blobs as files under `root` (app/static/uploads by default).
+    Keys look like "pdfs/issue_1.pdf" or "characters/<uuid>.png".
+    """
+
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        full = os.path.normpath(os.path.join(self.root, key))
+        if not full.startswith(os.path.normpath(self.root) + os.sep):
+            raise StorageError(f"Invalid key {key!r}")
+        return full
+
+    def save(self, key: str, fileobj, content_type: str = None) -> None:
+        # Stream to a temp file next to the target, then rename atomically
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f"{target}.{uuid.uuid4().hex}.part"
+        try:
+            with open(tmp, "wb") as out:
+                shutil.copyfileobj(fileobj, out, CHUNK_SIZE)
+            os.replace(tmp, target)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+
+    def stat(self, key: str):
+        try:
+            st = os.stat(self.path(key))
+        except FileNotFoundError:
+            return None
+        return BlobStat(st.st_size, f"{int(st.st_mtime)}-{st.st_size}", st.st_mtime)
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def iter_range(self, key: str, start: int = 0, end: int = None):
+        """
+        Yield bytes [start, end] (inclusive) in chunks.
+        """
+        with open(self.path(key), "rb") as fh:
+            fh.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = fh.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    @contextmanager
+    def local_file(self, key: str):
+        yield self.path(key)
+
+    def url(self, key: str, expires: int = None, **params):
+        return url_for("static", filename=f"uploads/{key}")
+
+    def presigned_url(self, key: str, expires: int = None, **params):
+        return None  # served by the app / proxy
+
+
+class S3Storage:
+    """
+    Blobs in an S3-compatible bucket (AWS, MinIO, ...).
+    """
+
+    name = "s3"
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: str = None,
+                 region: str = None, public_url: str = None, presign_seconds: int = 300):
+        if boto3 is None:
+            raise StorageError("boto3 is required for STORAGE_BACKEND=s3 (pip install boto3).")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.public_url = public_url.rstrip("/") if public_url else None
+        self.presign_seconds = presign_seconds
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or None, region_name=region or None)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def save(self, key: str, fileobj, content_type: str = None) -> None:
+        # upload_fileobj reads in chunks and switches to multipart for big files
+        extra = {"ContentType": content_type} if content_type else None
+        self.client.upload_fileobj(fileobj, self.bucket, self._key(key), ExtraArgs=extra)
+
+    def _head(self, key: str):
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError:
+            return None
+
+    def exists(self, key: str) -> bool:
+        return self._head(key) is not None
+
+    def stat(self, key: str):
+        head = self._head(key)
+        if head is None:
+            return None
+        return BlobStat(head["ContentLength"], head["ETag"].strip('"'), head["LastModified"])
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def iter_range(self, key: str, start: int = 0, end: int = None):
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        body = self.client.get_object(Bucket=self.bucket, Key=self._key(key), Range=byte_range)["Body"]
+        try:
+            yield from body.iter_chunks(CHUNK_SIZE)
+        finally:
+            body.close()
+
+    @contextmanager
+    def local_file(self, key: str):
+        # Some tools (PDF linearization) need a real file
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(key)[1])
+        os.close(fd)
+        try:
+            self.client.download_file(self.bucket, self._key(key), path)
+            yield path
+        finally:
+            os.remove(path)
+
+    def presigned_url(self, key: str, expires: int = None, **params):
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self._key(key), **params},
+            ExpiresIn=expires or self.presign_seconds,
+        )
+
+    def url(self, key: str, expires: int = None, **params):
+        if self.public_url and not params:
+            return f"{self.public_url}/{self._key(key)}"
+        return self.presigned_url(key, expires, **params)
+
+
+def make_storage(app):
+    config = app.config
+    if config.get("STORAGE_OFFLOAD") not in ("", None, "x-accel", "x-sendfile"):
+        raise StorageError("STORAGE_OFFLOAD must be empty, 'x-accel' or 'x-sendfile'.")
+    if config.get("STORAGE_BACKEND") == "s3":
+        return S3Storage(
+            bucket=config["S3_BUCKET"],
+            prefix=config.get("S3_PREFIX", ""),
+            endpoint_url=config.get("S3_ENDPOINT_URL"),
+            region=config.get("S3_REGION"),
+            public_url=config.get("S3_PUBLIC_URL"),
+            presign_seconds=config.get("STORAGE_PRESIGN_SECONDS", 300),
+        )
+    root = config.get("LOCAL_STORAGE_ROOT") or os.path.join(app.static_folder, "uploads")
+    return LocalStorage(root)
+
+
+def get_storage():
+    return current_app.extensions["storage"]
+
+
+def upload_url(key: str) -> str:
+    """
+    Template helper: browser URL for a stored blob.
+    Local files outside static/ (LOCAL_STORAGE_ROOT) or offloaded to the front
+    proxy (STORAGE_OFFLOAD) go through a view; otherwise straight to static/S3.
+    """
+    storage = get_storage()
+    config = current_app.config
+    if isinstance(storage, LocalStorage) and (config.get("STORAGE_OFFLOAD") or config.get("LOCAL_STORAGE_ROOT")):
+        folder, _, filename = key.partition("/")
+        if folder == "characters":
+            return url_for("characters.character_image", filename=filename)
+        if folder == "pdfs":
+            return url_for("comics.serve_pdf", filename=filename)
+    return storage.url(key)
+
+
+def offload_response(storage, key: str, mimetype: str):
+    """
+    Hand the transfer to the front proxy: the worker only sends headers and
+    nginx (X-Accel-Redirect) or Apache/lighttpd (X-Sendfile) streams the bytes,
+    including Range requests.
+    """
+    stat = storage.stat(key)
+    if stat is None:
+        return None
+
+    config = current_app.config
+    response = current_app.response_class(mimetype=mimetype)
+    if config["STORAGE_OFFLOAD"] == "x-accel":
+        location = config.get("X_ACCEL_LOCATION", "/_uploads").rstrip("/")
+        response.headers["X-Accel-Redirect"] = f"{location}/{quote(key)}"
+    else:
+        response.headers["X-Sendfile"] = storage.path(key)
+
+    response.headers["Accept-Ranges"] = "bytes"
+    response.cache_control.public = True
+    response.cache_control.max_age = config.get("STORAGE_OFFLOAD_MAX_AGE", 3600)
+    response.set_etag(stat.etag)
+    response.last_modified = stat.modified
+    response = response.make_conditional(request)
+    if response.status_code == 304:
+        # Nothing to stream; don't let the proxy turn this back into a 200
+        response.headers.pop("X-Accel-Redirect", None)
+        response.headers.pop("X-Sendfile", None)
+    return response
+
+
+def send_blob(key: str, mimetype: str = None):
+    """
+    Response for a stored blob, or None if it does not exist.
+      local -> X-Accel-Redirect / X-Sendfile (STORAGE_OFFLOAD), else
+               send_file (conditional + Range handled by werkzeug)
+      s3    -> redirect to a presigned URL (STORAGE_REDIRECT), else a
+               streamed proxy that honours a single Range
+    """
+    storage = get_storage()
+    mimetype = mimetype or mimetypes.guess_type(key)[0] or "application/octet-stream"
+
+    if isinstance(storage, LocalStorage):
+        if current_app.config.get("STORAGE_OFFLOAD"):
+            return offload_response(storage, key, mimetype)
+        path = storage.path(key)
+        if not os.path.isfile(path):
+            return None
+        return send_file(path, mimetype=mimetype, conditional=True)
+
+    stat = storage.stat(key)
+    if stat is None:
+        return None
+
+    if current_app.config.get("STORAGE_REDIRECT"):
+        expires = current_app.config.get("STORAGE_PRESIGN_SECONDS", 300)
+        response = redirect(storage.presigned_url(key, expires), code=302)
+        # Browsers may reuse the redirect, but never past the signature's lifetime
+        response.headers["Cache-Control"] = f"private, max-age={max(expires // 2, 0)}"
+        return response
+
+    start, stop, status = 0, stat.size, 200
+    byte_range = request.range
+    if byte_range is not None and len(byte_range.ranges) == 1:
+        bounds = byte_range.range_for_length(stat.size)
+        if bounds is None:
+            response = current_app.response_class(status=416)
+            response.headers["Content-Range"] = f"bytes */{stat.size}"
+            return response
+        start, stop = bounds
+        status = 206
+
+    # Lazy generator: nothing is fetched if the conditional check below turns this into a 304
+    response = current_app.response_class(
+        storage.iter_range(key, start, stop - 1) if stop > start else [],
+        status=status,
+        mimetype=mimetype,
+        direct_passthrough=True,
+    )
+    response.content_length = stop - start
+    response.headers["Accept-Ranges"] = "bytes"
+    if status == 206:
+        response.headers["Content-Range"] = f"bytes {start}-{stop - 1}/{stat.size}"
+    response.set_etag(stat.etag)
+    response.last_modified = stat.modified
+    return response.make_conditional(request)
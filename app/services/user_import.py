@@ -0,0 +1,213 @@
+import csv
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import generate_password_hash
+
+from ..extensions import db
+from ..models.user import ROLE_BITS, User, roles_to_mask
+from .site_stats import adjust
+
+# Hash formats check_password_hash understands ("method$salt$hash")
+HASH_METHODS = ("pbkdf2:", "scrypt:")
+
+Rejected = namedtuple("Rejected", "line username email reason")
+
+
+class ImportResult:
+    def __init__(self):
+        self.read = 0
+        self.imported = 0
+        self.rejected = 0
+
+
+def _hash(password: str) -> str:
+    # Module level so worker processes can unpickle it
+    return generate_password_hash(password)
+
+
+# =====================================================
+# READING (ONE RECORD AT A TIME)
+# =====================================================
+def read_records(path: str):
+    """
+    Yield (line, record or None, error) from a .csv (header row) or
+    .jsonl/.ndjson file without loading it.
+    """
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as fh:
+            reader = csv.DictReader(fh)
+            for record in reader:
+                yield reader.line_num, record, None
+        return
+
+    if not path.endswith((".jsonl", ".ndjson")):
+        raise ValueError("Import file must be .csv, .jsonl or .ndjson")
+    with open(path, encoding="utf-8") as fh:
+        for line_num, line in enumerate(fh, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                yield line_num, None, f"invalid JSON ({exc.msg})"
+                continue
+            if not isinstance(record, dict):
+                yield line_num, None, "not a JSON object"
+                continue
+            yield line_num, record, None
+
+
+def _text(record: dict, key: str) -> str:
+    value = record.get(key)
+    return "" if value is None else str(value).strip()
+
+
+def _validate(record: dict, default_roles: str):
+    """
+    (row, password) or a rejection reason. Usernames and emails are compared
+    case-insensitively, like register and login do.
+    """
+    username = _text(record, "username")
+    email = _text(record, "email").lower() or None
+    password = record.get("password") or ""
+    password_hash = record.get("password_hash") or ""
+    roles = _text(record, "roles") or default_roles
+
+    if not username:
+        return "username is required"
+    if len(username) > User.username.type.length:
+        return "username is too long"
+    if email and ("@" not in email or len(email) > User.email.type.length):
+        return "invalid email"
+    if not isinstance(password, str) or not isinstance(password_hash, str):
+        return "password and password_hash must be strings"
+    password_hash = password_hash.strip()
+    if not password and not password_hash:
+        return "password or password_hash is required"
+    if password_hash and not (password_hash.startswith(HASH_METHODS) and password_hash.count("$") == 2):
+        return "unsupported password_hash format"
+    unknown = [r for r in (r.strip() for r in roles.split(",")) if r and r not in ROLE_BITS]
+    if unknown:
+        return f"unknown role(s): {', '.join(unknown)}"
+
+    row = {
+        "username": username,
+        "email": email,
+        "password_hash": password_hash or None,
+        "roles": roles,
+        "role_mask": roles_to_mask(roles),
+    }
+    return row, (None if password_hash else password)
+
+
+# =====================================================
+# IMPORT
+# =====================================================
+def _taken(column, values: set) -> set:
+    if not values:
+        return set()
+    lowered = db.func.lower(column)
+    return set(db.session.execute(db.select(lowered).where(lowered.in_(values))).scalars())
+
+
+def _insert(rows: list, on_reject) -> int:
+    """
+    One transaction for the batch. If another writer took a name meanwhile,
+    redo it row by row in savepoints to find the rows that clash.
+    """
+    try:
+        db.session.execute(db.insert(User), [row for _, row in rows])
+        adjust("users", len(rows))
+        db.session.commit()
+        return len(rows)
+    except IntegrityError:
+        db.session.rollback()
+
+    inserted = 0
+    for line, row in rows:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(db.insert(User), [row])
+            inserted += 1
+        except IntegrityError:
+            on_reject(Rejected(line, row["username"], row["email"], "username or email already in use"))
+    adjust("users", inserted)
+    db.session.commit()
+    return inserted
+
+
+def import_users(records, on_reject, batch_size: int = 500, workers: int = None,
+                 default_roles: str = "user", dry_run: bool = False) -> ImportResult:
+    """
+    Validate, de-duplicate and insert `records` (from read_records) in
+    batches: one lookup per batch for names/emails already in the database,
+    plain passwords hashed across a process pool, one INSERT per batch.
+    """
+    result = ImportResult()
+    seen_usernames, seen_emails = set(), set()
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(workers) if workers > 1 and not dry_run else None
+
+    def reject(rejected: Rejected):
+        result.rejected += 1
+        on_reject(rejected)
+
+    try:
+        records = iter(records)
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            result.read += len(batch)
+
+            valid = []
+            for line, record, error in batch:
+                if error:
+                    reject(Rejected(line, "", "", error))
+                    continue
+                checked = _validate(record, default_roles)
+                if isinstance(checked, str):
+                    reject(Rejected(line, _text(record, "username"), _text(record, "email"), checked))
+                    continue
+                row, password = checked
+                username_key = row["username"].lower()
+                if username_key in seen_usernames or (row["email"] and row["email"] in seen_emails):
+                    reject(Rejected(line, row["username"], row["email"], "duplicate in import file"))
+                    continue
+                seen_usernames.add(username_key)
+                if row["email"]:
+                    seen_emails.add(row["email"])
+                valid.append((line, row, password))
+
+            taken_usernames = _taken(User.username, {row["username"].lower() for _, row, _ in valid})
+            taken_emails = _taken(User.email, {row["email"] for _, row, _ in valid if row["email"]})
+            rows = []
+            for line, row, password in valid:
+                if row["username"].lower() in taken_usernames or row["email"] in taken_emails:
+                    reject(Rejected(line, row["username"], row["email"], "username or email already in use"))
+                else:
+                    rows.append((line, row, password))
+
+            if dry_run:
+                result.imported += len(rows)
+                continue
+
+            passwords = [password for _, _, password in rows if password is not None]
+            if pool is not None:
+                hashes = iter(pool.map(_hash, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+            else:
+                hashes = map(_hash, passwords)
+            for _, row, password in rows:
+                if password is not None:
+                    row["password_hash"] = next(hashes)
+
+            result.imported += _insert([(line, row) for line, row, _ in rows], reject)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return result
@@ -21,12 +21,67 @@
   pdfjsLib.GlobalWorkerOptions.workerSrc = window.COMIC_READER.workerUrl;
 
 
+  // Cache fetched PDF bytes for returning readers (scope: /comics/)
+  if ("serviceWorker" in navigator && window.COMIC_READER.swUrl) {
+    navigator.serviceWorker.register(window.COMIC_READER.swUrl).catch(err => {
+      console.warn("Comic Reader: service worker not registered", err);
+    });
+  }
+
   let pdfDoc = null;
   let pageNum = 1;
   let pageCount = 0;
   let scale = 1.0;        // “base” scale
   let fitScale = 1.0;     // auto-fit scale
-  let renderTask = null;
+  let showToken = 0;      // latest requested page draw wins
+
+  // =====================
+  // RENDER CACHE (LRU)
+  // Pre-rendered pages kept as offscreen bitmaps, bounded in bytes by device memory:
+  // ~24 MB per GB of RAM, between 32 MB and 192 MB.
+  // =====================
+  const deviceGb = navigator.deviceMemory || 4;
+  const CACHE_BUDGET = Math.min(192, Math.max(32, deviceGb * 24)) * 1024 * 1024;
+  const PREFETCH_RADIUS = 1;
+
+  const bitmapCache = new Map();   // key -> { bitmap, cssWidth, cssHeight, bytes }
+  const inflight = new Map();      // key -> Promise<entry>
+  let cacheBytes = 0;
+
+  function cacheKey(num, renderScale, dpr) {
+    return `${num}@${renderScale.toFixed(4)}x${dpr}`;
+  }
+
+  function cacheGet(key) {
+    const entry = bitmapCache.get(key);
+    if (!entry) return null;
+    // refresh recency
+    bitmapCache.delete(key);
+    bitmapCache.set(key, entry);
+    return entry;
+  }
+
+  function cachePut(key, entry) {
+    if (bitmapCache.has(key)) return;
+    bitmapCache.set(key, entry);
+    cacheBytes += entry.bytes;
+
+    // evict least recently used (Map keeps insertion order)
+    for (const [oldKey, oldEntry] of bitmapCache) {
+      if (cacheBytes <= CACHE_BUDGET || oldKey === key) break;
+      bitmapCache.delete(oldKey);
+      cacheBytes -= oldEntry.bytes;
+      if (oldEntry.bitmap.close) oldEntry.bitmap.close();
+    }
+  }
+
+  // Detached canvas: PDF.js renders here without touching the visible page
+  function makeSurface(width, height) {
+    const c = document.createElement("canvas");
+    c.width = width;
+    c.height = height;
+    return c;
+  }
 
   function setFlip() {
     pageFrame.classList.remove("is-flipping");
@@ -44,45 +99,151 @@
     nextBtn.disabled = (pageNum >= pageCount);
   }
 
-  async function renderPage(num) {
-    if (!pdfDoc) return;
+  // Scale at which page `num` should be drawn right now (fit width * zoom)
+  function targetScale(page) {
+    const containerWidth = pageFrame.clientWidth;
+    const viewportAt1 = page.getViewport({ scale: 1.0 });
+    fitScale = (containerWidth / viewportAt1.width);
+    return fitScale * scale;
+  }
+
+  // Render page `num` into an offscreen bitmap (deduplicated, cached)
+  async function renderToBitmap(num) {
+    const page = await pdfDoc.getPage(num);
+    const renderScale = targetScale(page);
+    const dpr = window.devicePixelRatio || 1;
+    const key = cacheKey(num, renderScale, dpr);
+
+    const cached = cacheGet(key);
+    if (cached) return cached;
+    if (inflight.has(key)) return inflight.get(key);
 
-    // cancel prior render if still running
-    if (renderTask) {
-      try { renderTask.cancel(); } catch (e) {}
+    const job = (async () => {
+      const viewport = page.getViewport({ scale: renderScale });
+
+      // Proper canvas sizing for crispness
+      const width = Math.floor(viewport.width * dpr);
+      const height = Math.floor(viewport.height * dpr);
+      const surface = makeSurface(width, height);
+      const surfaceCtx = surface.getContext("2d");
+      surfaceCtx.setTransform(dpr, 0, 0, dpr, 0, 0);
+
+      await page.render({ canvasContext: surfaceCtx, viewport }).promise;
+
+      const bitmap = (typeof createImageBitmap === "function")
+        ? await createImageBitmap(surface)
+        : surface;
+
+      const entry = {
+        bitmap,
+        cssWidth: Math.floor(viewport.width),
+        cssHeight: Math.floor(viewport.height),
+        bytes: width * height * 4
+      };
+      cachePut(key, entry);
+      return entry;
+    })();
+
+    inflight.set(key, job);
+    try {
+      return await job;
+    } finally {
+      inflight.delete(key);
     }
+  }
 
-    const page = await pdfDoc.getPage(num);
+  function prefetchAround(num) {
+    const idle = window.requestIdleCallback || ((fn) => setTimeout(fn, 50));
+    idle(() => {
+      for (let d = 1; d <= PREFETCH_RADIUS; d++) {
+        for (const n of [num + d, num - d]) {
+          if (n < 1 || n > pageCount) continue;
+          renderToBitmap(n).catch(() => {});
+        }
+      }
+    });
+  }
 
-    // Fit page width to container
-    const containerWidth = pageFrame.clientWidth;
-    const viewportAt1 = page.getViewport({ scale: 1.0 });
-    fitScale = (containerWidth / viewportAt1.width);
+  async function renderPage(num) {
+    if (!pdfDoc) return;
 
-    const viewport = page.getViewport({ scale: fitScale * scale });
+    const token = ++showToken;
+    const entry = await renderToBitmap(num);
 
-    // Proper canvas sizing for crispness
-    const devicePixelRatio = window.devicePixelRatio || 1;
-    canvas.width = Math.floor(viewport.width * devicePixelRatio);
-    canvas.height = Math.floor(viewport.height * devicePixelRatio);
-    canvas.style.width = `${Math.floor(viewport.width)}px`;
-    canvas.style.height = `${Math.floor(viewport.height)}px`;
+    // a newer flip/zoom superseded this one
+    if (token !== showToken) return;
 
-    ctx.setTransform(devicePixelRatio, 0, 0, devicePixelRatio, 0, 0);
+    canvas.width = entry.bitmap.width;
+    canvas.height = entry.bitmap.height;
+    canvas.style.width = `${entry.cssWidth}px`;
+    canvas.style.height = `${entry.cssHeight}px`;
 
-    renderTask = page.render({ canvasContext: ctx, viewport });
-    await renderTask.promise;
+    ctx.setTransform(1, 0, 0, 1, 0, 0);
+    ctx.drawImage(entry.bitmap, 0, 0);
 
     updateUI();
+    prefetchAround(num);
+    scheduleSave();
+  }
+
+  // =====================
+  // READING PROGRESS
+  // Saved once the reader settles on a page (debounced), and on leaving.
+  // =====================
+  const progressUrl = window.COMIC_READER.progressUrl;
+  let savedPage = null;
+  let saveTimer = null;
+
+  function saveProgress(useBeacon) {
+    clearTimeout(saveTimer);
+    if (!progressUrl || savedPage === pageNum) return;
+    savedPage = pageNum;
+    const body = JSON.stringify({ page: pageNum });
+    if (useBeacon && navigator.sendBeacon) {
+      navigator.sendBeacon(progressUrl, new Blob([body], { type: "application/json" }));
+      return;
+    }
+    fetch(progressUrl, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body,
+      credentials: "same-origin",
+      keepalive: true
+    }).catch(() => { savedPage = null; });
   }
 
+  function scheduleSave() {
+    if (!progressUrl) return;
+    clearTimeout(saveTimer);
+    saveTimer = setTimeout(() => saveProgress(false), 2000);
+  }
+
+  window.addEventListener("pagehide", () => saveProgress(true));
+  document.addEventListener("visibilitychange", () => {
+    if (document.visibilityState === "hidden") saveProgress(true);
+  });
+
   async function loadPdf() {
     const loadingTask = pdfjsLib.getDocument(pdfUrl);
     pdfDoc = await loadingTask.promise;
     pageCount = pdfDoc.numPages;
-    pageNum = 1;
+    pageNum = Math.min(Math.max(1, window.COMIC_READER.startPage || 1), pageCount);
+    savedPage = pageNum;
     updateUI();
     await renderPage(pageNum);
+    firstPageDone();
+  }
+
+  // Lets secondary content (comments) start loading once the reader is usable
+  function firstPageDone() {
+    if (window.COMIC_READER.firstPageShown) return;
+    window.COMIC_READER.firstPageShown = true;
+    document.dispatchEvent(new CustomEvent("reader:firstpage"));
+    // Tells the service worker it can start caching the whole file now
+    navigator.serviceWorker?.controller?.postMessage({
+      type: "reader:firstpage",
+      url: new URL(pdfUrl, location.href).href
+    });
   }
 
   function nextPage() {
@@ -145,6 +306,7 @@
 
   // Go
   loadPdf().catch(err => {
+    firstPageDone();
     console.error("Comic Reader error:", err);
     alert("Could not load this comic. (PDF failed to render)");
   });
@@ -0,0 +1,98 @@
+(() => {
+  // Live comments: SSE stream, with long-polling where EventSource is missing
+  // or the server has streams off (streamUrl null).
+  // In the reader the list itself is a fragment fetched after page 1 renders.
+  const cfg = window.COMMENT_FEED;
+  const section = document.getElementById("commentSection");
+  if (!cfg) return;
+
+  let list = null;
+  let empty = null;
+  let lastId = 0;
+
+  function addComment(c) {
+    if (list.querySelector(`[data-comment-id="${c.id}"]`)) return;
+
+    const card = document.createElement("div");
+    card.className = "comment-card";
+    card.dataset.commentId = String(c.id);
+
+    const meta = document.createElement("div");
+    meta.className = "comment-meta";
+    const author = document.createElement("div");
+    author.className = "comment-author";
+    author.textContent = c.author;
+    const date = document.createElement("div");
+    date.className = "comment-date";
+    date.textContent = c.created_at;
+    meta.append(author, date);
+
+    const body = document.createElement("p");
+    body.className = "comment-body mb-0";
+    body.textContent = c.body;
+
+    card.append(meta, body);
+    list.prepend(card);   // newest first, like the server-rendered list
+    if (empty) empty.style.display = "none";
+    lastId = Math.max(lastId, c.id);
+  }
+
+  function startStream() {
+    const source = new EventSource(`${cfg.streamUrl}?after=${lastId}`);
+    source.addEventListener("comment", (e) => addComment(JSON.parse(e.data)));
+  }
+
+  const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+  async function longPoll() {
+    let backoff = 5000;
+    for (;;) {
+      try {
+        const res = await fetch(`${cfg.sinceUrl}?after=${lastId}&wait=25`, { credentials: "same-origin" });
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
+        if (res.status === 204) {
+          // The server has enough readers parked; check back later instead
+          await sleep(backoff + Math.random() * 1000);
+          backoff = Math.min(backoff * 2, 60000);
+          continue;
+        }
+        const data = await res.json();
+        data.comments.forEach(addComment);
+        backoff = 5000;
+      } catch (err) {
+        await sleep(5000);
+      }
+    }
+  }
+
+  function start() {
+    list = document.getElementById("commentList");
+    empty = document.getElementById("commentEmpty");
+    if (!list) return;
+    lastId = Number(list.dataset.lastId || 0);
+    if (cfg.streamUrl && "EventSource" in window) startStream(); else longPoll();
+  }
+
+  async function loadFragment() {
+    try {
+      const res = await fetch(section.dataset.fragmentUrl, { credentials: "same-origin" });
+      if (!res.ok) throw new Error(`HTTP ${res.status}`);
+      section.innerHTML = await res.text();
+    } catch (err) {
+      section.innerHTML = "";
+      section.append(Object.assign(document.createElement("div"), { id: "commentList", className: "comment-list" }));
+    }
+    start();
+  }
+
+  if (!section || !section.dataset.fragmentUrl) {
+    start();
+  } else if (window.COMIC_READER && !window.COMIC_READER.firstPageShown) {
+    let loaded = false;
+    const once = () => { if (!loaded) { loaded = true; loadFragment(); } };
+    document.addEventListener("reader:firstpage", once, { once: true });
+    setTimeout(once, 4000);   // slow or broken PDF: don't hold comments back forever
+  } else {
+    loadFragment();
+  }
+})();
@@ -0,0 +1,172 @@
+// Comic Reader service worker
+// Served from /comics/reader-sw.js so its scope covers /comics/pdf/.
+// Keeps full copies of PDFs readers have opened and answers PDF.js range
+// requests from them, revalidating in the background with the server ETag.
+// Full downloads wait until the reader reports its first page, so they never
+// compete with the ranges PDF.js needs to draw it.
+
+const CACHE_NAME = "isma-pdfs-v1";
+const MAX_PDFS = 12;
+const PDF_PATH = /\/comics\/pdf\/[^?]+\.pdf$/i;
+const REVALIDATE_MS = 10 * 60 * 1000;   // conditional GET per file at most this often
+const FIRST_PAGE_WAIT_MS = 15 * 1000;   // start the full copy anyway if no signal comes
+
+self.addEventListener("install", () => self.skipWaiting());
+
+self.addEventListener("activate", (event) => {
+  event.waitUntil((async () => {
+    const names = await caches.keys();
+    await Promise.all(
+      names.filter(n => n.startsWith("isma-pdfs-") && n !== CACHE_NAME).map(n => caches.delete(n))
+    );
+    await self.clients.claim();
+  })());
+});
+
+function cacheUrl(request) {
+  const url = new URL(typeof request === "string" ? request : request.url);
+  url.search = "";
+  return url.toString();
+}
+
+async function trimCache(cache) {
+  const keys = await cache.keys();
+  // keys come back in insertion order; drop the oldest
+  for (let i = 0; i < keys.length - MAX_PDFS; i++) {
+    await cache.delete(keys[i]);
+  }
+}
+
+// Fetch the whole file (no Range) and store it, unless the ETag still matches
+async function refresh(key, etag) {
+  const headers = etag ? { "If-None-Match": etag } : {};
+  const response = await fetch(key, { headers, credentials: "same-origin" });
+  if (response.status !== 200) return;
+
+  const cache = await caches.open(CACHE_NAME);
+  await cache.delete(key);   // re-insert so it counts as most recent
+  await cache.put(key, response);
+  await trimCache(cache);
+}
+
+// One refresh per file at a time: PDF.js fires many range requests at once,
+// and each full download would take another of the server's PDF slots
+const inflight = new Map();
+
+function refreshOnce(key, etag) {
+  if (!inflight.has(key)) {
+    inflight.set(key, refresh(key, etag).catch(() => {}).finally(() => inflight.delete(key)));
+  }
+  return inflight.get(key);
+}
+
+// Revalidate a cached file only if it hasn't been checked recently; every
+// range request PDF.js makes would otherwise send its own conditional GET
+const lastChecked = new Map();
+
+function revalidate(key, etag) {
+  const now = Date.now();
+  if (now - (lastChecked.get(key) || 0) < REVALIDATE_MS) return Promise.resolve();
+  lastChecked.set(key, now);
+  return refreshOnce(key, etag);
+}
+
+// The reader posts {type: "reader:firstpage", url} once page 1 is on screen
+const firstPageWaiters = new Map();   // key -> [resolve, ...]
+const firstPageSeen = new Set();
+
+function firstPageShown(key) {
+  if (firstPageSeen.has(key)) return Promise.resolve();
+  return new Promise(resolve => {
+    const timer = setTimeout(resolve, FIRST_PAGE_WAIT_MS);
+    const waiters = firstPageWaiters.get(key) || [];
+    waiters.push(() => { clearTimeout(timer); resolve(); });
+    firstPageWaiters.set(key, waiters);
+  });
+}
+
+self.addEventListener("message", (event) => {
+  const data = event.data || {};
+  if (data.type !== "reader:firstpage" || !data.url) return;
+  const key = cacheUrl(data.url);
+  firstPageSeen.add(key);
+  (firstPageWaiters.get(key) || []).forEach(resolve => resolve());
+  firstPageWaiters.delete(key);
+});
+
+// Full copy after the first page, once per file however many ranges miss
+const scheduled = new Set();
+
+function fetchAfterFirstPage(key) {
+  if (scheduled.has(key)) return Promise.resolve();
+  scheduled.add(key);
+  return firstPageShown(key)
+    .then(() => refreshOnce(key, null))
+    .then(() => lastChecked.set(key, Date.now()))
+    .finally(() => scheduled.delete(key));
+}
+
+function parseRange(header, size) {
+  const m = /^bytes=(\d*)-(\d*)$/.exec(header || "");
+  if (!m) return null;
+  let start, end;
+  if (m[1] === "") {
+    // suffix range: last N bytes
+    start = Math.max(0, size - Number(m[2]));
+    end = size - 1;
+  } else {
+    start = Number(m[1]);
+    end = m[2] === "" ? size - 1 : Math.min(Number(m[2]), size - 1);
+  }
+  if (start > end || start >= size) return null;
+  return { start, end };
+}
+
+async function fromCache(request, cached) {
+  const blob = await cached.blob();
+  const type = cached.headers.get("Content-Type") || "application/pdf";
+  const range = parseRange(request.headers.get("Range"), blob.size);
+
+  if (!request.headers.get("Range") || !range) {
+    return new Response(blob, {
+      status: 200,
+      headers: { "Content-Type": type, "Content-Length": String(blob.size), "Accept-Ranges": "bytes" }
+    });
+  }
+
+  const part = blob.slice(range.start, range.end + 1);
+  return new Response(part, {
+    status: 206,
+    headers: {
+      "Content-Type": type,
+      "Content-Length": String(part.size),
+      "Content-Range": `bytes ${range.start}-${range.end}/${blob.size}`,
+      "Accept-Ranges": "bytes"
+    }
+  });
+}
+
+self.addEventListener("fetch", (event) => {
+  const request = event.request;
+  if (request.method !== "GET" || !PDF_PATH.test(new URL(request.url).pathname)) return;
+
+  event.respondWith((async () => {
+    const key = cacheUrl(request);
+    const cache = await caches.open(CACHE_NAME);
+    const cached = await cache.match(key);
+
+    if (cached) {
+      event.waitUntil(revalidate(key, cached.headers.get("ETag")));
+      return fromCache(request, cached);
+    }
+
+    // First visit: stream from the network as usual (ranges and all),
+    // and pull a full copy into the cache once the first page is drawn,
+    // unless the reader asked to save data.
+    const saveData = self.navigator.connection && self.navigator.connection.saveData;
+    if (!saveData) {
+      event.waitUntil(fetchAfterFirstPage(key));
+    }
+    return fetch(request);
+  })());
+});
@@ -1,10 +1,14 @@
 import os
+import threading
 import uuid
+from datetime import datetime, timedelta
 
 from flask import (
     Blueprint,
+    abort,
     current_app,
     flash,
+    g,
     redirect,
     render_template,
     request,
@@ -16,7 +20,22 @@ from werkzeug.utils import secure_filename
 from ..extensions import db
 from ..models.comic import Comic
 from ..models.character import Character
-from ..models.user import User
+from ..models.user import ROLE_BITS, User
+from ..services.deletion import delete_character, delete_comic, delete_user, remove_files
+from ..services.list_queries import CHARACTER_ADMIN_COLUMNS, COMIC_ADMIN_COLUMNS, USER_ADMIN_COLUMNS
+from ..services.object_cache import CHARACTER, COMIC, PDF_FILE, USER_NAME, object_cache
+from ..services.pdf_linearize import linearize_pdf
+from ..services.profiler import (
+    StackSampler,
+    collapsed_text,
+    flamegraph_svg,
+    load_request_profile,
+    sample_process,
+    save_request_profile,
+)
+from ..services.site_stats import adjust, mark_changed, site_stats, username_changed
+from ..services.sitemaps import refresh_sitemaps
+from ..services.storage import get_storage, image_key, pdf_key
 
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
@@ -32,6 +51,8 @@ def restrict_to_admins():
         return redirect(url_for("main.home"))
 
 ALLOWED_PDF = {"pdf"}
+ADMIN_PER_PAGE = 50
+ADMIN_MAX_PER_PAGE = 200
 ALLOWED_IMG = {"png", "jpg", "jpeg", "webp"}
 
 
@@ -45,23 +66,122 @@ def allowed_image(filename: str) -> bool:
 
 def save_character_image(file_storage) -> str:
     """
-    Save uploaded character image to:
-      app/static/uploads/characters/
+    Stream uploaded character image into storage under:
+      characters/
     Returns the stored filename to put in DB.
     """
-    upload_dir = os.path.join(current_app.root_path, "static", "uploads", "characters")
-    os.makedirs(upload_dir, exist_ok=True)
-
     original = secure_filename(file_storage.filename)
     ext = original.rsplit(".", 1)[1].lower()
 
     # Prevent collisions
     new_name = f"{uuid.uuid4().hex}.{ext}"
-    save_path = os.path.join(upload_dir, new_name)
-    file_storage.save(save_path)
+    get_storage().save(image_key(new_name), file_storage.stream, file_storage.mimetype)
     return new_name
 
 
+def _linearize_in_background(app, comic_id: int, filename: str) -> None:
+    with app.app_context():
+        try:
+            linearized = linearize_pdf(get_storage(), filename)
+            if not linearized:
+                return
+            # Unless the comic got another PDF (or was deleted) meanwhile
+            db.session.execute(
+                db.update(Comic)
+                .where(Comic.id == comic_id, Comic.pdf_file == filename)
+                .values(pdf_linearized_file=linearized)
+            )
+            db.session.commit()
+            object_cache.invalidate(COMIC, comic_id)
+            object_cache.invalidate(PDF_FILE, filename)
+        except Exception:
+            app.logger.exception("PDF linearization failed for comic %s", comic_id)
+        finally:
+            db.session.remove()
+
+
+def maybe_linearize_pdf(comic_id: int, filename: str) -> None:
+    """
+    Post-upload stage, when enabled: build a fast-web-view copy of the
+    committed PDF on a background thread (qpdf can take minutes) and record
+    it on the comic once it verifies. `flask linearize-pdfs` picks up any
+    the thread didn't finish.
+    """
+    if not current_app.config.get("PDF_LINEARIZE"):
+        return
+    threading.Thread(
+        target=_linearize_in_background,
+        args=(current_app._get_current_object(), comic_id, filename),
+        name="pdf-linearize",
+        daemon=True,
+    ).start()
+
+
+# =====================================================
+# ADMIN LIST HELPERS (FILTER / SORT / SEARCH / PAGINATE)
+# =====================================================
+def parse_date(value: str):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+
+
+def prefix_filter(expr, prefix: str):
+    """
+    `expr LIKE 'prefix%'` written as a range so SQLite can walk the index.
+    """
+    return db.and_(expr >= prefix, expr < prefix + "\uffff")
+
+
+def apply_list_filters(query, model, sortable: dict, search_columns: list):
+    """
+    Shared ?q= (prefix search), ?from=/?to= (created_at, YYYY-MM-DD, inclusive)
+    and ?sort=/?order= handling for the admin list pages.
+    """
+    q = request.args.get("q", "").strip().lower()
+    if q:
+        query = query.filter(db.or_(*[prefix_filter(col, q) for col in search_columns]))
+
+    date_from = parse_date(request.args.get("from"))
+    if date_from:
+        query = query.filter(model.created_at >= date_from)
+    date_to = parse_date(request.args.get("to"))
+    if date_to:
+        query = query.filter(model.created_at < date_to + timedelta(days=1))
+
+    sort_column = sortable.get(request.args.get("sort"), model.created_at)
+    if request.args.get("order") == "asc":
+        return query.order_by(sort_column.asc(), model.id.asc())
+    return query.order_by(sort_column.desc(), model.id.desc())
+
+
+def paginate_list(query):
+    page = request.args.get("page", 1, type=int)
+    per_page = request.args.get("per_page", ADMIN_PER_PAGE, type=int)
+    per_page = max(1, min(per_page, ADMIN_MAX_PER_PAGE))
+    return query.paginate(page=page, per_page=per_page, error_out=False)
+
+
+@admin_bp.app_template_global()
+def admin_page_url(page: int) -> str:
+    """
+    Current admin list URL with the same filters, on another page.
+    """
+    args = request.args.to_dict()
+    args["page"] = page
+    return url_for(request.endpoint, **args)
+
+
+# =====================================================
+# ADMIN: DASHBOARD
+# =====================================================
+@admin_bp.route("/", methods=["GET"])
+@login_required
+def admin_dashboard():
+    return render_template("admin/dashboard.html", stats=site_stats())
+
+
 # =====================================================
 # ADMIN: CREATE COMIC
 # =====================================================
@@ -85,16 +205,22 @@ def admin_create_comic():
             flash("PDF file only (.pdf).", "danger")
             return redirect(url_for("admin.admin_create_comic"))
 
-        upload_dir = os.path.join(current_app.root_path, "static", "uploads", "pdfs")
-        os.makedirs(upload_dir, exist_ok=True)
-
         pdf_filename = secure_filename(pdf.filename)
-        save_path = os.path.join(upload_dir, pdf_filename)
-        pdf.save(save_path)
+        get_storage().save(pdf_key(pdf_filename), pdf.stream, "application/pdf")
 
-    comic = Comic(title=title, description=description, pdf_file=pdf_filename)
+    comic = Comic(
+        title=title,
+        description=description,
+        pdf_file=pdf_filename
+    )
     db.session.add(comic)
+    adjust("comics")
     db.session.commit()
+    object_cache.invalidate(COMIC, comic.id)
+    if pdf_filename:
+        object_cache.invalidate(PDF_FILE, pdf_filename)
+        maybe_linearize_pdf(comic.id, pdf_filename)
+    refresh_sitemaps(comic.id)
 
     flash("Comic created!", "success")
     return redirect(url_for("comics.comic_detail", comic_id=comic.id))
@@ -106,8 +232,22 @@ def admin_create_comic():
 @admin_bp.route("/comics", methods=["GET"])
 @login_required
 def admin_comics_list():
-    comics = Comic.query.order_by(Comic.created_at.desc()).all()
-    return render_template("admin/comics_list.html", comics=comics)
+    query = Comic.query.with_entities(*COMIC_ADMIN_COLUMNS)
+
+    has_pdf = request.args.get("has_pdf")
+    if has_pdf == "yes":
+        query = query.filter(Comic.pdf_file.isnot(None))
+    elif has_pdf == "no":
+        query = query.filter(Comic.pdf_file.is_(None))
+
+    query = apply_list_filters(
+        query,
+        Comic,
+        sortable={"created_at": Comic.created_at, "title": db.func.lower(Comic.title), "id": Comic.id},
+        search_columns=[db.func.lower(Comic.title)],
+    )
+    pagination = paginate_list(query)
+    return render_template("admin/comics_list.html", comics=pagination.items, pagination=pagination)
 
 
 # =====================================================
@@ -131,6 +271,7 @@ def admin_edit_comic(comic_id):
 
     comic.title = title
     comic.description = description
+    old_pdf = comic.pdf_file
 
     # Optional: replace PDF if a new one is uploaded
     if pdf and pdf.filename:
@@ -138,25 +279,35 @@ def admin_edit_comic(comic_id):
             flash("PDF file only (.pdf).", "danger")
             return redirect(url_for("admin.admin_edit_comic", comic_id=comic.id))
 
-        upload_dir = os.path.join(current_app.root_path, "static", "uploads", "pdfs")
-        os.makedirs(upload_dir, exist_ok=True)
-
+        storage = get_storage()
         new_filename = secure_filename(pdf.filename)
-        save_path = os.path.join(upload_dir, new_filename)
-        pdf.save(save_path)
+        storage.save(pdf_key(new_filename), pdf.stream, "application/pdf")
+
+        # The old fast-web-view copy is stale now, even if the name is unchanged
+        if comic.pdf_linearized_file:
+            try:
+                storage.delete(pdf_key(comic.pdf_linearized_file))
+            except Exception:
+                pass
 
         # Optional cleanup: delete old file if it's different
         if comic.pdf_file and comic.pdf_file != new_filename:
-            old_path = os.path.join(upload_dir, comic.pdf_file)
             try:
-                if os.path.exists(old_path):
-                    os.remove(old_path)
+                storage.delete(pdf_key(comic.pdf_file))
             except Exception:
                 pass
 
         comic.pdf_file = new_filename
+        comic.pdf_linearized_file = None
 
+    mark_changed()
     db.session.commit()
+    object_cache.invalidate(COMIC, comic.id)
+    if pdf and pdf.filename:
+        for stored in {old_pdf, comic.pdf_file} - {None}:
+            object_cache.invalidate(PDF_FILE, stored)
+        maybe_linearize_pdf(comic.id, comic.pdf_file)
+    refresh_sitemaps(comic.id)
     flash("Comic updated!", "success")
     return redirect(url_for("admin.admin_comics_list"))
 
@@ -169,18 +320,21 @@ def admin_edit_comic(comic_id):
 def admin_delete_comic(comic_id):
     comic = Comic.query.get_or_404(comic_id)
 
-    # Optional cleanup: remove PDF file
-    if comic.pdf_file:
-        upload_dir = os.path.join(current_app.root_path, "static", "uploads", "pdfs")
-        file_path = os.path.join(upload_dir, comic.pdf_file)
-        try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-        except Exception:
-            pass
+    # Remember the PDF (and its fast-web-view copy); removed once the delete commits
+    files = [
+        pdf_key(stored)
+        for stored in (comic.pdf_file, comic.pdf_linearized_file)
+        if stored
+    ]
 
-    db.session.delete(comic)
+    pdf_file = comic.pdf_file
+    delete_comic(comic.id)
     db.session.commit()
+    object_cache.invalidate(COMIC, comic.id)
+    if pdf_file:
+        object_cache.invalidate(PDF_FILE, pdf_file)
+    refresh_sitemaps(comic.id)
+    remove_files(files)
 
     flash("Comic deleted.", "warning")
     return redirect(url_for("admin.admin_comics_list"))
@@ -192,8 +346,26 @@ def admin_delete_comic(comic_id):
 @admin_bp.route("/characters", methods=["GET"])
 @login_required
 def admin_characters_list():
-    characters = Character.query.order_by(Character.created_at.desc()).all()
-    return render_template("admin/characters_list.html", characters=characters)
+    query = Character.query.with_entities(*CHARACTER_ADMIN_COLUMNS)
+
+    has_image = request.args.get("has_image")
+    if has_image == "yes":
+        query = query.filter(Character.image_file.isnot(None))
+    elif has_image == "no":
+        query = query.filter(Character.image_file.is_(None))
+
+    query = apply_list_filters(
+        query,
+        Character,
+        sortable={
+            "created_at": Character.created_at,
+            "name": db.func.lower(Character.superhero_name),
+            "id": Character.id,
+        },
+        search_columns=[db.func.lower(Character.superhero_name)],
+    )
+    pagination = paginate_list(query)
+    return render_template("admin/characters_list.html", characters=pagination.items, pagination=pagination)
 
 
 # =====================================================
@@ -230,7 +402,10 @@ def admin_create_character():
         image_file=image_filename
     )
     db.session.add(character)
+    adjust("characters")
     db.session.commit()
+    object_cache.invalidate(CHARACTER, character.id)
+    refresh_sitemaps()
 
     flash("Character created!", "success")
     return redirect(url_for("admin.admin_characters_list"))
@@ -272,18 +447,17 @@ def admin_edit_character(character_id):
 
         # Optional cleanup: delete old image file
         if character.image_file and character.image_file != new_filename:
-            old_path = os.path.join(
-                current_app.root_path, "static", "uploads", "characters", character.image_file
-            )
             try:
-                if os.path.exists(old_path):
-                    os.remove(old_path)
+                get_storage().delete(image_key(character.image_file))
             except Exception:
                 pass
 
         character.image_file = new_filename
 
+    mark_changed()
     db.session.commit()
+    object_cache.invalidate(CHARACTER, character.id)
+    refresh_sitemaps()
     flash("Character updated!", "success")
     return redirect(url_for("admin.admin_characters_list"))
 
@@ -296,19 +470,16 @@ def admin_edit_character(character_id):
 def admin_delete_character(character_id):
     character = Character.query.get_or_404(character_id)
 
-    # Optional cleanup: delete image from disk
+    # Image is removed from storage once the delete commits
+    files = []
     if character.image_file:
-        img_path = os.path.join(
-            current_app.root_path, "static", "uploads", "characters", character.image_file
-        )
-        try:
-            if os.path.exists(img_path):
-                os.remove(img_path)
-        except Exception:
-            pass
+        files.append(image_key(character.image_file))
 
-    db.session.delete(character)
+    delete_character(character.id)
     db.session.commit()
+    object_cache.invalidate(CHARACTER, character.id)
+    refresh_sitemaps()
+    remove_files(files)
 
     flash("Character deleted.", "warning")
     return redirect(url_for("admin.admin_characters_list"))
@@ -320,8 +491,20 @@ def admin_delete_character(character_id):
 @admin_bp.route("/users", methods=["GET"])
 @login_required
 def admin_users_list():
-    users = User.query.order_by(User.created_at.desc()).all()
-    return render_template("admin/users_list.html", users=users)
+    query = User.query.with_entities(*USER_ADMIN_COLUMNS)
+
+    role = request.args.get("role", "").strip().lower()
+    if role in ROLE_BITS:
+        query = query.filter(User.with_role(ROLE_BITS[role]))
+
+    query = apply_list_filters(
+        query,
+        User,
+        sortable={"created_at": User.created_at, "username": db.func.lower(User.username), "id": User.id},
+        search_columns=[db.func.lower(User.username), db.func.lower(User.email)],
+    )
+    pagination = paginate_list(query)
+    return render_template("admin/users_list.html", users=pagination.items, pagination=pagination)
 
 
 # =====================================================
@@ -363,6 +546,7 @@ def admin_create_user():
     user.set_password(password)
 
     db.session.add(user)
+    adjust("users")
     db.session.commit()
 
     flash("User created!", "success")
@@ -407,6 +591,8 @@ def admin_edit_user(user_id):
         flash("Username or email already in use.", "danger")
         return redirect(url_for("admin.admin_edit_user", user_id=user.id))
 
+    if username != user.username:
+        username_changed()
     user.username = username
     user.email = email
     user.roles = roles
@@ -414,7 +600,9 @@ def admin_edit_user(user_id):
     if password:
         user.set_password(password)
 
+    mark_changed()
     db.session.commit()
+    object_cache.invalidate(USER_NAME, user.id)
 
     flash("User updated!", "success")
     return redirect(url_for("admin.admin_users_list"))
@@ -428,8 +616,81 @@ def admin_edit_user(user_id):
 def admin_delete_user(user_id):
     user = User.query.get_or_404(user_id)
 
-    db.session.delete(user)
+    # Their comments and reading progress go too (bulk, same transaction)
+    delete_user(user.id)
     db.session.commit()
+    object_cache.invalidate(USER_NAME, user.id)
 
     flash("User deleted.", "warning")
     return redirect(url_for("admin.admin_users_list"))
+
+
+# =====================================================
+# ADMIN: SAMPLING PROFILER
+# =====================================================
+def profile_response(stacks, fmt: str, title: str):
+    if fmt == "collapsed":
+        response = current_app.response_class(collapsed_text(stacks), mimetype="text/plain")
+    else:
+        response = current_app.response_class(flamegraph_svg(stacks, title), mimetype="image/svg+xml")
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+@admin_bp.route("/profile", methods=["GET"])
+@login_required
+def admin_profile():
+    """
+    Sample this worker's threads for ?seconds=N (default 5) while it serves
+    traffic; ?format=svg (flame graph, default) or collapsed.
+    """
+    seconds = request.args.get("seconds", 5.0, type=float)
+    seconds = max(0.1, min(seconds, current_app.config["PROFILER_MAX_SECONDS"]))
+    interval_ms = max(1.0, min(request.args.get("interval_ms", 5.0, type=float), 100.0))
+    fmt = request.args.get("format", "svg")
+
+    sampler = sample_process(seconds, interval_ms / 1000)
+    if sampler is None:
+        return "A profile is already running in this worker.", 409
+
+    title = f"pid {os.getpid()}, {seconds:g}s at {interval_ms:g}ms"
+    return profile_response(sampler.stacks, fmt, title)
+
+
+@admin_bp.route("/profile/requests/<profile_id>", methods=["GET"])
+@login_required
+def admin_request_profile(profile_id):
+    stacks = load_request_profile(current_app.config["PROFILER_DIR"], profile_id)
+    if stacks is None:
+        abort(404)
+    return profile_response(stacks, request.args.get("format", "svg"), f"request {profile_id}")
+
+
+@admin_bp.before_app_request
+def start_request_profile():
+    """
+    Admin requests carrying the PROFILER_HEADER get their own sampler, bound
+    to the thread serving them. Streamed bodies finish after the response
+    hooks, so only the work done before the first byte is captured.
+    """
+    header = current_app.config.get("PROFILER_HEADER")
+    if not header or not request.headers.get(header):
+        return
+    if not current_user.is_authenticated or not current_user.is_admin:
+        return
+    interval = current_app.config["PROFILER_REQUEST_INTERVAL_MS"] / 1000
+    g.request_profiler = StackSampler(interval, thread_ids=[threading.get_ident()]).start()
+
+
+@admin_bp.after_app_request
+def finish_request_profile(response):
+    sampler = g.pop("request_profiler", None)
+    if sampler is None:
+        return response
+
+    stacks = sampler.stop()
+    profile_id = save_request_profile(current_app.config["PROFILER_DIR"], stacks)
+    response.headers["X-Profile-Id"] = profile_id
+    response.headers["X-Profile-Url"] = url_for("admin.admin_request_profile", profile_id=profile_id)
+    response.headers["Server-Timing"] = f"profile;dur={sampler.elapsed * 1000:.1f}"
+    return response
@@ -0,0 +1,208 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from flask import Blueprint, abort, current_app, jsonify, request
+
+try:
+    import orjson
+except ImportError:  # optional dependency, ~5x faster dumps
+    orjson = None
+
+from ..extensions import db
+from ..models.character import Character
+from ..models.comic import Comic
+from ..models.comment import Comment
+from ..models.user import User
+from ..services.object_cache import character_record, comic_record
+
+api_bp = Blueprint("api", __name__, url_prefix="/api/v1")
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# Columns each resource can expose, and the subset list calls get by default
+# (large Text columns are only sent when asked for with ?fields=).
+COMIC_FIELDS = {
+    "id": Comic.id,
+    "title": Comic.title,
+    "description": Comic.description,
+    "cover_image": Comic.cover_image,
+    "pdf_file": Comic.pdf_file,
+    "created_at": Comic.created_at,
+}
+COMIC_LIST_DEFAULT = ("id", "title", "cover_image", "pdf_file", "created_at")
+
+CHARACTER_FIELDS = {
+    "id": Character.id,
+    "superhero_name": Character.superhero_name,
+    "powers": Character.powers,
+    "weakness": Character.weakness,
+    "origins": Character.origins,
+    "image_file": Character.image_file,
+    "created_at": Character.created_at,
+    "updated_at": Character.updated_at,
+}
+CHARACTER_LIST_DEFAULT = ("id", "superhero_name", "image_file", "created_at")
+
+COMMENT_FIELDS = {
+    "id": Comment.id,
+    "body": Comment.body,
+    "created_at": Comment.created_at,
+    "comic_id": Comment.comic_id,
+    "user_id": Comment.user_id,
+    "author": User.username,
+}
+COMMENT_LIST_DEFAULT = ("id", "body", "created_at", "author")
+
+
+# =====================================================
+# HELPERS
+# =====================================================
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def json_response(payload, status=200):
+    """
+    Compact JSON with a content ETag; answers 304 when the client already has it.
+    """
+    if orjson is not None:
+        body = orjson.dumps(payload, default=_default)
+    else:
+        body = json.dumps(payload, default=_default, separators=(",", ":"), ensure_ascii=False)
+
+    response = current_app.response_class(body, status=status, mimetype="application/json")
+    if status == 200:
+        response.add_etag()
+        response.make_conditional(request)
+    return response
+
+
+def select_fields(available: dict, defaults: tuple):
+    """
+    Parse ?fields=a,b,c into an ordered list of field names. "id" is always included.
+    """
+    raw = request.args.get("fields", "").strip()
+    if not raw:
+        return list(defaults)
+
+    names = ["id"]
+    for name in (part.strip() for part in raw.split(",")):
+        if not name or name in names:
+            continue
+        if name not in available:
+            abort(400, description=f"Unknown field '{name}'.")
+        names.append(name)
+    return names
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        abort(400, description="Invalid cursor.")
+
+
+def page_params():
+    try:
+        limit = int(request.args.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        abort(400, description="limit must be an integer.")
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    cursor = request.args.get("cursor")
+    return limit, (decode_cursor(cursor) if cursor else None)
+
+
+def keyset_page(stmt, id_column, names, limit, after_id):
+    """
+    Newest-first keyset pagination on the primary key: no OFFSET scans,
+    and pages stay stable while new rows are inserted.
+    """
+    if after_id is not None:
+        stmt = stmt.where(id_column < after_id)
+    stmt = stmt.order_by(id_column.desc()).limit(limit + 1)
+
+    rows = db.session.execute(stmt).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    data = [dict(zip(names, row)) for row in rows]
+    next_cursor = encode_cursor(data[-1]["id"]) if has_more and data else None
+    return {"data": data, "next_cursor": next_cursor}
+
+
+# =====================================================
+# COMICS
+# =====================================================
+@api_bp.route("/comics")
+def api_comics():
+    names = select_fields(COMIC_FIELDS, COMIC_LIST_DEFAULT)
+    limit, after_id = page_params()
+    stmt = db.select(*[COMIC_FIELDS[n] for n in names])
+    return json_response(keyset_page(stmt, Comic.id, names, limit, after_id))
+
+
+@api_bp.route("/comics/<int:comic_id>")
+def api_comic(comic_id):
+    names = select_fields(COMIC_FIELDS, tuple(COMIC_FIELDS))
+    record = comic_record(comic_id)
+    if record is None:
+        abort(404)
+    return json_response({"data": {n: record[n] for n in names}})
+
+
+@api_bp.route("/comics/<int:comic_id>/comments")
+def api_comic_comments(comic_id):
+    if comic_record(comic_id) is None:
+        abort(404)
+
+    names = select_fields(COMMENT_FIELDS, COMMENT_LIST_DEFAULT)
+    limit, after_id = page_params()
+
+    # Author names come from the same query (JOIN), not one lookup per comment
+    stmt = (
+        db.select(*[COMMENT_FIELDS[n] for n in names])
+        .select_from(Comment)
+        .join(User, User.id == Comment.user_id)
+        .where(Comment.comic_id == comic_id)
+    )
+    return json_response(keyset_page(stmt, Comment.id, names, limit, after_id))
+
+
+# =====================================================
+# CHARACTERS
+# =====================================================
+@api_bp.route("/characters")
+def api_characters():
+    names = select_fields(CHARACTER_FIELDS, CHARACTER_LIST_DEFAULT)
+    limit, after_id = page_params()
+    stmt = db.select(*[CHARACTER_FIELDS[n] for n in names])
+    return json_response(keyset_page(stmt, Character.id, names, limit, after_id))
+
+
+@api_bp.route("/characters/<int:character_id>")
+def api_character(character_id):
+    names = select_fields(CHARACTER_FIELDS, tuple(CHARACTER_FIELDS))
+    record = character_record(character_id)
+    if record is None:
+        abort(404)
+    return json_response({"data": {n: record[n] for n in names}})
+
+
+# =====================================================
+# JSON ERRORS
+# =====================================================
+@api_bp.errorhandler(400)
+@api_bp.errorhandler(404)
+def api_error(error):
+    return jsonify({"error": error.name, "message": error.description}), error.code
@@ -3,11 +3,14 @@ from flask_login import current_user, login_required, login_user, logout_user
 
 from ..extensions import db
 from ..models.user import User
+from ..services.admission import admission
+from ..services.site_stats import adjust
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/auth")
 
 
 @auth_bp.route("/register", methods=["GET", "POST"])
+@admission("login", by="ip", methods=("POST",))
 def register():
     if current_user.is_authenticated:
         return redirect(url_for("main.home"))
@@ -43,6 +46,7 @@ def register():
     user = User(username=username, email=email, roles="user")
     user.set_password(password)
     db.session.add(user)
+    adjust("users")
     db.session.commit()
 
     login_user(user)
@@ -51,6 +55,7 @@ def register():
 
 
 @auth_bp.route("/login", methods=["GET", "POST"])
+@admission("login", by="ip", methods=("POST",))
 def login():
     if current_user.is_authenticated:
         return redirect(url_for("main.home"))
@@ -1,9 +1,21 @@
-from flask import Blueprint, render_template
-from ..models.character import Character
+from flask import Blueprint, abort
+from ..services.list_queries import character_cards
+from ..services.page_stream import stream_page
+from ..services.storage import image_key, send_blob
 
 characters_bp = Blueprint("characters", __name__, url_prefix="/characters")
 
 @characters_bp.route("/")
 def list_characters():
-    characters = Character.query.order_by(Character.created_at.desc()).all()
-    return render_template("characters/list.html", characters=characters)
+    return stream_page("characters/list.html", characters=character_cards())
+
+
+@characters_bp.route("/image/<path:filename>")
+def character_image(filename):
+    key = image_key(filename)
+    if not key:
+        abort(404)
+    response = send_blob(key)
+    if response is None:
+        abort(404)
+    return response
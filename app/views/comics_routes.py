@@ -1,10 +1,21 @@
-from flask import Blueprint, render_template, abort, current_app, send_from_directory, request, flash, redirect, url_for
+from flask import Blueprint, render_template, abort, current_app, send_from_directory, request, flash, redirect, url_for, jsonify, Response
 from flask_login import login_required, current_user
-from werkzeug.utils import safe_join
 from ..extensions import db
 from ..models.comic import Comic
 from ..models.comment import Comment
+from ..services.admission import admission
+from ..services.analytics import count
+from ..services.comment_feed import comment_broker, comments_after, serialize_comment
+from ..services.list_queries import comic_cards, comment_rows
+from ..services.object_cache import comic_record, get_comic_or_404, pdf_record
+from ..services.page_stream import stream_page
+from ..services.rankings import top_comics
+from ..services.reading_progress import get_progress, record_progress
+from ..services.site_stats import adjust, username_changes
+from ..services.storage import pdf_key, send_blob
+import json
 import os
+import time
 
 comics_bp = Blueprint("comics", __name__)
 
@@ -14,8 +25,12 @@ comics_bp = Blueprint("comics", __name__)
 # =====================================================
 @comics_bp.route("/")
 def list_comics():
-    comics = Comic.query.order_by(Comic.created_at.desc()).all()
-    return render_template("comics/list.html", comics=comics)
+    return render_template(
+        "comics/list.html",
+        comics=comic_cards(),
+        trending=top_comics("trending"),
+        discussed=top_comics("discussed")
+    )
 
 
 # =====================================================
@@ -23,9 +38,9 @@ def list_comics():
 # =====================================================
 @comics_bp.route("/<int:comic_id>")
 def comic_detail(comic_id):
-    comic = Comic.query.get_or_404(comic_id)
-    comments = Comment.query.filter_by(comic_id=comic.id).order_by(Comment.created_at.desc()).all()
-    return render_template("comics/detail.html", comic=comic, comments=comments)
+    comic = get_comic_or_404(comic_id)
+    count(current_app._get_current_object(), comic.id, "views")
+    return stream_page("comics/detail.html", comic=comic, comments=comment_rows(comic.id))
 
 
 # =====================================================
@@ -33,18 +48,23 @@ def comic_detail(comic_id):
 # =====================================================
 @comics_bp.route("/read/<int:comic_id>")
 def comic_reader(comic_id):
-    comic = Comic.query.get_or_404(comic_id)
-    comments = Comment.query.filter_by(comic_id=comic.id).order_by(Comment.created_at.desc()).all()
+    comic = get_comic_or_404(comic_id)
 
     # DB stores only the filename (e.g. "issue_1.pdf")
     if not comic.pdf_file or not comic.pdf_file.lower().endswith(".pdf"):
         abort(404)
 
-    return render_template(
+    count(current_app._get_current_object(), comic.id, "reads")
+
+    start_page = None
+    if current_user.is_authenticated:
+        start_page = get_progress(current_user.id, comic.id)
+
+    return stream_page(
         "comics/reader.html",
         comic=comic,
-        comments=comments,
-        pdf_file=comic.pdf_file
+        pdf_file=comic.pdf_file,
+        start_page=start_page or 1
     )
 
 
@@ -52,24 +72,69 @@ def comic_reader(comic_id):
 # SECURE PDF SERVING (USED BY PDF.js)
 # =====================================================
 @comics_bp.route("/pdf/<path:filename>")
+@admission("pdf")
 def serve_pdf(filename):
     # Only allow PDFs
     if not filename.lower().endswith(".pdf"):
         abort(404)
 
-    # Flask knows exactly where /static lives
-    # This resolves to: app/static
-    static_root = current_app.static_folder
+    key = pdf_key(filename)
+    if not key:
+        abort(404)
 
-    # Your PDFs live here: app/static/uploads/pdfs
-    pdf_dir = os.path.join(static_root, "uploads", "pdfs")
+    comic = pdf_record(filename)
 
-    # Resolve the final path safely
-    full_path = safe_join(pdf_dir, filename)
-    if not full_path or not os.path.isfile(full_path):
+    # Prefer the linearized copy so PDF.js can render page 1 from the first range.
+    # Local storage streams from disk; S3 redirects to a presigned URL or proxies ranges.
+    response = None
+    if comic and comic["pdf_linearized_file"]:
+        response = send_blob(pdf_key(comic["pdf_linearized_file"]), "application/pdf")
+    if response is None:
+        response = send_blob(key, "application/pdf")
+    if response is None:
         abort(404)
 
-    return send_from_directory(pdf_dir, filename)
+    # PDF.js fetches in ranges; count a download once, on the request for byte 0
+    range_header = request.headers.get("Range", "")
+    if comic and (not range_header or range_header.startswith("bytes=0-")):
+        count(current_app._get_current_object(), comic["id"], "downloads")
+
+    return response
+
+
+# =====================================================
+# READING PROGRESS (DEBOUNCED BY THE READER, COALESCED HERE)
+# =====================================================
+@comics_bp.route("/<int:comic_id>/progress", methods=["POST"])
+@login_required
+def save_progress(comic_id):
+    data = request.get_json(silent=True) or request.form
+    if not isinstance(data, dict):  # e.g. a JSON array
+        abort(400)
+    try:
+        page = int(data.get("page", 0))
+    except (TypeError, ValueError):
+        page = 0
+    if page < 1:
+        abort(400)
+    if comic_record(comic_id) is None:
+        abort(404)
+
+    # Buffered in memory and flushed in batches; no DB write on this request
+    record_progress(current_app._get_current_object(), current_user.id, comic_id, page)
+    return "", 204
+
+
+# =====================================================
+# READER SERVICE WORKER (CACHES PDF BYTES)
+# =====================================================
+@comics_bp.route("/reader-sw.js")
+def reader_service_worker():
+    # Served under /comics/ (not /static/) so the worker's scope covers /comics/pdf/
+    js_dir = os.path.join(current_app.static_folder, "js")
+    response = send_from_directory(js_dir, "reader_sw.js", mimetype="text/javascript", max_age=0)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
 
 
 # =====================================================
@@ -77,8 +142,9 @@ def serve_pdf(filename):
 # =====================================================
 @comics_bp.route("/<int:comic_id>/comments", methods=["POST"])
 @login_required
+@admission("comment")
 def add_comment(comic_id):
-    comic = Comic.query.get_or_404(comic_id)
+    comic = get_comic_or_404(comic_id)
     body = request.form.get("comment", "").strip()
     redirect_target = request.form.get("next") or url_for("comics.comic_detail", comic_id=comic.id)
 
@@ -88,7 +154,117 @@ def add_comment(comic_id):
 
     comment = Comment(body=body, comic_id=comic.id, user_id=current_user.id)
     db.session.add(comment)
+    adjust("comments")
     db.session.commit()
 
+    # Push to readers connected to this worker right away
+    comment_broker.publish(
+        comic.id,
+        serialize_comment(comment.id, comment.body, comment.created_at, current_user.username)
+    )
+
     flash("Comment added!", "success")
     return redirect(redirect_target)
+
+
+# =====================================================
+# COMMENT LIST FRAGMENT (LOADED BY THE READER AFTER PAGE 1)
+# =====================================================
+@comics_bp.route("/<int:comic_id>/comments/fragment")
+def comments_fragment(comic_id):
+    if comic_record(comic_id) is None:
+        abort(404)
+
+    # (newest id, count) changes on every add/delete and the rename counter on
+    # any username change, so together they are the validator; a revalidation
+    # is one query answered from ix_comments_comic_id_created_at_id, no rendering
+    last_id, total, renames = db.session.execute(
+        db.select(db.func.coalesce(db.func.max(Comment.id), 0), db.func.count(Comment.id), username_changes())
+        .where(Comment.comic_id == comic_id)
+    ).one()
+    etag = f"comments-{comic_id}-{last_id}-{total}-{renames}"
+
+    # Same for every visitor; a slightly stale copy is fine because the live
+    # feed resumes from data-last-id and fills in anything newer
+    max_age = current_app.config["COMMENT_FRAGMENT_MAX_AGE"]
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(render_template(
+            "comics/_comment_list.html",
+            comments=comment_rows(comic_id),
+            last_id=last_id
+        ))
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response
+
+
+# =====================================================
+# LIVE COMMENTS: INCREMENTAL / LONG-POLL
+# =====================================================
+@comics_bp.route("/<int:comic_id>/comments/since")
+def comments_since(comic_id):
+    if comic_record(comic_id) is None:
+        abort(404)
+
+    after_id = request.args.get("after", 0, type=int)
+    wait = max(0, min(request.args.get("wait", 0, type=int), current_app.config["COMMENT_FEED_LONG_POLL_SECONDS"]))
+
+    comments = comments_after(comic_id, after_id)
+    if not comments and wait:
+        # Park on the in-process broker; don't hold a DB connection meanwhile
+        db.session.remove()
+        comment_broker.ensure_sync(current_app._get_current_object())
+        comments = comment_broker.poll(comic_id, after_id, wait, current_app.config["COMMENT_FEED_MAX_POLLS"])
+        if comments is None:
+            # Enough readers parked on this worker already; the client backs off
+            return current_app.response_class(status=204)
+
+    return jsonify(comments=comments)
+
+
+# =====================================================
+# LIVE COMMENTS: SERVER-SENT EVENTS
+# =====================================================
+@comics_bp.route("/<int:comic_id>/comments/stream")
+def comments_stream(comic_id):
+    # Off unless served by gevent workers; readers long-poll comments/since instead
+    if not current_app.config.get("COMMENT_FEED_SSE") or comic_record(comic_id) is None:
+        abort(404)
+
+    after_id = request.headers.get("Last-Event-ID", type=int) or request.args.get("after", 0, type=int)
+    backlog = comments_after(comic_id, after_id)
+    db.session.remove()
+
+    config = current_app.config
+    lifetime = config["COMMENT_FEED_STREAM_SECONDS"]
+    keepalive = config["COMMENT_FEED_KEEPALIVE_SECONDS"]
+    comment_broker.ensure_sync(current_app._get_current_object())
+
+    def event(payload):
+        return f"id: {payload['id']}\nevent: comment\ndata: {json.dumps(payload)}\n\n"
+
+    def generate():
+        # Streams end after `lifetime`; EventSource reconnects with Last-Event-ID
+        yield "retry: 3000\n\n"
+        seen = set()
+        for payload in backlog:
+            seen.add(payload["id"])
+            yield event(payload)
+
+        deadline = time.monotonic() + lifetime
+        while time.monotonic() < deadline:
+            events = comment_broker.wait_for(comic_id, after_id, keepalive, seen)
+            if not events:
+                yield ": keepalive\n\n"
+                continue
+            for payload in events:
+                seen.add(payload["id"])
+                yield event(payload)
+
+    response = Response(generate(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
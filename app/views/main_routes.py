@@ -1,7 +1,55 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, abort, current_app, render_template, send_file
+from ..services.rankings import top_comics
+from ..services.site_stats import site_stats
+from ..services.sitemaps import FEED, INDEX, sitemap_path, sitemap_url
 
 main_bp = Blueprint("main", __name__)
 
 @main_bp.route("/")
 def home():
-    return render_template("main/home.html")
+    return render_template(
+        "main/home.html",
+        trending=top_comics("trending", limit=3),
+        discussed=top_comics("discussed", limit=3),
+        stats=site_stats()
+    )
+
+
+# =====================================================
+# SITEMAPS + FEED (PREBUILT FILES, STREAMED FROM DISK)
+# =====================================================
+def send_generated(name: str, mimetype: str):
+    path = sitemap_path(name)
+    if path is None:
+        abort(404)
+    # ETag/Last-Modified come from the file, which is only rewritten when its content changes
+    return send_file(
+        path,
+        mimetype=mimetype,
+        conditional=True,
+        max_age=current_app.config["SITEMAP_CACHE_SECONDS"],
+    )
+
+
+@main_bp.route("/sitemap.xml")
+def sitemap_index():
+    return send_generated(INDEX, "application/xml")
+
+
+@main_bp.route("/sitemaps/<name>")
+def sitemap_file(name):
+    return send_generated(name, "application/xml")
+
+
+@main_bp.route("/feed.atom")
+def comics_feed():
+    return send_generated(FEED, "application/atom+xml")
+
+
+@main_bp.route("/robots.txt")
+def robots_txt():
+    body = "User-agent: *\nDisallow: /admin/\n"
+    sitemap = sitemap_url()
+    if sitemap:
+        body += f"Sitemap: {sitemap}\n"
+    return current_app.response_class(body, mimetype="text/plain")
@@ -9,3 +9,134 @@ class Config:
         "sqlite:///" + os.path.join(BASE_DIR, "instance", "app.db")
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Rewrite uploaded PDFs into linearized (fast-web-view) form on a background thread
+    # after the upload commits. Off by default: run `flask linearize-pdfs` (e.g. from cron)
+    # instead. Needs pikepdf or the qpdf binary; silently skipped when neither is installed.
+    PDF_LINEARIZE = os.getenv("PDF_LINEARIZE", "0") == "1"
+
+    # Blob storage for PDFs and character images: "local" (app/static/uploads) or
+    # "s3" (any S3-compatible endpoint, needs boto3) so several app nodes share files
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+    LOCAL_STORAGE_ROOT = os.getenv("LOCAL_STORAGE_ROOT") or None
+    S3_BUCKET = os.getenv("S3_BUCKET", "ismaverse")
+    S3_PREFIX = os.getenv("S3_PREFIX", "uploads")
+    S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None  # e.g. http://minio:9000
+    S3_REGION = os.getenv("S3_REGION") or None
+    S3_PUBLIC_URL = os.getenv("S3_PUBLIC_URL") or None  # CDN / public bucket base for images
+    STORAGE_PRESIGN_SECONDS = int(os.getenv("STORAGE_PRESIGN_SECONDS", "300"))
+    # Redirect PDF requests to presigned URLs (bucket needs CORS for Range) instead of proxying
+    STORAGE_REDIRECT = os.getenv("STORAGE_REDIRECT", "1") == "1"
+    # Let the front proxy stream local uploads: "" (Flask streams), "x-accel" (nginx) or
+    # "x-sendfile" (Apache/lighttpd). For nginx, map X_ACCEL_LOCATION to the uploads dir:
+    #   location /_uploads/ { internal; alias /srv/ismaverse/app/static/uploads/; }
+    STORAGE_OFFLOAD = os.getenv("STORAGE_OFFLOAD", "")
+    X_ACCEL_LOCATION = os.getenv("X_ACCEL_LOCATION", "/_uploads")
+    STORAGE_OFFLOAD_MAX_AGE = int(os.getenv("STORAGE_OFFLOAD_MAX_AGE", "3600"))
+
+    # Proxies in front of the app that append to X-Forwarded-For (1 for a single nginx).
+    # With 0 the header is ignored and remote_addr is the proxy, so every anonymous
+    # visitor shares one admission bucket; only trust as many hops as you run.
+    PROXY_FIX_X_FOR = int(os.getenv("PROXY_FIX_X_FOR", "0"))
+
+    # Production server (`flask serve`). Empty values fall back to CPU-based defaults.
+    SERVER_BIND = os.getenv("SERVER_BIND", "0.0.0.0:8000")
+    SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "0"))
+    SERVER_THREADS = int(os.getenv("SERVER_THREADS", "0"))
+    SERVER_WORKER_CLASS = os.getenv("SERVER_WORKER_CLASS", "gthread")
+    SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", "2000"))
+    SERVER_MAX_REQUESTS_JITTER = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "200"))
+    SERVER_TIMEOUT = int(os.getenv("SERVER_TIMEOUT", "60"))
+    SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+
+    # Cold start: compiled Jinja templates survive restarts/worker recycling,
+    # and WARMUP_ON_START compiles every template + configures mappers in create_app
+    # (before `flask serve` forks, so workers start warm).
+    JINJA_BYTECODE_CACHE_DIR = os.getenv("JINJA_BYTECODE_CACHE_DIR", os.path.join(BASE_DIR, "instance", "jinja_cache"))
+    WARMUP_ON_START = os.getenv("WARMUP_ON_START", "0") == "1"
+    STARTUP_REPORT = os.getenv("STARTUP_REPORT", "0") == "1"
+
+    # Sampling profiler (admins only): GET /admin/profile samples this worker for N seconds;
+    # a request sent with PROFILER_HEADER set is profiled alone and its stacks saved here.
+    PROFILER_HEADER = os.getenv("PROFILER_HEADER", "X-Profile")
+    PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "30"))
+    PROFILER_REQUEST_INTERVAL_MS = float(os.getenv("PROFILER_REQUEST_INTERVAL_MS", "1"))
+    PROFILER_DIR = os.getenv("PROFILER_DIR", os.path.join(BASE_DIR, "instance", "profiles"))
+
+    # `flask snapshot` / `flask restore`: archives go here by default, and each new
+    # snapshot only copies uploads that changed since the newest one in this directory.
+    SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(BASE_DIR, "instance", "snapshots"))
+
+    # Live comment feed (SSE + long-poll). Each open stream parks on an in-process
+    # broker; one sync query per worker picks up comments posted elsewhere.
+    # SSE holds a request slot for COMMENT_FEED_STREAM_SECONDS, so it is only on
+    # under SERVER_WORKER_CLASS=gevent; gthread workers fall back to long-polling.
+    COMMENT_FEED_SSE = os.getenv("COMMENT_FEED_SSE", "1" if SERVER_WORKER_CLASS == "gevent" else "0") == "1"
+    COMMENT_FEED_SYNC_SECONDS = float(os.getenv("COMMENT_FEED_SYNC_SECONDS", "2"))
+    COMMENT_FEED_STREAM_SECONDS = int(os.getenv("COMMENT_FEED_STREAM_SECONDS", "300"))
+    COMMENT_FEED_KEEPALIVE_SECONDS = int(os.getenv("COMMENT_FEED_KEEPALIVE_SECONDS", "15"))
+    COMMENT_FEED_LONG_POLL_SECONDS = int(os.getenv("COMMENT_FEED_LONG_POLL_SECONDS", "25"))
+    # Long-polls parked per worker process at once; each holds a thread, so keep this
+    # below SERVER_THREADS. Past it, comments/since answers 204 and the reader backs off.
+    COMMENT_FEED_MAX_POLLS = int(os.getenv("COMMENT_FEED_MAX_POLLS", "2"))
+    COMMENT_FRAGMENT_MAX_AGE = int(os.getenv("COMMENT_FRAGMENT_MAX_AGE", "10"))  # reader's comment list
+
+    # Comic detail/reader and the character list are sent while they render: the
+    # <head> goes out first, then STREAM_FLUSH_BYTES chunks. Set STREAM_TEMPLATES=0 to
+    # render whole pages first (e.g. behind a proxy that buffers responses anyway).
+    STREAM_TEMPLATES = os.getenv("STREAM_TEMPLATES", "1") == "1"
+    STREAM_FLUSH_BYTES = int(os.getenv("STREAM_FLUSH_BYTES", "8192"))
+
+    # Reading positions are buffered per worker and upserted in batches.
+    READING_PROGRESS_FLUSH_SECONDS = float(os.getenv("READING_PROGRESS_FLUSH_SECONDS", "10"))
+
+    # View/read/download counters are aggregated per worker and flushed in one transaction.
+    ANALYTICS_FLUSH_SECONDS = float(os.getenv("ANALYTICS_FLUSH_SECONDS", "30"))
+
+    # Trending / most discussed rankings. Set RANKINGS_REFRESH_SECONDS=0 to refresh
+    # only from cron (`flask refresh-rankings`).
+    RANKINGS_REFRESH_SECONDS = float(os.getenv("RANKINGS_REFRESH_SECONDS", "300"))
+    RANKINGS_TRENDING_HALF_LIFE_HOURS = float(os.getenv("RANKINGS_TRENDING_HALF_LIFE_HOURS", "48"))
+    RANKINGS_DISCUSSION_HALF_LIFE_HOURS = float(os.getenv("RANKINGS_DISCUSSION_HALF_LIFE_HOURS", "336"))
+
+    # Site-wide counts (users, comics, characters, comments) are kept in site_stats by
+    # the write paths; a job resets them from COUNT(*) this often (0 = cron only,
+    # `flask reconcile-stats`). SITE_STATS_NEWEST is the length of the "newest" lists.
+    SITE_STATS_RECONCILE_SECONDS = float(os.getenv("SITE_STATS_RECONCILE_SECONDS", "3600"))
+    SITE_STATS_NEWEST = int(os.getenv("SITE_STATS_NEWEST", "5"))
+
+    # /sitemap.xml (index of 50k-URL shards) and /feed.atom are prebuilt into SITEMAP_DIR:
+    # admin edits rewrite the affected files, and a request rebuilds all of them once
+    # they are older than SITEMAP_REBUILD_SECONDS (0 = only on edits / `flask build-sitemaps`).
+    # SITE_URL (e.g. https://ismaverse.example) is the host written into them (SERVER_NAME
+    # works too); with neither set they aren't built and the routes return 404.
+    SITE_URL = os.getenv("SITE_URL") or None
+    SITEMAP_DIR = os.getenv("SITEMAP_DIR", os.path.join(BASE_DIR, "instance", "sitemaps"))
+    SITEMAP_REBUILD_SECONDS = float(os.getenv("SITEMAP_REBUILD_SECONDS", "3600"))
+    SITEMAP_CACHE_SECONDS = int(os.getenv("SITEMAP_CACHE_SECONDS", "300"))
+    SITEMAP_FEED_ENTRIES = int(os.getenv("SITEMAP_FEED_ENTRIES", "30"))
+
+    # Object cache for hot lookups (comics, characters, author names). The in-process
+    # tier's TTL bounds how stale other workers can be after an admin edit; the optional
+    # shared tier (any Redis-protocol server) is versioned and invalidated on write.
+    CACHE_LOCAL_SIZE = int(os.getenv("CACHE_LOCAL_SIZE", "2048"))
+    CACHE_LOCAL_TTL_SECONDS = float(os.getenv("CACHE_LOCAL_TTL_SECONDS", "5"))
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL") or None  # e.g. redis://localhost:6379/0
+    CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "ismaverse")
+    CACHE_SHARED_TTL_SECONDS = int(os.getenv("CACHE_SHARED_TTL_SECONDS", "300"))
+    CACHE_NEGATIVE_TTL_SECONDS = int(os.getenv("CACHE_NEGATIVE_TTL_SECONDS", "30"))
+    CACHE_LOCK_MS = int(os.getenv("CACHE_LOCK_MS", "2000"))  # single-flight wait on a miss
+
+    # Admission control: per-client token bucket + in-flight cap per endpoint group
+    # ("rate=N/s|m|h burst=N concurrency=N"; omit a part to leave it unlimited).
+    # Clients are users when logged in, otherwise IPs (set PROXY_FIX_X_FOR behind a proxy).
+    # The memory backend is per worker; "redis" shares limits across workers/hosts.
+    ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+    ADMISSION_BACKEND = os.getenv("ADMISSION_BACKEND", "memory")
+    ADMISSION_REDIS_URL = os.getenv("ADMISSION_REDIS_URL") or None  # defaults to CACHE_REDIS_URL
+    ADMISSION_POLICIES = {
+        # PDF.js reads in 64KB ranges, so a normal reader needs a generous burst
+        "pdf": os.getenv("ADMISSION_PDF", "rate=60/s burst=600 concurrency=8"),
+        "login": os.getenv("ADMISSION_LOGIN", "rate=10/m burst=10 concurrency=2"),
+        "comment": os.getenv("ADMISSION_COMMENT", "rate=6/m burst=5 concurrency=2"),
+    }
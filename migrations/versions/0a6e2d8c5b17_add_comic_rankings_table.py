@@ -0,0 +1,40 @@
+"""add comic_rankings table
+
+Revision ID: 0a6e2d8c5b17
+Revises: f9d04c2b7a63
+Create Date: 2026-10-19 14:30:14.662957
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a6e2d8c5b17'
+down_revision = 'f9d04c2b7a63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('comic_rankings',
+    sa.Column('comic_id', sa.Integer(), nullable=False),
+    sa.Column('trending_score', sa.Float(), nullable=False),
+    sa.Column('discussion_score', sa.Float(), nullable=False),
+    sa.Column('views_seen', sa.Integer(), nullable=False),
+    sa.Column('reads_seen', sa.Integer(), nullable=False),
+    sa.Column('downloads_seen', sa.Integer(), nullable=False),
+    sa.Column('last_comment_id', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['comic_id'], ['comics.id'], ),
+    sa.PrimaryKeyConstraint('comic_id')
+    )
+    op.create_index('ix_comic_rankings_trending_score', 'comic_rankings', ['trending_score'], unique=False)
+    op.create_index('ix_comic_rankings_discussion_score', 'comic_rankings', ['discussion_score'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_comic_rankings_discussion_score', table_name='comic_rankings')
+    op.drop_index('ix_comic_rankings_trending_score', table_name='comic_rankings')
+    op.drop_table('comic_rankings')
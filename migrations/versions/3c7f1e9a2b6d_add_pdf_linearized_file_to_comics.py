@@ -0,0 +1,26 @@
+"""add pdf_linearized_file to comics
+
+Revision ID: 3c7f1e9a2b6d
+Revises: 5204eb624acb
+Create Date: 2026-10-19 10:02:11.418220
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c7f1e9a2b6d'
+down_revision = '5204eb624acb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('comics', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('pdf_linearized_file', sa.String(length=255), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('comics', schema=None) as batch_op:
+        batch_op.drop_column('pdf_linearized_file')
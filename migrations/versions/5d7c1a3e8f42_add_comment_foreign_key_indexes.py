@@ -0,0 +1,29 @@
+"""add comment and reading_progress foreign-key indexes
+
+Revision ID: 5d7c1a3e8f42
+Revises: 0a6e2d8c5b17
+Create Date: 2026-10-19 15:02:40.218835
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d7c1a3e8f42'
+down_revision = '0a6e2d8c5b17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # created_at indexes on comics / characters / users came with c41a8e07d2b3
+    op.create_index('ix_comments_comic_id_created_at_id', 'comments', ['comic_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_comments_user_id', 'comments', ['user_id'], unique=False)
+    op.create_index('ix_reading_progress_comic_id', 'reading_progress', ['comic_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_reading_progress_comic_id', table_name='reading_progress')
+    op.drop_index('ix_comments_user_id', table_name='comments')
+    op.drop_index('ix_comments_comic_id_created_at_id', table_name='comments')
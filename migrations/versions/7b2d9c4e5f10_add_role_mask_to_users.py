@@ -0,0 +1,46 @@
+"""add role_mask to users
+
+Revision ID: 7b2d9c4e5f10
+Revises: 3c7f1e9a2b6d
+Create Date: 2026-10-19 11:20:45.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b2d9c4e5f10'
+down_revision = '3c7f1e9a2b6d'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of app.models.user.ROLE_BITS at the time of this migration
+ROLE_BITS = {"user": 1, "admin": 2}
+
+users = sa.table(
+    'users',
+    sa.column('id', sa.Integer),
+    sa.column('roles', sa.String),
+    sa.column('role_mask', sa.Integer),
+)
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('role_mask', sa.Integer(), nullable=False, server_default='1'))
+        batch_op.create_index(batch_op.f('ix_users_role_mask'), ['role_mask'], unique=False)
+
+    # Convert the existing comma-separated strings
+    bind = op.get_bind()
+    for user_id, roles in bind.execute(sa.select(users.c.id, users.c.roles)).all():
+        mask = 0
+        for role in (roles or "").split(","):
+            mask |= ROLE_BITS.get(role.strip(), 0)
+        bind.execute(users.update().where(users.c.id == user_id).values(role_mask=mask))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_role_mask'))
+        batch_op.drop_column('role_mask')
@@ -0,0 +1,31 @@
+"""add site_stats table
+
+Revision ID: 8f3b6d2a9c14
+Revises: 5d7c1a3e8f42
+Create Date: 2026-10-19 17:05:12.409117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f3b6d2a9c14'
+down_revision = '5d7c1a3e8f42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('site_stats',
+    sa.Column('name', sa.String(length=40), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Seed from the current tables; the app keeps them up to date from here
+    for name, table in (('users', 'users'), ('comics', 'comics'), ('characters', 'characters'), ('comments', 'comments')):
+        op.execute(f"INSERT INTO site_stats (name, value) SELECT '{name}', COUNT(*) FROM {table}")
+
+
+def downgrade():
+    op.drop_table('site_stats')
@@ -0,0 +1,24 @@
+"""add lower(email) index to users
+
+Revision ID: a3e5c9d71f20
+Revises: 8f3b6d2a9c14
+Create Date: 2026-10-19 18:02:44.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3e5c9d71f20'
+down_revision = '8f3b6d2a9c14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_users_email_lower', table_name='users')
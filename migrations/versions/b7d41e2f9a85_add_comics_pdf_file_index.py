@@ -0,0 +1,24 @@
+"""add pdf_file index to comics
+
+Revision ID: b7d41e2f9a85
+Revises: a3e5c9d71f20
+Create Date: 2026-10-19 18:31:09.274410
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d41e2f9a85'
+down_revision = 'a3e5c9d71f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_comics_pdf_file'), 'comics', ['pdf_file'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_comics_pdf_file'), table_name='comics')
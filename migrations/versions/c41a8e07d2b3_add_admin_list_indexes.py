@@ -0,0 +1,34 @@
+"""add created_at and lower(name) indexes for admin lists
+
+Revision ID: c41a8e07d2b3
+Revises: 7b2d9c4e5f10
+Create Date: 2026-10-19 12:05:31.770412
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41a8e07d2b3'
+down_revision = '7b2d9c4e5f10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_comics_created_at', 'comics', ['created_at'], unique=False)
+    op.create_index('ix_comics_title_lower', 'comics', [sa.text('lower(title)')], unique=False)
+    op.create_index('ix_characters_created_at', 'characters', ['created_at'], unique=False)
+    op.create_index('ix_characters_superhero_name_lower', 'characters', [sa.text('lower(superhero_name)')], unique=False)
+    op.create_index('ix_users_created_at', 'users', ['created_at'], unique=False)
+    op.create_index('ix_users_username_lower', 'users', [sa.text('lower(username)')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_users_username_lower', table_name='users')
+    op.drop_index('ix_users_created_at', table_name='users')
+    op.drop_index('ix_characters_superhero_name_lower', table_name='characters')
+    op.drop_index('ix_characters_created_at', table_name='characters')
+    op.drop_index('ix_comics_title_lower', table_name='comics')
+    op.drop_index('ix_comics_created_at', table_name='comics')
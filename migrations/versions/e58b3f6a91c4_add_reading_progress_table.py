@@ -0,0 +1,32 @@
+"""add reading_progress table
+
+Revision ID: e58b3f6a91c4
+Revises: c41a8e07d2b3
+Create Date: 2026-10-19 13:12:08.530691
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e58b3f6a91c4'
+down_revision = 'c41a8e07d2b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('reading_progress',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('comic_id', sa.Integer(), nullable=False),
+    sa.Column('page', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['comic_id'], ['comics.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'comic_id')
+    )
+
+
+def downgrade():
+    op.drop_table('reading_progress')
@@ -0,0 +1,43 @@
+"""add comic_stats and comic_daily_stats tables
+
+Revision ID: f9d04c2b7a63
+Revises: e58b3f6a91c4
+Create Date: 2026-10-19 13:48:57.104263
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f9d04c2b7a63'
+down_revision = 'e58b3f6a91c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('comic_stats',
+    sa.Column('comic_id', sa.Integer(), nullable=False),
+    sa.Column('views', sa.Integer(), nullable=False),
+    sa.Column('reads', sa.Integer(), nullable=False),
+    sa.Column('downloads', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['comic_id'], ['comics.id'], ),
+    sa.PrimaryKeyConstraint('comic_id')
+    )
+    op.create_table('comic_daily_stats',
+    sa.Column('comic_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('views', sa.Integer(), nullable=False),
+    sa.Column('reads', sa.Integer(), nullable=False),
+    sa.Column('downloads', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['comic_id'], ['comics.id'], ),
+    sa.PrimaryKeyConstraint('comic_id', 'day')
+    )
+    op.create_index('ix_comic_daily_stats_day', 'comic_daily_stats', ['day'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_comic_daily_stats_day', table_name='comic_daily_stats')
+    op.drop_table('comic_daily_stats')
+    op.drop_table('comic_stats')
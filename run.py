@@ -1,6 +1,9 @@
+import os
+
 from app import create_app
 
 app = create_app()
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    # Development server only. In production use: flask --app run serve
+    app.run(debug=os.getenv("FLASK_DEBUG", "1") == "1")
@@ -0,0 +1,51 @@
+import pytest
+
+from app import create_app
+from app.extensions import db
+from app.models.comic import Comic
+from app.models.user import User
+from config import Config
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # Config reads the environment at import time, so point it at a scratch
+    # database and upload/sitemap directories before the app is built
+    monkeypatch.setattr(Config, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'app.db'}")
+    monkeypatch.setattr(Config, "LOCAL_STORAGE_ROOT", str(tmp_path / "uploads"))
+    monkeypatch.setattr(Config, "SITEMAP_DIR", str(tmp_path / "sitemaps"))
+    monkeypatch.setattr(Config, "JINJA_BYTECODE_CACHE_DIR", None)
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+        for username, roles in (("admin", "admin"), ("bob", "user")):
+            user = User(username=username, roles=roles)
+            user.set_password("pw")
+            db.session.add(user)
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def login(app):
+    """
+    login("bob") -> a test client with that user's session.
+    """
+    def login(username):
+        client = app.test_client()
+        client.post("/auth/login", data={"username": username, "password": "pw"}).close()
+        return client
+    return login
+
+
+@pytest.fixture
+def comic(app):
+    with app.app_context():
+        comic = Comic(title="Issue 1", description="The first one", pdf_file="issue_1.pdf")
+        db.session.add(comic)
+        db.session.commit()
+        return comic.id
@@ -0,0 +1,28 @@
+from app.extensions import db
+from app.models.user import User
+from app.views.admin_routes import prefix_filter
+
+
+def test_user_search_matches_email_case_insensitively(app, login):
+    with app.app_context():
+        user = User(username="carol", email="Carol@Example.com", roles="user")
+        user.set_password("pw")
+        db.session.add(user)
+        db.session.commit()
+
+    response = login("admin").get("/admin/users?q=carol@ex")
+    assert response.status_code == 200
+    assert "Carol@Example.com" in response.get_data(as_text=True)
+
+
+def test_user_search_uses_the_lowercase_indexes(app):
+    with app.app_context():
+        stmt = db.select(User.id).where(db.or_(
+            prefix_filter(db.func.lower(User.username), "bo"),
+            prefix_filter(db.func.lower(User.email), "bo"),
+        ))
+        sql = str(stmt.compile(db.engine, compile_kwargs={"literal_binds": True}))
+        plan = " ".join(row[3] for row in db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}")))
+    assert "ix_users_username_lower" in plan
+    assert "ix_users_email_lower" in plan
+    assert "SCAN users" not in plan
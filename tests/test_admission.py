@@ -0,0 +1,88 @@
+import pytest
+
+from app import create_app
+from app.services.admission import MemoryBackend, admission_control, parse_policy
+from config import Config
+
+
+def _limit_login(spec):
+    admission_control.policies["login"] = parse_policy("login", spec)
+
+
+def _bad_login(client, **kwargs):
+    return client.post("/auth/login", data={"username": "bob", "password": "wrong"}, **kwargs)
+
+
+def test_parse_policy():
+    policy = parse_policy("login", "rate=5/m burst=10 concurrency=2")
+    assert policy.rate == pytest.approx(5 / 60)
+    assert (policy.burst, policy.concurrency) == (10, 2)
+
+    # Omitted parts are unlimited; a rate alone allows bursts of one second's worth
+    assert parse_policy("pdf", "").rate == 0
+    assert parse_policy("pdf", "concurrency=3").concurrency == 3
+    assert parse_policy("pdf", "rate=30/s").burst == 30
+    assert parse_policy("pdf", "rate=2/h").burst == 1
+
+    with pytest.raises(ValueError):
+        parse_policy("pdf", "rate=5/d")
+    with pytest.raises(ValueError):
+        parse_policy("pdf", "limit=5")
+
+
+def test_bucket_refills_at_rate():
+    backend = MemoryBackend()
+    assert backend.take("k", rate=1.0, burst=2, now=100.0) == 0
+    assert backend.take("k", rate=1.0, burst=2, now=100.0) == 0
+    assert backend.take("k", rate=1.0, burst=2, now=100.0) == pytest.approx(1.0)
+    assert backend.take("k", rate=1.0, burst=2, now=100.5) == pytest.approx(0.5)
+    assert backend.take("k", rate=1.0, burst=2, now=101.0) == 0
+    # Refill stops at the burst size
+    assert [backend.take("k", rate=1.0, burst=2, now=200.0) for _ in range(3)][-1] > 0
+
+
+def test_rate_limited_request_gets_retry_after(app):
+    _limit_login("rate=1/m burst=1")
+    client = app.test_client()
+    _bad_login(client).close()
+
+    response = _bad_login(client)
+    assert response.status_code == 429
+    assert 59 <= int(response.headers["Retry-After"]) <= 60
+    assert response.headers["Cache-Control"] == "no-store"
+
+
+def test_concurrency_slot_is_held_until_the_body_closes(app):
+    _limit_login("concurrency=2")
+    client = app.test_client()
+
+    open_responses = [_bad_login(client, buffered=False) for _ in range(2)]
+    assert all(r.status_code != 429 for r in open_responses)
+    assert _bad_login(client).status_code == 429
+
+    open_responses[0].close()
+    response = _bad_login(client)
+    assert response.status_code != 429
+    response.close()
+
+    for _ in range(3):
+        response = _bad_login(client)
+        assert response.status_code != 429
+        response.close()
+    open_responses[1].close()
+
+
+def test_proxy_fix_limits_by_forwarded_address(app, monkeypatch):
+    monkeypatch.setattr(Config, "PROXY_FIX_X_FOR", 1)
+    proxied = create_app()
+    _limit_login("rate=1/m burst=1")
+    client = proxied.test_client()
+
+    def login_from(ip):
+        response = _bad_login(client, headers={"X-Forwarded-For": ip})
+        response.close()
+        return response.status_code
+
+    assert login_from("203.0.113.7") != 429
+    assert login_from("203.0.113.8") != 429
+    assert login_from("203.0.113.7") == 429
@@ -0,0 +1,52 @@
+import threading
+import time
+
+from app.services.comment_feed import comment_broker
+
+
+def _wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_parked_long_polls_are_capped_per_worker(app, login, comic):
+    app.config["COMMENT_FEED_MAX_POLLS"] = 2
+    app.config["COMMENT_FEED_SYNC_SECONDS"] = 0.1
+    results = []
+
+    def park():
+        with app.test_client() as client:
+            response = client.get(f"/comics/{comic}/comments/since?after=0&wait=10")
+            results.append((response.status_code, response.get_json()))
+
+    parked = [threading.Thread(target=park) for _ in range(2)]
+    for thread in parked:
+        thread.start()
+    assert _wait_until(lambda: getattr(comment_broker, "_polls", 0) == 2)
+
+    # Past the cap a poll returns at once instead of taking another thread
+    started = time.monotonic()
+    response = app.test_client().get(f"/comics/{comic}/comments/since?after=0&wait=10")
+    assert response.status_code == 204
+    assert time.monotonic() - started < 1
+
+    # ...and ordinary pages are still served while the parked polls wait
+    assert app.test_client().get("/comics/").status_code == 200
+
+    response = login("bob").post(f"/comics/{comic}/comments", data={"comment": "hello"})
+    assert response.status_code == 302
+    for thread in parked:
+        thread.join(5)
+    assert [status for status, _ in results] == [200, 200]
+    assert all(body["comments"][0]["body"] == "hello" for _, body in results)
+    assert comment_broker._polls == 0
+
+
+def test_long_poll_without_wait_returns_immediately(app, comic):
+    response = app.test_client().get(f"/comics/{comic}/comments/since?after=0")
+    assert response.status_code == 200
+    assert response.get_json() == {"comments": []}
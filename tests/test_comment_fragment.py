@@ -0,0 +1,52 @@
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models.user import User
+
+
+def _fragment(client, comic_id, etag=None):
+    headers = {"If-None-Match": etag} if etag else {}
+    return client.get(f"/comics/{comic_id}/comments/fragment", headers=headers)
+
+
+def test_fragment_revalidates_until_comments_or_names_change(app, login, comic):
+    bob = login("bob")
+    bob.post(f"/comics/{comic}/comments", data={"comment": "First!"}).close()
+
+    first = _fragment(bob, comic)
+    assert first.status_code == 200
+    assert "bob" in first.get_data(as_text=True)
+    assert _fragment(bob, comic, first.headers["ETag"]).status_code == 304
+
+    bob.post(f"/comics/{comic}/comments", data={"comment": "Second"}).close()
+    second = _fragment(bob, comic, first.headers["ETag"])
+    assert second.status_code == 200
+    assert "Second" in second.get_data(as_text=True)
+
+    with app.app_context():
+        bob_id = db.session.execute(db.select(User.id).where(User.username == "bob")).scalar_one()
+    login("admin").post(f"/admin/users/{bob_id}/edit", data={"username": "robert", "roles": "user"}).close()
+
+    renamed = _fragment(bob, comic, second.headers["ETag"])
+    assert renamed.status_code == 200
+    assert "robert" in renamed.get_data(as_text=True)
+
+
+def test_fragment_revalidation_is_one_query(app, login, comic):
+    client = login("bob")
+    client.post(f"/comics/{comic}/comments", data={"comment": "Hello"}).close()
+    etag = _fragment(client, comic).headers["ETag"]
+
+    statements = []
+    with app.app_context():
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            response = _fragment(client, comic, etag)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+
+    assert response.status_code == 304
+    comment_queries = [sql for sql in statements if "comments" in sql]
+    assert len(comment_queries) == 1
+    assert "DISTINCT" not in comment_queries[0]
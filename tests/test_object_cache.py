@@ -0,0 +1,110 @@
+import threading
+import time
+
+import fakeredis
+import pytest
+import redis
+from flask import Flask
+
+from app.models.comic import Comic
+from app.services.object_cache import COMIC, ObjectCache, _load_record, comic_record, object_cache
+from config import Config
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def fake_redis(server, monkeypatch):
+    """
+    CACHE_REDIS_URL pointed at an in-process fake; every client made from the
+    URL talks to the same server, like workers sharing one Redis.
+    """
+    monkeypatch.setattr(Config, "CACHE_REDIS_URL", "redis://cache.test:6379/0")
+    monkeypatch.setattr(redis.Redis, "from_url", classmethod(lambda cls, url, **kw: fakeredis.FakeRedis(server=server)))
+    return fakeredis.FakeRedis(server=server)
+
+
+@pytest.fixture
+def app(fake_redis, app):
+    return app
+
+
+def _worker(**config):
+    """
+    Another process's cache over the same shared tier.
+    """
+    flask_app = Flask(__name__)
+    flask_app.config.update(CACHE_REDIS_URL=Config.CACHE_REDIS_URL, **config)
+    cache = ObjectCache()
+    cache.init_app(flask_app)
+    return flask_app, cache
+
+
+def _counting_loader(value, delay=0.0):
+    calls = []
+
+    def load(ident):
+        calls.append(ident)
+        time.sleep(delay)
+        return value
+
+    return load, calls
+
+
+def test_concurrent_misses_load_once(app):
+    # Two processes, four threads each, all missing the same key at once
+    load, calls = _counting_loader({"title": "Issue 1"}, delay=0.2)
+    workers = [_worker(), _worker()]
+    results = []
+
+    def read(flask_app, cache):
+        with flask_app.app_context():
+            results.append(cache.get(COMIC, 1, load))
+
+    threads = [threading.Thread(target=read, args=worker) for worker in workers for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert results == [{"title": "Issue 1"}] * 8
+
+
+def test_admin_write_bumps_the_shared_version(app, login, comic, fake_redis):
+    with app.app_context():
+        assert comic_record(comic)["title"] == "Issue 1"
+    assert fake_redis.get(f"ismaverse:ver:{COMIC}:{comic}") is None
+
+    response = login("admin").post(
+        f"/admin/comics/{comic}/edit", data={"title": "Issue 1 (remastered)", "description": "Again"}
+    )
+    response.close()
+    assert response.status_code == 302
+    assert int(fake_redis.get(f"ismaverse:ver:{COMIC}:{comic}")) == 1
+
+    # Another worker with a cold local tier skips the v0 entry and reloads
+    other_app, other = _worker()
+    with app.app_context():
+        assert other.get(COMIC, comic, _load_record(Comic))["title"] == "Issue 1 (remastered)"
+        # and this worker dropped its own local copy on the write
+        assert object_cache.get(COMIC, comic, _load_record(Comic))["title"] == "Issue 1 (remastered)"
+
+
+def test_negative_results_expire(app, fake_redis):
+    flask_app, cache = _worker(CACHE_NEGATIVE_TTL_SECONDS=1)
+    load, calls = _counting_loader(None)
+
+    with flask_app.app_context():
+        assert cache.get(COMIC, 404, load) is None
+        assert cache.get(COMIC, 404, load) is None
+        assert calls == [404]
+        assert 0 < fake_redis.pttl(f"ismaverse:{COMIC}:404:v0") <= 1000
+
+        time.sleep(1.1)
+        assert cache.get(COMIC, 404, load) is None
+        assert calls == [404, 404]
+
@@ -0,0 +1,82 @@
+import io
+import os
+import threading
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models.comic import Comic
+from app.views import admin_routes
+
+
+def _store_pdf(app, name, body):
+    path = os.path.join(app.config["LOCAL_STORAGE_ROOT"], "pdfs", name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as fh:
+        fh.write(body)
+
+
+def _comic_lookups(app):
+    statements = []
+    with app.app_context():
+        event.listen(
+            db.engine, "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement)
+            if "FROM comics" in statement else None,
+        )
+    return statements
+
+
+def test_range_requests_resolve_the_comic_from_the_cache(app, comic):
+    _store_pdf(app, "issue_1.pdf", b"%PDF-original")
+    _store_pdf(app, "issue_1.linear.pdf", b"%PDF-linear")
+    with app.app_context():
+        db.session.execute(db.update(Comic).values(pdf_linearized_file="issue_1.linear.pdf"))
+        db.session.commit()
+    lookups = _comic_lookups(app)
+
+    client = app.test_client()
+    for start in (0, 5, 8):
+        response = client.get("/comics/pdf/issue_1.pdf", headers={"Range": f"bytes={start}-"})
+        assert response.status_code == 206
+        assert response.data == b"%PDF-linear"[start:]
+        response.close()
+    assert len(lookups) == 1
+
+
+def test_unknown_pdf_is_404(app):
+    assert app.test_client().get("/comics/pdf/missing.pdf").status_code == 404
+
+
+def test_upload_does_not_wait_for_linearization(app, login, monkeypatch):
+    app.config["PDF_LINEARIZE"] = True
+    release = threading.Event()
+    done = threading.Event()
+
+    def slow_linearize(storage, filename):
+        release.wait(5)
+        done.set()
+        return "new.linear.pdf"
+
+    monkeypatch.setattr(admin_routes, "linearize_pdf", slow_linearize)
+    client = login("admin")
+    response = client.post("/admin/comics/new", data={
+        "title": "Fresh", "description": "", "pdf_file": (io.BytesIO(b"%PDF-new"), "new.pdf"),
+    }, content_type="multipart/form-data")
+    assert response.status_code == 302
+    assert not done.is_set()
+
+    with app.app_context():
+        assert db.session.execute(db.select(Comic.pdf_linearized_file)).scalar() is None
+    # The cached "no linearized copy" answer is dropped once the copy is recorded
+    _store_pdf(app, "new.linear.pdf", b"%PDF-new-linear")
+    assert client.get("/comics/pdf/new.pdf").data == b"%PDF-new"
+
+    release.set()
+    assert done.wait(5)
+    for thread in threading.enumerate():
+        if thread.name == "pdf-linearize":
+            thread.join(5)
+    with app.app_context():
+        assert db.session.execute(db.select(Comic.pdf_linearized_file)).scalar() == "new.linear.pdf"
+    assert client.get("/comics/pdf/new.pdf").data == b"%PDF-new-linear"
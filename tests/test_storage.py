@@ -0,0 +1,134 @@
+import io
+import os
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from app.services import storage as storage_module
+from app.services.storage import LocalStorage, S3Storage, StorageError, pdf_key
+
+DATA = bytes(range(256)) * 4   # 1 KiB, every offset distinguishable
+
+
+# =====================================================
+# LOCAL
+# =====================================================
+@pytest.fixture
+def local(tmp_path):
+    storage = LocalStorage(str(tmp_path / "uploads"))
+    storage.save("pdfs/issue_1.pdf", io.BytesIO(DATA))
+    return storage
+
+
+@pytest.mark.parametrize("key", [
+    "../secret.txt",
+    "pdfs/../../secret.txt",
+    "/etc/passwd",
+    "",
+    ".",
+])
+def test_local_rejects_keys_outside_the_root(local, key):
+    with pytest.raises(StorageError):
+        local.path(key)
+
+
+def test_pdf_key_rejects_traversal():
+    assert pdf_key("issue_1.pdf") == "pdfs/issue_1.pdf"
+    assert pdf_key("../app.db") is None
+
+
+def test_local_save_leaves_no_temp_files(local, tmp_path):
+    assert os.listdir(tmp_path / "uploads" / "pdfs") == ["issue_1.pdf"]
+    assert local.stat("pdfs/issue_1.pdf").size == len(DATA)
+
+
+@pytest.mark.parametrize("start,end", [
+    (0, 0),                      # single first byte
+    (0, None),                   # whole file
+    (3, 4),                      # straddles a chunk boundary
+    (4, 7),                      # exactly one chunk
+    (len(DATA) - 1, None),       # last byte
+    (1000, len(DATA) - 1),       # inclusive end at EOF
+    (1000, len(DATA) + 50),      # end past EOF is cut short
+])
+def test_local_iter_range_is_inclusive(local, monkeypatch, start, end):
+    monkeypatch.setattr(storage_module, "CHUNK_SIZE", 4)
+    chunks = list(local.iter_range("pdfs/issue_1.pdf", start, end))
+    expected = DATA[start:] if end is None else DATA[start:end + 1]
+    assert b"".join(chunks) == expected
+    assert all(len(chunk) <= 4 for chunk in chunks)
+
+
+def test_local_delete_is_idempotent(local):
+    local.delete("pdfs/issue_1.pdf")
+    local.delete("pdfs/issue_1.pdf")
+    assert local.stat("pdfs/issue_1.pdf") is None
+    assert not local.exists("pdfs/issue_1.pdf")
+
+
+# =====================================================
+# S3 (moto)
+# =====================================================
+@pytest.fixture
+def s3(monkeypatch):
+    for name, value in (("AWS_ACCESS_KEY_ID", "testing"), ("AWS_SECRET_ACCESS_KEY", "testing"),
+                        ("AWS_SESSION_TOKEN", "testing"), ("AWS_DEFAULT_REGION", "us-east-1")):
+        monkeypatch.setenv(name, value)
+    with mock_aws():
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="comics")
+        storage = S3Storage("comics", prefix="/media/", region="us-east-1")
+        storage.save("pdfs/issue_1.pdf", io.BytesIO(DATA), content_type="application/pdf")
+        yield storage
+
+
+def test_s3_save_and_stat(s3):
+    head = s3.client.head_object(Bucket="comics", Key="media/pdfs/issue_1.pdf")
+    assert head["ContentType"] == "application/pdf"
+    stat = s3.stat("pdfs/issue_1.pdf")
+    assert stat.size == len(DATA)
+    assert stat.etag and '"' not in stat.etag
+    assert s3.stat("pdfs/missing.pdf") is None
+
+
+@pytest.mark.parametrize("start,end", [(0, 0), (10, 19), (1000, None), (0, None)])
+def test_s3_iter_range_is_inclusive(s3, start, end):
+    expected = DATA[start:] if end is None else DATA[start:end + 1]
+    assert b"".join(s3.iter_range("pdfs/issue_1.pdf", start, end)) == expected
+
+
+def test_s3_delete(s3):
+    assert s3.exists("pdfs/issue_1.pdf")
+    s3.delete("pdfs/issue_1.pdf")
+    assert not s3.exists("pdfs/issue_1.pdf")
+
+
+def test_s3_presigned_and_public_urls(s3):
+    url = s3.presigned_url("pdfs/issue_1.pdf", 60, ResponseContentDisposition="attachment")
+    assert "/media/pdfs/issue_1.pdf" in url
+    assert "Expires=" in url or "X-Amz-Expires=60" in url
+    assert "response-content-disposition=attachment" in url
+
+    s3.public_url = "https://cdn.example.com"
+    assert s3.url("pdfs/issue_1.pdf") == "https://cdn.example.com/media/pdfs/issue_1.pdf"
+    # Per-request parameters still need a signature
+    assert s3.url("pdfs/issue_1.pdf", ResponseContentDisposition="attachment").startswith("https://comics.s3")
+
+
+def test_s3_requests_through_the_app(app, comic, s3):
+    app.extensions["storage"] = s3
+    client = app.test_client()
+
+    app.config["STORAGE_REDIRECT"] = True
+    response = client.get("/comics/pdf/issue_1.pdf")
+    assert response.status_code == 302
+    assert "/media/pdfs/issue_1.pdf" in response.headers["Location"]
+
+    app.config["STORAGE_REDIRECT"] = False
+    response = client.get("/comics/pdf/issue_1.pdf", headers={"Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"bytes 100-199/{len(DATA)}"
+    assert response.get_data() == DATA[100:200]
+
+    response = client.get("/comics/pdf/issue_1.pdf", headers={"Range": f"bytes={len(DATA)}-"})
+    assert response.status_code == 416
@@ -0,0 +1,91 @@
+import csv
+import json
+
+from app.extensions import db
+from app.models.user import User
+from app.services import user_import
+from app.services.user_import import import_users, read_records
+
+
+def _write_jsonl(path, lines):
+    path.write_text("\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines) + "\n")
+    return str(path)
+
+
+def _rejects(path):
+    with open(path, newline="", encoding="utf-8") as fh:
+        return {row["line"]: row for row in csv.DictReader(fh)}
+
+
+def test_import_reports_every_rejected_row(app, tmp_path):
+    with app.app_context():
+        existing = User(username="carol", email="carol@example.com", roles="user")
+        existing.set_password("pw")
+        db.session.add(existing)
+        db.session.commit()
+
+    source = _write_jsonl(tmp_path / "users.jsonl", [
+        {"username": "dave", "email": "dave@example.com", "password": "secret"},
+        {"username": "DAVE", "email": "other@example.com", "password": "secret"},   # in-file duplicate
+        {"username": "erin", "email": "Dave@Example.com", "password": "secret"},    # in-file duplicate email
+        {"username": "Bob", "password": "secret"},                                  # existing, other case
+        {"username": "frank", "email": "CAROL@example.com", "password": "secret"},  # existing email
+        {"username": "gina", "password": "secret", "roles": "Admin"},               # roles are case-sensitive
+        {"username": "hank", "password": 12345},
+        "{not json",
+        {"username": "ivy", "password_hash": "pbkdf2:sha256:1$salt$hash", "roles": "user,admin"},
+    ])
+    report = str(tmp_path / "rejects.csv")
+
+    with app.app_context():
+        result = app.test_cli_runner().invoke(
+            args=["import-users", source, "--rejects", report, "--workers", "1", "--batch-size", "4"]
+        )
+        assert result.exit_code == 0, result.output
+        assert "Imported 2 of 9 user(s); 7 rejected." in result.output
+
+        imported = dict(db.session.execute(
+            db.select(User.username, User.role_mask).where(User.username.in_(["dave", "ivy"]))
+        ).all())
+        assert imported == {"dave": 1, "ivy": 3}
+
+    rejects = _rejects(report)
+    assert {line: row["reason"] for line, row in rejects.items()} == {
+        "2": "duplicate in import file",
+        "3": "duplicate in import file",
+        "4": "username or email already in use",
+        "5": "username or email already in use",
+        "6": "unknown role(s): Admin",
+        "7": "password and password_hash must be strings",
+        "8": rejects["8"]["reason"],
+    }
+    assert rejects["8"]["reason"].startswith("invalid JSON")
+
+
+def test_rows_taken_after_the_lookup_are_rejected_one_by_one(app, tmp_path, monkeypatch):
+    # Simulate another writer taking "bob" between the batch lookup and the
+    # INSERT: the batch fails and is redone row by row in savepoints
+    monkeypatch.setattr(user_import, "_taken", lambda column, values: set())
+    source = _write_jsonl(tmp_path / "users.jsonl", [
+        {"username": "zed", "password_hash": "pbkdf2:sha256:1$salt$hash"},
+        {"username": "bob", "password_hash": "pbkdf2:sha256:1$salt$hash"},
+        {"username": "yan", "password_hash": "pbkdf2:sha256:1$salt$hash"},
+    ])
+    rejected = []
+
+    with app.app_context():
+        result = import_users(read_records(source), rejected.append, workers=1)
+        names = set(db.session.execute(db.select(User.username)).scalars())
+
+    assert (result.imported, result.rejected) == (2, 1)
+    assert [(r.line, r.username, r.reason) for r in rejected] == [(2, "bob", "username or email already in use")]
+    assert {"zed", "yan", "bob"} <= names
+
+
+def test_taken_lookup_uses_the_lowercase_email_index(app):
+    with app.app_context():
+        lowered = db.func.lower(User.email)
+        stmt = db.select(lowered).where(lowered.in_(["a@example.com", "b@example.com"]))
+        sql = str(stmt.compile(db.engine, compile_kwargs={"literal_binds": True}))
+        plan = " ".join(row[3] for row in db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}")))
+    assert "ix_users_email_lower" in plan